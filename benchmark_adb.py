@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.config_file import CONFIG_FILE
+from utils.constants_phone import EVENT_REGION
+from utils.session_recorder import SessionReader
+
+# Times the screen detectors and OCR readers on a labeled corpus of recorded
+# frames and checks their answers against the labels, so a change to a
+# detector can be judged on latency and accuracy numbers.
+#
+# Corpus (JSON):
+#
+#     {
+#       "archive": "../recordings/20250101_120000",
+#       "frames": [
+#         {
+#           "frame": "lobby_1.png",
+#           "labels": {
+#             "energy": 64,
+#             "support_card": {"spd": 2, "sta": 0, "pwr": 1, "guts": 0, "wit": 0, "friend": 0},
+#             "failure": {"spd": 12, "wit": 0},
+#             "templates": {"assets/buttons/training_btn.png": true, "assets/buttons/back_btn.png": false}
+#           }
+#         },
+#         {"frame": 17, "labels": {"event_name": "Extra Training"}},
+#         {"frame": "skills_1.png", "labels": {"skill_up": 3}}
+#       ]
+#     }
+#
+# Frame paths are relative to the corpus file, frame ids refer to the recorded
+# session in "archive" (utils/session_recorder.py). A detector only runs on the
+# frames that carry its label.
+
+ENERGY_TOLERANCE = 5  # Energy percentage points a reading may be off and still count as correct
+BENCHMARK_DIR = "benchmarks"
+
+def _match_template(frame, label):
+    from utils.adb_recognizer import match_template
+    return {path: bool(match_template(frame, path)) for path in label}
+
+def _check_support_card(frame, label):
+    from core.state_adb import check_support_card
+    return check_support_card(frame)
+
+def _check_energy_bar(frame, label):
+    from core.state_adb import check_energy_bar
+    return check_energy_bar(frame)
+
+def _check_failure(frame, label):
+    from core.state_adb import _check_failure_single_pass
+    return {train_type: _check_failure_single_pass(train_type, frame)[0] for train_type in label}
+
+def _extract_event_name(frame, label):
+    from core.ocr import extract_event_name_text
+    return extract_event_name_text(frame.crop(EVENT_REGION)).strip()
+
+def _recognize_skill_up(frame, label):
+    from utils.skill_recognizer import recognize_skill_up_locations
+    return recognize_skill_up_locations(debug_output=False, screenshot=frame)["count"]
+
+def _same_counts(result, label):
+    return all(result.get(key, 0) == count for key, count in label.items())
+
+# Detector -> (label key, run(frame, label) -> result, correct(result, label) -> bool)
+DETECTORS = {
+    "match_template": ("templates", _match_template, lambda result, label: result == label),
+    "check_support_card": ("support_card", _check_support_card, _same_counts),
+    "check_energy_bar": ("energy", _check_energy_bar, lambda result, label: abs(result - label) <= ENERGY_TOLERANCE),
+    "check_failure_single_pass": ("failure", _check_failure, _same_counts),
+    "extract_event_name_text": ("event_name", _extract_event_name, lambda result, label: result.lower() == label.strip().lower()),
+    "recognize_skill_up_locations": ("skill_up", _recognize_skill_up, lambda result, label: result == label),
+}
+
+def load_corpus(path):
+    """[(frame name, PIL image, labels)] of a corpus file"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    archive = SessionReader(os.path.join(base_dir, data["archive"])) if data.get("archive") else None
+    corpus = []
+    for entry in data["frames"]:
+        frame = entry["frame"]
+        if isinstance(frame, int):
+            if archive is None:
+                raise ValueError(f"Frame id {frame} needs an \"archive\" in {path}")
+            image = archive.frame(frame)
+            name = f"archive:{frame}"
+        else:
+            with Image.open(os.path.join(base_dir, frame)) as source:
+                image = source.convert("RGB")
+            name = frame
+        corpus.append((name, image, entry.get("labels", {})))
+    return corpus
+
+def _percentiles(samples):
+    values = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "min_ms": round(float(values.min()), 3),
+    }
+
+def benchmark_detector(name, corpus, iterations, warmup=1, cached=False):
+    """
+    Run one detector `iterations` times on every labeled frame.
+
+    Returns:
+        dict: latency percentiles, calls per second, accuracy and the frames it got wrong
+            (None when no frame in the corpus carries the detector's label)
+    """
+    from core.ocr import clear_ocr_cache
+
+    label_key, run, correct = DETECTORS[name]
+    frames = [(frame_name, image, labels[label_key]) for frame_name, image, labels in corpus if label_key in labels]
+    if not frames:
+        return None
+
+    samples = []
+    errors = []
+    correct_frames = 0
+    for frame_name, image, label in frames:
+        for _ in range(warmup):
+            run(image, label)
+        result = None
+        for _ in range(iterations):
+            if not cached:
+                # Measure the OCR itself, not the result cache
+                clear_ocr_cache()
+            start = time.perf_counter()
+            result = run(image, label)
+            samples.append(time.perf_counter() - start)
+        if correct(result, label):
+            correct_frames += 1
+        else:
+            errors.append({"frame": frame_name, "expected": label, "got": result})
+
+    total = sum(samples)
+    report = {
+        "frames": len(frames),
+        "calls": len(samples),
+        "throughput_per_s": round(len(samples) / total, 2) if total else None,
+        "accuracy": round(correct_frames / len(frames), 4),
+        "errors": errors,
+    }
+    report.update(_percentiles(samples))
+    return report
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, timeout=5).stdout.strip()
+        return f"{commit}-dirty" if commit and dirty else commit or None
+    except Exception:
+        return None
+
+def machine_info():
+    info = {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        import pytesseract
+        info["tesseract"] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        info["tesseract"] = None
+    return info
+
+def run_benchmark(corpus_path, detectors=None, iterations=20, warmup=1, cached=False):
+    """Benchmark the given detectors (default: all) on a corpus, returns the results dict"""
+    corpus = load_corpus(corpus_path)
+    results = {
+        "corpus": corpus_path,
+        "frames": len(corpus),
+        "iterations": iterations,
+        "ocr_cache": cached,
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": machine_info(),
+        "detectors": {},
+    }
+    for name in detectors or DETECTORS:
+        print(f"[INFO] Benchmarking {name}...")
+        try:
+            report = benchmark_detector(name, corpus, iterations, warmup, cached)
+        except Exception as e:
+            print(f"[ERROR] {name} failed: {e}")
+            results.setdefault("failed", {})[name] = str(e)
+            continue
+        if report is None:
+            print(f"[INFO] No frames labeled '{DETECTORS[name][0]}', skipping {name}")
+            continue
+        results["detectors"][name] = report
+    return results
+
+def print_results(results, baseline=None):
+    """Table of the results, with the change against a baseline run when given"""
+    print(f"\nCommit {results['commit']} on {results['machine']['processor']} ({results['machine']['cpu_count']} CPUs), {results['iterations']} iterations per frame")
+    header = f"{'detector':<30}{'frames':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/s':>10}{'accuracy':>10}"
+    if baseline:
+        header += f"{'p50 vs base':>13}{'acc vs base':>13}"
+    print(header)
+    for name, report in results["detectors"].items():
+        line = f"{name:<30}{report['frames']:>7}{report['p50_ms']:>10.2f}{report['p95_ms']:>10.2f}{report['p99_ms']:>10.2f}{report['throughput_per_s'] or 0:>10.1f}{report['accuracy']:>10.1%}"
+        base = (baseline or {}).get("detectors", {}).get(name)
+        if base:
+            change = (report["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+            line += f"{change:>+13.1%}{report['accuracy'] - base['accuracy']:>+13.1%}"
+        elif baseline:
+            line += f"{'new':>13}{'':>13}"
+        print(line)
+    for name, report in results["detectors"].items():
+        for error in report["errors"]:
+            print(f"[WARNING] {name} on {error['frame']}: expected {error['expected']}, got {error['got']}")
+    for name, error in results.get("failed", {}).items():
+        print(f"[ERROR] {name} could not run: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the screen detectors and OCR readers on a labeled frame corpus")
+    parser.add_argument("corpus", help="Corpus JSON (see the top of benchmark_adb.py)")
+    parser.add_argument("--detector", action="append", choices=list(DETECTORS), help="Only benchmark this detector (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per frame")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per frame before timing")
+    parser.add_argument("--cached", action="store_true", help="Keep the OCR result cache between runs")
+    parser.add_argument("--output", help=f"Results JSON (default: {BENCHMARK_DIR}/<date>_<time>_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    print("Uma Auto - Detector Benchmark")
+    print("=" * 40)
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            if json.load(f).get("debug_mode", False):
+                print("[WARNING] debug_mode is on: detectors save debug images, timings will be slower")
+    except Exception:
+        pass
+
+    results = run_benchmark(args.corpus, args.detector, args.iterations, args.warmup, args.cached)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["baseline"] = {"path": args.compare, "commit": baseline.get("commit"), "machine": baseline.get("machine")}
+    print_results(results, baseline)
+
+    output = args.output
+    if output is None:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        output = os.path.join(BENCHMARK_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{results['commit'] or 'unknown'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\n[INFO] Results saved to {output}")
+    sys.exit(0 if results["detectors"] else 1)
+
+if __name__ == "__main__":
+    main()
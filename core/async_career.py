@@ -0,0 +1,163 @@
+"""Asyncio career loop.
+
+Drives any number of devices from one event loop. Each device runs an explicit
+state machine:
+
+    observe -> claw    (claw machine, blocking helper in a thread)
+            -> dialog  (ok, inspiration, next, cancel: tapped directly)
+            -> event   (event choice, event handling in a thread)
+            -> lobby   (one career turn in a thread)
+            -> observe
+
+Screenshots, taps, waits and template matching never block the loop, so one
+slow device doesn't hold up the others. Turn decisions (training scan, races,
+skills) still run the existing blocking code from core.execute_adb, in the
+device's own worker thread. Every state has a timeout. Cancelling a device's
+task (Ctrl+C) or a timeout stops the loop at once; a turn still running in
+the worker thread stops at its next sleep or ADB command.
+
+All devices share config.json, only the device address differs. Use farm_adb.py
+when devices need different settings.
+"""
+import asyncio
+import json
+import sys
+import time
+
+from utils.async_device import AsyncDevice
+from utils.config_file import CONFIG_FILE
+from core.execute_adb import claw_machine, handle_event_screen, career_turn, load_lobby_settings, career_state
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+ASYNC_CONFIG = config.get("async_career", {})
+OBSERVE_INTERVAL = ASYNC_CONFIG.get("observe_interval", 0.3)  # Pause between screens with nothing to do
+STUCK_TIMEOUT = ASYNC_CONFIG.get("stuck_timeout", 120)  # Seconds without a known screen before giving up
+TURN_TIMEOUT = ASYNC_CONFIG.get("turn_timeout", 600)  # Longest a single lobby turn may take
+
+# (state, template, confidence, region), first match in this order wins.
+# Same screens and order as the career_lobby checks.
+SCREEN_TEMPLATES = [
+    ("claw", "assets/buttons/claw.png", 0.8, None),
+    ("ok", "assets/buttons/ok_btn.png", 0.7, None),
+    ("event", "assets/icons/event_choice_1.png", 0.45, (6, 450, 126, 1776)),
+    ("inspiration", "assets/buttons/inspiration_btn.png", 0.5, None),
+    ("next", "assets/buttons/next_btn.png", 0.6, None),
+    ("cancel", "assets/buttons/cancel_btn.png", 0.6, None),
+    ("lobby", "assets/ui/tazuna_hint.png", 0.8, None),
+]
+DIALOG_BUTTONS = ("ok", "inspiration", "next", "cancel")
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+class AsyncCareer:
+    """
+    Career state machine for one device.
+
+    Args:
+        device: AsyncDevice to play on
+        settings: load_lobby_settings() result, loaded once if omitted
+    """
+
+    def __init__(self, device, settings=None):
+        self.device = device
+        self.settings = settings or load_lobby_settings()
+        self.state = "observe"
+        self.turns = 0
+        self.last_progress = time.monotonic()
+
+    def log(self, message):
+        print(f"[{self.device.device_address}] {message}")
+
+    async def observe(self):
+        """Screenshot and work out the next state"""
+        frame = await self.device.frame()
+        name, center = await self.device.first_match(frame, SCREEN_TEMPLATES)
+        if name is None:
+            if time.monotonic() - self.last_progress > STUCK_TIMEOUT:
+                raise asyncio.TimeoutError(f"no known screen for {STUCK_TIMEOUT}s")
+            debug_print(f"[DEBUG] [{self.device.device_address}] No known screen, waiting")
+            await asyncio.sleep(OBSERVE_INTERVAL)
+            return "observe", None, frame
+        self.last_progress = time.monotonic()
+        if name in DIALOG_BUTTONS:
+            return "dialog", (name, center), frame
+        return name, center, frame
+
+    async def step(self):
+        """One state transition"""
+        state, data, frame = await self.observe()
+        self.state = state
+        if state == "claw":
+            await self.device.call(claw_machine)
+        elif state == "dialog":
+            name, (x, y) = data
+            debug_print(f"[DEBUG] [{self.device.device_address}] Tapping {name} at {(x, y)}")
+            await self.device.tap(x, y)
+        elif state == "event":
+            if not await self.device.call(handle_event_screen, frame):
+                await asyncio.sleep(OBSERVE_INTERVAL)
+        elif state == "lobby":
+            await self.device.call(career_turn, self.settings, timeout=TURN_TIMEOUT)
+            self.turns += 1
+            self.last_progress = time.monotonic()
+        self.state = "observe"
+
+    async def run(self):
+        """Play until cancelled or stuck"""
+        self.log("Career loop started")
+        try:
+            while True:
+                await self.step()
+        except asyncio.CancelledError:
+            self.log(f"Career loop stopped after {self.turns} turn(s)")
+            raise
+        except asyncio.TimeoutError as e:
+            print(f"[ERROR] [{self.device.device_address}] Stuck in state '{self.state}': {e or 'timed out'}")
+        except Exception as e:
+            print(f"[ERROR] [{self.device.device_address}] Career loop error: {e}")
+        finally:
+            self.device.stop()
+            self.state = "stopped"
+
+async def run_devices(device_addresses, settings=None):
+    """
+    Run one career per device address on the current event loop.
+
+    Returns:
+        list: AsyncCareer per device, in the order given
+    """
+    settings = settings or load_lobby_settings()
+    careers = [AsyncCareer(AsyncDevice(address), settings) for address in device_addresses]
+    for career in careers:
+        # Create each device's tracker up front so worker threads never race on the dict
+        career_state.tracker(career.device.device_address)
+    await asyncio.gather(*(career.run() for career in careers))
+    return careers
+
+def main():
+    print("Uma Auto - ADB Async")
+    print("=" * 40)
+
+    device_addresses = sys.argv[1:]
+    if not device_addresses:
+        device_addresses = [device["device_address"] for device in config.get("farm", {}).get("devices", []) if device.get("device_address")]
+    if not device_addresses:
+        device_addresses = [AsyncDevice().device_address]
+    print(f"Devices: {', '.join(device_addresses)}")
+    print("Press Ctrl+C to stop the automation.")
+    print("=" * 40)
+
+    try:
+        asyncio.run(run_devices(device_addresses))
+    except KeyboardInterrupt:
+        print("\nAutomation stopped by user.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Incremental lobby state tracking.
+
+Keeps the last known career state and only re-reads what changed between
+lobby visits. Regions whose pixels didn't change keep their value, regions
+that look like a crop seen before get that crop's value back, and the turn
+counter and calendar are predicted from the action taken and confirmed with
+one cheap read. Everything else falls back to the regular check_* readers,
+all on a single frame.
+"""
+import difflib
+import re
+
+import numpy as np
+from PIL import Image
+
+from utils.adb_screenshot import enhanced_screenshot, take_screenshot, current_device
+from core.ocr import cached_image_to_string, get_ocr_cache_stats
+from utils.constants_phone import (
+    MOOD_REGION, TURN_REGION, YEAR_REGION, CRITERIA_REGION, GOAL_REGION, ENERGY_BAR_REGION,
+    SPD_REGION, STA_REGION, PWR_REGION, GUTS_REGION, WIT_REGION
+)
+from core.state_adb import (
+    check_mood, check_turn, check_current_year, check_criteria, check_goal_name_with_g1_requirement,
+    check_energy_bar, check_current_stats, debug_print
+)
+
+STAT_REGIONS = {
+    "spd": SPD_REGION,
+    "sta": STA_REGION,
+    "pwr": PWR_REGION,
+    "guts": GUTS_REGION,
+    "wit": WIT_REGION
+}
+
+# Actions that use up one turn of the career calendar
+TURN_ACTIONS = ("train", "rest", "recreation", "race", "infirmary")
+
+CALENDAR_YEARS = ["Junior Year", "Classic Year", "Senior Year"]
+CALENDAR_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# A region counts as unchanged when almost no pixel moved by more than PIXEL_DIFF_LEVEL
+PIXEL_DIFF_LEVEL = 48
+PIXEL_DIFF_RATIO = 0.001
+REMEMBERED_CROPS = 16  # Crops remembered per field for recall
+YEAR_MATCH_RATIO = 0.8
+
+def next_calendar_label(year):
+    """Calendar label one turn after `year` ("Junior Year Early Jun" -> "Junior Year Late Jun"),
+    or None when the next label can't be predicted (Pre-Debut, unreadable text)."""
+    parts = year.split(" ") if isinstance(year, str) else []
+    if len(parts) != 4 or parts[2] not in ("Early", "Late") or parts[3] not in CALENDAR_MONTHS:
+        return None
+    year_name = f"{parts[0]} {parts[1]}"
+    if year_name not in CALENDAR_YEARS:
+        return None
+    if parts[2] == "Early":
+        return f"{year_name} Late {parts[3]}"
+    month_index = CALENDAR_MONTHS.index(parts[3])
+    if month_index < len(CALENDAR_MONTHS) - 1:
+        return f"{year_name} Early {CALENDAR_MONTHS[month_index + 1]}"
+    year_index = CALENDAR_YEARS.index(year_name)
+    if year_index < len(CALENDAR_YEARS) - 1:
+        return f"{CALENDAR_YEARS[year_index + 1]} Early Jan"
+    return "Finale Season"
+
+def _crop_gray(screenshot, region):
+    return np.asarray(screenshot.crop(region).convert("L"), dtype=np.int16)
+
+def _same_pixels(a, b):
+    if a is None or b is None or a.shape != b.shape:
+        return False
+    changed = np.count_nonzero(np.abs(a - b) > PIXEL_DIFF_LEVEL)
+    return changed <= a.size * PIXEL_DIFF_RATIO
+
+def _is_unknown(value):
+    """Failed reads (unknown text, stat OCR falling back to 0) are never reused"""
+    if isinstance(value, str):
+        return value.startswith("Unknown") or value == "UNKNOWN"
+    return value is None or value == 0
+
+def _verify_turn(screenshot, predicted):
+    """Single digits-only OCR pass, True if it reads the predicted turn"""
+    turn_img = screenshot.crop(TURN_REGION).convert("L")
+    turn_img = turn_img.resize((turn_img.width * 2, turn_img.height * 2), Image.BICUBIC)
+    text = cached_image_to_string(turn_img, config='--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789').strip()
+    digit_match = re.search(r'(\d+)', text)
+    debug_print(f"[DEBUG] Turn verification read: '{text}' (predicted {predicted})")
+    return bool(digit_match) and int(digit_match.group(1)) == predicted
+
+def _verify_year(screenshot, predicted):
+    """Single OCR pass, True if it fuzzy matches the predicted calendar label"""
+    text = cached_image_to_string(enhanced_screenshot(YEAR_REGION, screenshot), config='--oem 3 --psm 7').strip()
+    ratio = difflib.SequenceMatcher(None, text, predicted).ratio()
+    debug_print(f"[DEBUG] Year verification read: '{text}' (predicted '{predicted}', ratio {ratio:.2f})")
+    return ratio >= YEAR_MATCH_RATIO
+
+class CareerStateTracker:
+    """Keeps the last lobby state and re-reads only what changed.
+
+    Call `note_action()` whenever the bot does something that uses up a turn
+    and `read()` once per lobby visit."""
+
+    def __init__(self):
+        self.listeners = []
+        self.reset()
+
+    def add_listener(self, callback):
+        """Call `callback(event, data)` on every turn action ("action", name) and lobby read ("state", state)"""
+        self.listeners.append(callback)
+
+    def _notify(self, event, data):
+        for callback in self.listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                debug_print(f"[DEBUG] Career state listener error: {e}")
+
+    def reset(self):
+        self.state = {}
+        self.crops = {}
+        self.memory = {}
+        self.pending_turns = 0
+        self.ocr_reads = 0
+        self.reused = 0
+
+    def note_action(self, action):
+        """Record an action taken since the last read"""
+        if action in TURN_ACTIONS:
+            self.pending_turns += 1
+            debug_print(f"[DEBUG] Career state: noted turn action '{action}'")
+            self._notify("action", action)
+
+    def _recall(self, name, crop):
+        for remembered_crop, value in self.memory.get(name, []):
+            if _same_pixels(crop, remembered_crop):
+                return value
+        return None
+
+    def _remember(self, name, crop, value):
+        self.state[name] = value
+        if _is_unknown(value):
+            self.crops.pop(name, None)
+            return
+        self.crops[name] = crop
+        remembered = self.memory.setdefault(name, [])
+        remembered.insert(0, (crop, value))
+        del remembered[REMEMBERED_CROPS:]
+
+    def _known_value(self, name, crop):
+        """(True, value) when a field's crop needs no OCR, (False, None) otherwise"""
+        # Unchanged region keeps its value
+        if name in self.state and _same_pixels(crop, self.crops.get(name)):
+            self.reused += 1
+            return True, self.state[name]
+
+        # Same crop seen before (mood labels, goal text, repeating digits)
+        value = self._recall(name, crop)
+        if value is not None:
+            debug_print(f"[DEBUG] Career state: {name} recalled from a previous crop: {value}")
+            self.reused += 1
+            self._remember(name, crop, value)
+            return True, value
+        return False, None
+
+    def _read_field(self, name, screenshot, region, reader, predicted=None, verify=None, ocr=True):
+        crop = _crop_gray(screenshot, region)
+        known, value = self._known_value(name, crop)
+        if known:
+            return value
+
+        # Predictable change, confirm it with a cheap read
+        if predicted is not None and verify is not None:
+            self.ocr_reads += 1
+            if verify(screenshot, predicted):
+                debug_print(f"[DEBUG] Career state: {name} prediction confirmed: {predicted}")
+                self._remember(name, crop, predicted)
+                return predicted
+            debug_print(f"[DEBUG] Career state: {name} prediction {predicted} rejected, reading in full")
+
+        if ocr:
+            self.ocr_reads += 1
+        value = reader(screenshot)
+        self._remember(name, crop, value)
+        return value
+
+    def _predict_turn(self):
+        last_turn = self.state.get("turn")
+        if self.pending_turns == 1 and isinstance(last_turn, int) and last_turn > 1:
+            return last_turn - 1
+        return None
+
+    def _predict_year(self):
+        if self.pending_turns == 1:
+            return next_calendar_label(self.state.get("year"))
+        return None
+
+    def read(self, screenshot=None):
+        """Read the lobby state from a single frame.
+
+        Returns:
+            dict: mood, turn, year, goal (check_goal_name_with_g1_requirement dict),
+                  criteria, energy and stats
+        """
+        if screenshot is None:
+            screenshot = take_screenshot()
+        self.ocr_reads = 0
+        self.reused = 0
+
+        predicted_turn = self._predict_turn()
+        predicted_year = self._predict_year()
+
+        state = {
+            "mood": self._read_field("mood", screenshot, MOOD_REGION, check_mood),
+            "turn": self._read_field("turn", screenshot, TURN_REGION, check_turn, predicted_turn, _verify_turn),
+            "year": self._read_field("year", screenshot, YEAR_REGION, check_current_year, predicted_year, _verify_year),
+            "goal": self._read_field("goal", screenshot, GOAL_REGION, check_goal_name_with_g1_requirement),
+            "criteria": self._read_field("criteria", screenshot, CRITERIA_REGION, check_criteria),
+            "energy": self._read_field("energy", screenshot, ENERGY_BAR_REGION, check_energy_bar, ocr=False),
+        }
+
+        # Stats: only OCR the values whose region changed, all of them in one call
+        stats = {}
+        changed = {}
+        for stat_name, region in STAT_REGIONS.items():
+            crop = _crop_gray(screenshot, region)
+            known, value = self._known_value(f"stat_{stat_name}", crop)
+            if known:
+                stats[stat_name] = value
+            else:
+                changed[stat_name] = crop
+        if changed:
+            self.ocr_reads += 1
+            values = check_current_stats(screenshot, list(changed))
+            for stat_name, crop in changed.items():
+                stats[stat_name] = values.get(stat_name, 0)
+                self._remember(f"stat_{stat_name}", crop, stats[stat_name])
+        state["stats"] = {stat_name: stats[stat_name] for stat_name in STAT_REGIONS}
+
+        self.pending_turns = 0
+        debug_print(f"[DEBUG] Career state read: {self.ocr_reads} OCR reads, {self.reused} values reused, OCR cache: {get_ocr_cache_stats()}")
+        self._notify("state", state)
+        return state
+
+class DeviceCareerStates:
+    """One CareerStateTracker per ADB device, picked by the device the caller is bound to
+    (utils.adb_screenshot.use_device). Used like a single tracker."""
+
+    def __init__(self):
+        self.trackers = {}
+
+    def tracker(self, device_address=None):
+        if device_address is None:
+            device_address = current_device()
+        tracker = self.trackers.get(device_address)
+        if tracker is None:
+            tracker = CareerStateTracker()
+            self.trackers[device_address] = tracker
+        return tracker
+
+    def __getattr__(self, name):
+        return getattr(self.tracker(), name)
@@ -0,0 +1,173 @@
+"""On-disk store of event title fingerprints.
+
+Maps a perceptual hash of the event title crop (EVENT_REGION) to the event
+name it resolved to and the option recommended for it, so events seen in
+earlier careers are recognized without OCR. Only names confirmed by the
+event database are stored. Recommendations are tied to a hash of
+event_priority.json and are ignored once that file changes.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+
+from PIL import Image, ImageOps
+from utils.config_file import CONFIG_FILE
+from utils import clock
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+FINGERPRINT_CONFIG = config.get("event_fingerprints", {})
+FINGERPRINTS_ENABLED = FINGERPRINT_CONFIG.get("enabled", True)
+FINGERPRINTS_PATH = FINGERPRINT_CONFIG.get("path", "event_fingerprints.json")
+FINGERPRINTS_MAX_ENTRIES = FINGERPRINT_CONFIG.get("max_entries", 2000)
+FINGERPRINTS_MAX_DISTANCE = FINGERPRINT_CONFIG.get("max_distance", 4)
+
+# Difference hash over a wide grid, event titles are a single line of text
+HASH_WIDTH = 128
+HASH_HEIGHT = 24
+
+PRIORITY_FILE = "event_priority.json"
+
+# Hit counters and last-used times from lookups are only written this often
+# (and at exit); new resolutions are written right away
+SAVE_INTERVAL = 60
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+def file_digest(path):
+    """Short content hash of a file, empty string if it doesn't exist"""
+    if not os.path.exists(path):
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+def event_fingerprint(event_image):
+    """Perceptual hash of an event title crop (grayscale, autocontrast, difference hash)"""
+    gray = ImageOps.autocontrast(event_image.convert("L"), cutoff=1)
+    small = gray.resize((HASH_WIDTH + 1, HASH_HEIGHT), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_HEIGHT):
+        offset = row * (HASH_WIDTH + 1)
+        for col in range(HASH_WIDTH):
+            value = (value << 1) | (pixels[offset + col + 1] > pixels[offset + col])
+    return value
+
+def _hamming(a, b):
+    return (a ^ b).bit_count()
+
+class EventFingerprintStore:
+    """Fingerprint -> event name/recommendation store with nearest neighbour lookup and LRU eviction"""
+
+    def __init__(self, path=FINGERPRINTS_PATH, max_entries=FINGERPRINTS_MAX_ENTRIES, max_distance=FINGERPRINTS_MAX_DISTANCE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.entries = []
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.last_save = clock.monotonic()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for entry in data.get("entries", []):
+                entry["fingerprint"] = int(entry["fingerprint"], 16)
+                self.entries.append(entry)
+            debug_print(f"[DEBUG] Loaded {len(self.entries)} event fingerprints from {self.path}")
+        except Exception as e:
+            print(f"[WARNING] Could not load event fingerprints from {self.path}: {e}")
+            self.entries = []
+
+    def _save(self):
+        self.dirty = False
+        self.last_save = clock.monotonic()
+        data = {"entries": [{**entry, "fingerprint": format(entry["fingerprint"], "x")} for entry in self.entries]}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[WARNING] Could not save event fingerprints to {self.path}: {e}")
+
+    def lookup(self, fingerprint):
+        """Closest stored entry within max_distance, or None.
+
+        A match is rejected when another event name is just as close, so two
+        look-alike titles fall back to OCR instead of guessing."""
+        with self.lock:
+            best = None
+            best_distance = None
+            for entry in self.entries:
+                distance = _hamming(entry["fingerprint"], fingerprint)
+                if distance > self.max_distance:
+                    continue
+                if best is None or distance < best_distance:
+                    best, best_distance = entry, distance
+                elif distance == best_distance and entry["event_name"] != best["event_name"]:
+                    debug_print(f"[DEBUG] Ambiguous event fingerprint: '{best['event_name']}' / '{entry['event_name']}'")
+                    return None
+            if best is None:
+                return None
+            best["last_used"] = clock.time()
+            best["hits"] = best.get("hits", 0) + 1
+            self.dirty = True
+            if clock.monotonic() - self.last_save >= SAVE_INTERVAL:
+                self._save()
+            debug_print(f"[DEBUG] Event fingerprint match: '{best['event_name']}' (distance {best_distance})")
+            return dict(best)
+
+    def record(self, fingerprint, event_name, recommended_option, priority_hash):
+        """Store (or refresh) the resolution of an event title"""
+        with self.lock:
+            now = clock.time()
+            for entry in self.entries:
+                if _hamming(entry["fingerprint"], fingerprint) == 0:
+                    entry.update({"event_name": event_name, "recommended_option": recommended_option,
+                                  "priority_hash": priority_hash, "last_used": now})
+                    break
+            else:
+                self.entries.append({
+                    "fingerprint": fingerprint,
+                    "event_name": event_name,
+                    "recommended_option": recommended_option,
+                    "priority_hash": priority_hash,
+                    "last_used": now,
+                    "hits": 0,
+                })
+            # Evict least recently used entries
+            if len(self.entries) > self.max_entries:
+                self.entries.sort(key=lambda entry: entry["last_used"], reverse=True)
+                del self.entries[self.max_entries:]
+            self._save()
+
+    def flush(self):
+        """Write lookup statistics that haven't been saved yet"""
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+_store = None
+
+def get_fingerprint_store():
+    """Shared store instance, None when disabled in config"""
+    global _store
+    if not FINGERPRINTS_ENABLED:
+        return None
+    if _store is None:
+        _store = EventFingerprintStore()
+        atexit.register(_store.flush)
+    return _store
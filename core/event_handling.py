@@ -1,32 +1,56 @@
 import os
 import json
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from PIL import ImageStat
 
 from utils.adb_recognizer import locate_all_on_screen, match_template
-from utils.adb_screenshot import take_screenshot, capture_region
+from utils.adb_screenshot import take_screenshot
+from utils.constants_phone import EVENT_REGION
 from core.ocr import extract_event_name_text
+from core.event_fingerprints import get_fingerprint_store, event_fingerprint, file_digest, PRIORITY_FILE
+from core.event_recommendations import get_priority_matcher, lookup_recommendation
+from core.event_outcomes import recommend_by_weights, weights_digest
+from utils.config_file import CONFIG_FILE
+from utils import clock
 
 # Load config and check debug mode
-with open("config.json", "r", encoding="utf-8") as config_file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
     config = json.load(config_file)
     DEBUG_MODE = config.get("debug_mode", False)
+    EVENT_CHOICE_MODE = config.get("event_choice_mode", "priority")
+    EVENT_SETTLE_CONFIG = config.get("event_settle", {})
+    EVENT_SETTLE_POLL = EVENT_SETTLE_CONFIG.get("poll_interval", 0.1)
+    EVENT_SETTLE_TIMEOUT = EVENT_SETTLE_CONFIG.get("timeout", 2.0)
+
+EVENT_CHOICE_TEMPLATE = "assets/icons/event_choice_1.png"
+EVENT_CHOICE_REGION = (6, 450, 126, 1776)  # x, y, width, height
+EVENT_CHOICE_BOX = (6, 450, 132, 2226)  # Same area as a crop box
+
+# A region counts as settled when almost no pixel moved by more than SETTLE_DIFF_LEVEL
+SETTLE_DIFF_LEVEL = 8
+SETTLE_DIFF_RATIO = 0.002
+
+# Runs the speculative event title read while the dialog finishes animating
+_title_executor = ThreadPoolExecutor(max_workers=1)
 
 def debug_print(message):
     """Print debug message only if DEBUG_MODE is enabled"""
     if DEBUG_MODE:
         print(message)
 
-def count_event_choices():
+def count_event_choices(screenshot=None):
     """
     Count how many event choice icons are found on screen.
     Uses event_choice_1.png as template to find all U-shaped icons.
     Filters matches by brightness to avoid dim/false positives.
+    Args:
+        screenshot: Frame to search (optional, a new one is captured if not given)
     Returns:
         tuple: (count, locations) - number of unique bright choices found and their locations
     """
-    template_path = "assets/icons/event_choice_1.png"
+    template_path = EVENT_CHOICE_TEMPLATE
     
     if not os.path.exists(template_path):
         debug_print(f"[DEBUG] Template not found: {template_path}")
@@ -34,9 +58,10 @@ def count_event_choices():
     
     try:
         debug_print(f"[DEBUG] Searching for event choices using: {template_path}")
+        if screenshot is None:
+            screenshot = take_screenshot()
         # Search for all instances of the template in the event choice region
-        event_choice_region = (6, 450, 126, 1776)
-        locations = locate_all_on_screen(template_path, confidence=0.45, region=event_choice_region)
+        locations = match_template(screenshot, template_path, confidence=0.45, region=EVENT_CHOICE_REGION) or []
         debug_print(f"[DEBUG] Raw locations found: {len(locations)}")
         if not locations:
             debug_print("[DEBUG] No event choice locations found")
@@ -56,8 +81,7 @@ def count_event_choices():
             distance = ((center[0] - last_center[0]) ** 2 + (center[1] - last_center[1]) ** 2) ** 0.5
             if distance >= 150:  # Increased from 30 to 150 to separate different choice rows
                 unique_locations.append(location)
-        # Compute brightness and filter
-        screenshot = take_screenshot()
+        # Compute brightness on the same frame and filter
         grayscale = screenshot.convert("L")
         bright_threshold = 160.0
         bright_locations = []
@@ -92,13 +116,14 @@ def load_event_priorities():
         print(f"Error loading event priorities: {e}")
         return {"Good_choices": [], "Bad_choices": []}
 
-def analyze_event_options(options, priorities):
+def analyze_event_options(options, priorities, matcher=None):
     """
     Analyze event options and recommend the best choice based on priorities.
     
     Args:
         options: Dict of option_name -> option_reward
         priorities: Dict with "Good_choices" and "Bad_choices" lists
+        matcher: PriorityMatcher built from `priorities` (looked up when None)
     
     Returns:
         Dict with recommendation info:
@@ -110,7 +135,6 @@ def analyze_event_options(options, priorities):
         }
     """
     good_choices = priorities.get("Good_choices", [])
-    bad_choices = priorities.get("Bad_choices", [])
     
     # Guard clause: If no options are provided, return a default failure state.
     if not options:
@@ -159,22 +183,13 @@ def analyze_event_options(options, priorities):
 
     option_analysis = {}
     all_options_bad = True
+    if matcher is None:
+        matcher = get_priority_matcher(priorities)
     
     # Analyze each option
     for option_name, option_reward in options.items():
-        reward_lower = option_reward.lower()
-        
-        # Check for good choices
-        good_matches = []
-        for good_choice in good_choices:
-            if good_choice.lower() in reward_lower:
-                good_matches.append(good_choice)
-        
-        # Check for bad choices
-        bad_matches = []
-        for bad_choice in bad_choices:
-            if bad_choice.lower() in reward_lower:
-                bad_matches.append(bad_choice)
+        # Good and bad choices found in one pass over the reward text
+        good_matches, bad_matches = matcher.match(option_reward)
         
         option_analysis[option_name] = {
             "reward": option_reward,
@@ -309,86 +324,6 @@ def _find_best_option_by_priority(option_analysis, good_choices, options_to_cons
         return best_option
     return best_options[0]
 
-    # Determine recommendation
-    recommended_option = None
-    recommendation_reason = ""
-    
-    if all_options_have_bad:
-        # If all options have bad choices, ignore bad choices and pick based on good choice priority
-        # Consider all options that have at least one good choice
-        options_with_good = [name for name, analysis in option_analysis.items() if analysis["has_good"]]
-        best_option = _find_best_option_by_priority(option_analysis, good_choices, options_with_good)
-
-        if best_option:
-            recommended_option = best_option
-            recommendation_reason = f"All options have bad choices. Recommended based on highest priority good choice: '{option_analysis[best_option]['good_matches'][0]}'"
-        else:
-            # No good choices found, pick the option with the least bad choices
-            best_option = None
-            min_bad_choices = 999
-            
-            for option_name, analysis in option_analysis.items():
-                bad_count = len(analysis["bad_matches"])
-                if bad_count < min_bad_choices:
-                    min_bad_choices = bad_count
-                    best_option = option_name
-            
-            if best_option:
-                recommended_option = best_option
-                recommendation_reason = f"All options have bad choices. Selected option with least bad choices: {len(option_analysis[best_option]['bad_matches'])} bad choices"
-            else:
-                recommendation_reason = "All options have bad choices. No recommendation possible."
-    else:
-        # Normal case: some options don't have bad choices - avoid bad choices completely
-        # First, try to find a "clean" option: good choices and no bad choices.
-        clean_options = [name for name, analysis in option_analysis.items() if analysis["has_good"] and not analysis["has_bad"]]
-        best_option = _find_best_option_by_priority(option_analysis, good_choices, clean_options)
-
-        if best_option:
-            recommended_option = best_option
-            recommendation_reason = f"Recommended based on highest priority good choice: '{option_analysis[best_option]['good_matches'][0]}'"
-        else:
-            # No clean options (good without bad) found, try options with good choices even if they have bad choices
-            debug_print("[DEBUG] No clean options found, considering options with good choices despite bad choices...")
-            fallback_options = [name for name, analysis in option_analysis.items() if analysis["has_good"]]
-
-            if fallback_options:
-                # Choose from fallback options, prefer fewer bad choices
-                best_option = None
-                min_bad_choices = 999
-                
-                for option_name in fallback_options:
-                    bad_count = len(option_analysis[option_name]["bad_matches"])
-                    if bad_count < min_bad_choices:
-                        min_bad_choices = bad_count
-                        best_option = option_name
-                
-                recommended_option = best_option
-                recommendation_reason = f"No clean options available. Selected option with good choices but fewest bad choices: {min_bad_choices} bad choices"
-            else:
-                # Absolutely no good choices found, pick the option with the least bad choices
-                best_option = None
-                min_bad_choices = 999
-                
-                for option_name, analysis in option_analysis.items():
-                    bad_count = len(analysis["bad_matches"])
-                    if bad_count < min_bad_choices:
-                        min_bad_choices = bad_count
-                        best_option = option_name
-                
-                if best_option:
-                    recommended_option = best_option
-                    recommendation_reason = f"No good choices found. Selected option with least bad choices: {len(option_analysis[best_option]['bad_matches'])} bad choices"
-                else:
-                    recommendation_reason = "No good choices found. No recommendation possible."
-    
-    return {
-        "recommended_option": recommended_option,
-        "recommendation_reason": recommendation_reason,
-        "option_analysis": option_analysis,
-        "all_options_bad": all_options_bad
-    }
-
 def generate_event_variations(event_name):
     """
     Generate variations of an event name for better matching.
@@ -561,40 +496,168 @@ def search_events(event_variations):
     
     return found_events
 
-def handle_event_choice():
+def _choice_number_for_option(recommended_option, choices_found):
+    """Map a recommended option name (Top/Middle/Bottom/Option N) to a choice number on screen"""
+    # If no recommendation, default to first choice
+    if recommended_option is None:
+        print("No recommendation found, defaulting to first choice")
+        return 1
+
+    # Map recommended option to choice number based on name and choices on screen
+    choice_number = 1  # Default to first choice
+    rec_lower = recommended_option.lower()
+
+    if "bottom" in rec_lower:
+        # If "bottom" is recommended, pick the last available choice
+        choice_number = choices_found
+    elif "middle" in rec_lower:
+        # If "middle" is recommended, pick the second choice (only valid for 3+ choices)
+        if choices_found >= 3:
+            choice_number = 2
+    elif "top" in rec_lower:
+        # If "top" is recommended, it's the first choice
+        choice_number = 1
+    else:
+        # For 4+ choices, look for "Option 1", "Option 2", etc.
+        option_match = re.search(r'option\s*(\d+)', rec_lower)
+        if option_match:
+            choice_number = int(option_match.group(1))
+
+    # Verify choice number is valid
+    if choice_number > choices_found:
+        print(f"Warning: Recommended choice {choice_number} exceeds available choices ({choices_found})")
+        choice_number = 1  # Fallback to first choice
+    return choice_number
+
+def _region_pixels(screenshot, box):
+    return np.asarray(screenshot.crop(box).convert("L"), dtype=np.int16)
+
+def _settled(a, b):
+    """True if two crops of the same region are (almost) identical"""
+    if a.shape != b.shape:
+        return False
+    changed = np.count_nonzero(np.abs(a - b) > SETTLE_DIFF_LEVEL)
+    return changed <= a.size * SETTLE_DIFF_RATIO
+
+def wait_for_event_dialog(screenshot=None, on_title_settled=None):
+    """
+    Capture frames until the event dialog stops animating.
+    The title settles before the choice buttons finish fading in, so
+    `on_title_settled(frame)` is called once on the first frame whose title
+    matches the previous one.
+    Args:
+        screenshot: Frame the event was detected on (optional)
+        on_title_settled: Callback for the first frame with a settled title (optional)
+    Returns:
+        PIL.Image: First frame where title and choices match the previous frame,
+                   or the last frame captured before EVENT_SETTLE_TIMEOUT
+    """
+    frame = screenshot if screenshot is not None else take_screenshot()
+    title = _region_pixels(frame, EVENT_REGION)
+    choices = _region_pixels(frame, EVENT_CHOICE_BOX)
+    title_reported = False
+    start_time = clock.time()
+    while True:
+        clock.sleep(EVENT_SETTLE_POLL)
+        frame = take_screenshot()
+        next_title = _region_pixels(frame, EVENT_REGION)
+        next_choices = _region_pixels(frame, EVENT_CHOICE_BOX)
+        title_settled = _settled(title, next_title)
+        if title_settled and not title_reported and on_title_settled:
+            on_title_settled(frame)
+            title_reported = True
+        if title_settled and _settled(choices, next_choices):
+            debug_print(f"[DEBUG] Event dialog settled after {clock.time() - start_time:.2f}s")
+            return frame
+        if clock.time() - start_time >= EVENT_SETTLE_TIMEOUT:
+            debug_print("[DEBUG] Event dialog still changing at timeout, using last frame")
+            return frame
+        title, choices = next_title, next_choices
+
+def _priority_hash():
+    """Hash of the file the current event choice mode takes its recommendations from"""
+    if EVENT_CHOICE_MODE == "weights":
+        return f"weights:{weights_digest()}"
+    return file_digest(PRIORITY_FILE)
+
+def _read_event_title(event_image):
+    """Resolve an event title crop: stored fingerprint first, OCR otherwise.
+    Returns:
+        dict: image, fingerprint, known_event (fingerprint store entry or None) and event_name
+    """
+    fingerprint_store = get_fingerprint_store()
+    fingerprint = event_fingerprint(event_image) if fingerprint_store else None
+    known_event = fingerprint_store.lookup(fingerprint) if fingerprint_store else None
+    if known_event:
+        event_name = known_event["event_name"]
+    else:
+        event_name = extract_event_name_text(event_image)
+    return {"image": event_image, "fingerprint": fingerprint, "known_event": known_event, "event_name": event_name.strip()}
+
+def handle_event_choice(screenshot=None):
     """
     Main function to handle event detection and choice selection.
     This function should be called when an event is detected.
     
+    Args:
+        screenshot: Frame the event was detected on (optional), used as the
+                    first frame when waiting for the dialog to settle
+    
     Returns:
         tuple: (choice_number, success, choice_locations) - choice number, success status, and found locations
     """
-    # Define the region for event name detection
-    from utils.constants_phone import EVENT_REGION
-    event_region = EVENT_REGION
-    
     print("Event detected, scan event")
     
+    frame = screenshot
+    choice_locations = []
     try:
-        # Wait for event to stabilize (1.5 seconds)
-        time.sleep(1.5)
-
-        # Re-validate that this is a choices event before OCR (avoid scanning non-choice dialogs)
-        recheck_count, recheck_locations = count_event_choices()
-        debug_print(f"[DEBUG] Recheck choices after delay: {recheck_count}")
-        if recheck_count == 0:
-            print("[INFO] Event choices not visible after delay, skipping analysis")
+        # Start reading the title as soon as it stops moving, while the choices finish fading in
+        speculative = {}
+        def start_title_read(settled_frame):
+            speculative["pixels"] = _region_pixels(settled_frame, EVENT_REGION)
+            speculative["future"] = _title_executor.submit(_read_event_title, settled_frame.crop(EVENT_REGION))
+
+        # Choice positions, brightness and the title all come from this one frame
+        frame = wait_for_event_dialog(screenshot, start_title_read)
+
+        # Re-validate that this is a choices event before using the title (avoid scanning non-choice dialogs)
+        choices_found, choice_locations = count_event_choices(frame)
+        debug_print(f"[DEBUG] Choices on settled frame: {choices_found}")
+        if choices_found == 0:
+            print("[INFO] Event choices not visible after the dialog settled, skipping analysis")
             return 1, False, []
 
-        # Capture the event name
-        event_image = capture_region(event_region)
-        event_name = extract_event_name_text(event_image)
-        event_name = event_name.strip()
+        event_image = frame.crop(EVENT_REGION)
+        title = None
+        if "future" in speculative:
+            title = speculative["future"].result()
+            if not _settled(speculative["pixels"], _region_pixels(frame, EVENT_REGION)):
+                debug_print("[DEBUG] Event title changed after the speculative read, reading it again")
+                title = None
+        if title is None:
+            title = _read_event_title(event_image)
+
+        # Events seen before resolve from their title fingerprint without OCR
+        fingerprint_store = get_fingerprint_store()
+        fingerprint = title["fingerprint"]
+        known_event = title["known_event"]
+        # Stored recommendations are only valid for the file that produced them
+        priority_hash = _priority_hash() if fingerprint_store else ""
+
+        if known_event and known_event.get("priority_hash") == priority_hash:
+            print(f"Event found: {known_event['event_name']} (fingerprint)")
+            print(f"Recommend: {known_event['recommended_option']}")
+            choice_number = _choice_number_for_option(known_event["recommended_option"], choices_found)
+            print(f"Choose choice: {choice_number}")
+            return choice_number, True, choice_locations
+
+        # When priorities changed since the event was stored, only the name is still valid
+        event_name = title["event_name"]
         
         if not event_name:
             print("No text detected in event region")
-            # Choices were visible and stabilized earlier; provide locations for fallback top-choice click
-            return 1, False, recheck_locations
+            # Choices were visible on the settled frame; provide locations for fallback top-choice click
+            return 1, False, choice_locations
         
         print(f"Event found: {event_name}")
 
@@ -630,7 +693,7 @@ def handle_event_choice():
                             entry = results.setdefault(name, {"source": "Ura Finale", "options": {}})
                             if entry["source"] == "Support Card":
                                 entry["source"] = "Support Card + Ura Finale"
-                            elif entry["source"]["source"] == "Uma Data":
+                            elif entry["source"] == "Uma Data":
                                 entry["source"] = "Uma Data + Ura Finale"
                             elif entry["source"] == "Both":
                                 entry["source"] = "All Sources"
@@ -638,14 +701,13 @@ def handle_event_choice():
             return results
 
         found_events = search_events_exact(event_name)
+        # Only exact names are fingerprinted, a fuzzy match of a misread title could be the wrong event
+        exact_match = bool(found_events)
         if not found_events:
             # Fallback variations-based search
             event_variations = generate_event_variations(event_name)
             found_events = search_events(event_variations)
         
-        # Count event choices on screen
-        choices_found, choice_locations = count_event_choices()
-        
         # Load event priorities
         priorities = load_event_priorities()
         
@@ -659,19 +721,35 @@ def handle_event_choice():
             print("Options:")
             
             if options:
-                # Analyze options with priorities
-                analysis = analyze_event_options(options, priorities)
+                option_scores = {}
+                if EVENT_CHOICE_MODE == "weights":
+                    # Weighted outcome vectors: one dot product over all options
+                    recommended, option_scores = recommend_by_weights(event_name_key, options)
+                    analysis = {"recommended_option": recommended}
+                    good_options = [name for name, score in option_scores.items() if score > 0]
+                    bad_options = [name for name, score in option_scores.items() if score < 0]
+                else:
+                    # Precompiled recommendation for known events, matcher pass for anything else
+                    compiled = lookup_recommendation(event_name_key, options, priorities)
+                    if compiled:
+                        analysis = {"recommended_option": compiled["recommended_option"]}
+                        good_options, bad_options = compiled["good"], compiled["bad"]
+                    else:
+                        analysis = analyze_event_options(options, priorities)
+                        good_options = [name for name, data in analysis["option_analysis"].items() if data["has_good"]]
+                        bad_options = [name for name, data in analysis["option_analysis"].items() if data["has_bad"]]
                 
                 for option_name, option_reward in options.items():
                     # Replace all line breaks with ', '
                     reward_single_line = option_reward.replace("\r\n", ", ").replace("\n", ", ").replace("\r", ", ")
                     
                     # Add analysis indicators
-                    option_analysis = analysis["option_analysis"][option_name]
                     indicators = []
-                    if option_analysis["has_good"]:
+                    if option_name in option_scores:
+                        indicators.append(f"Score {option_scores[option_name]}")
+                    if option_name in good_options:
                         indicators.append("✅ Good")
-                    if option_analysis["has_bad"]:
+                    if option_name in bad_options:
                         indicators.append("❌ Bad")
                     if option_name == analysis["recommended_option"]:
                         indicators.append("🎯 RECOMMENDED")
@@ -684,36 +762,11 @@ def handle_event_choice():
                 
                 # Determine which choice to select based on recommendation and choice count
                 recommended_option = analysis["recommended_option"]
-                
-                # If no recommendation, default to first choice
-                if recommended_option is None:
-                    print("No recommendation found, defaulting to first choice")
-                    choice_number = 1
-                else:
-                    # Map recommended option to choice number based on name and choices on screen
-                    choice_number = 1  # Default to first choice
-                    rec_lower = recommended_option.lower()
-
-                    if "bottom" in rec_lower:
-                        # If "bottom" is recommended, pick the last available choice
-                        choice_number = choices_found
-                    elif "middle" in rec_lower:
-                        # If "middle" is recommended, pick the second choice (only valid for 3+ choices)
-                        if choices_found >= 3:
-                            choice_number = 2
-                    elif "top" in rec_lower:
-                        # If "top" is recommended, it's the first choice
-                        choice_number = 1
-                    else:
-                        # For 4+ choices, look for "Option 1", "Option 2", etc.
-                        option_match = re.search(r'option\s*(\d+)', recommended_option.lower())
-                        if option_match:
-                            choice_number = int(option_match.group(1))
-                
-                # Verify choice number is valid
-                if choice_number > choices_found:
-                    print(f"Warning: Recommended choice {choice_number} exceeds available choices ({choices_found})")
-                    choice_number = 1  # Fallback to first choice
+                choice_number = _choice_number_for_option(recommended_option, choices_found)
+
+                # Remember this title, the name is confirmed by the event database
+                if fingerprint_store and exact_match:
+                    fingerprint_store.record(fingerprint, event_name_key, recommended_option, priority_hash)
                 
                 print(f"Choose choice: {choice_number}")
                 return choice_number, True, choice_locations
@@ -729,11 +782,9 @@ def handle_event_choice():
     except Exception as e:
         print(f"Error during event handling: {e}")
         # If choices are visible, return their locations to allow fallback top-choice click
-        try:
-            _, fallback_locations = count_event_choices()
-        except Exception:
-            fallback_locations = []
-        return 1, False, fallback_locations  # Default to first choice on error
+        if not choice_locations and frame is not None:
+            _, choice_locations = count_event_choices(frame)
+        return 1, False, choice_locations  # Default to first choice on error
 
 def click_event_choice(choice_number, choice_locations=None):
     """
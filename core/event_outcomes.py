@@ -0,0 +1,287 @@
+"""Numeric outcome vectors for event options.
+
+Every option reward in the event databases ("Maximum Energy +4\r\nSpeed +5")
+is parsed once into a fixed-width vector (OUTCOME_FIELDS). All options of an
+event are then scored with a single dot product against the weights in
+event_weights.json. The vectors can also be saved for offline analysis with
+`python -m core.event_outcomes`.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from core.event_fingerprints import file_digest
+from core.event_recommendations import load_event_database
+from utils.config_file import CONFIG_FILE
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+WEIGHTS_FILE = "event_weights.json"
+WEIGHTS_EXAMPLE_FILE = "event_weights.example.json"
+VECTORS_PATH = "event_outcome_vectors.npz"
+
+OUTCOME_FIELDS = [
+    "spd", "sta", "pwr", "guts", "wit",
+    "energy", "max_energy", "mood", "skill_points",
+    "bond", "hint", "skill",
+    "good_status", "bad_status", "heal_status",
+    "random", "chain_end",
+]
+FIELD_INDEX = {field: i for i, field in enumerate(OUTCOME_FIELDS)}
+STAT_FIELDS = ["spd", "sta", "pwr", "guts", "wit"]
+
+STAT_NAMES = {
+    "speed": "spd",
+    "stamina": "sta",
+    "power": "pwr",
+    "guts": "guts",
+    "wisdom": "wit",
+    "wit": "wit",
+}
+
+# Conditions that hurt the trainee, any other "Get X status" counts as good
+NEGATIVE_STATUSES = ("practice poor", "slacker", "slow metabolism", "night owl", "skin outbreak", "migraine", "gatekept")
+
+# Chance weight of a "(random)" outcome
+RANDOM_OUTCOME_WEIGHT = 0.5
+
+DEFAULT_WEIGHTS = {
+    "spd": 1.0, "sta": 1.0, "pwr": 1.0, "guts": 0.8, "wit": 1.0,
+    "energy": 0.6, "max_energy": 2.0, "mood": 8.0, "skill_points": 0.5,
+    "bond": 0.4, "hint": 4.0, "skill": 12.0,
+    "good_status": 15.0, "bad_status": -25.0, "heal_status": 10.0,
+    "random": 0.0, "chain_end": 0.0,
+}
+
+NUMBER_PATTERN = r"([+-]\d+(?:/[+-]?\d+)*)"
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+def _amount(text):
+    """'+5' -> 5, '+5/+10' -> 7.5 (average of the possible values)"""
+    values = [float(v) for v in re.findall(r"[+-]?\d+", text)]
+    return sum(values) / len(values) if values else 0.0
+
+def parse_outcome_line(line):
+    """Vector for one reward line, None if the line isn't a known outcome"""
+    vector = np.zeros(len(OUTCOME_FIELDS), dtype=np.float32)
+    text = line.strip()
+    lower = text.lower()
+
+    if lower.startswith("(random)"):
+        inner = parse_outcome_line(text[len("(random)"):])
+        if inner is None:
+            return None
+        inner *= RANDOM_OUTCOME_WEIGHT
+        inner[FIELD_INDEX["random"]] = 1.0
+        return inner
+
+    # "Sixth Sense hint +3 or Dodging Danger hint +3"
+    if " or " in text:
+        parts = [parse_outcome_line(part) for part in text.split(" or ")]
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return None
+        vector = np.mean(parts, axis=0).astype(np.float32)
+        vector[FIELD_INDEX["random"]] = 1.0
+        return vector
+
+    match = re.match(r"^(speed|stamina|power|guts|wisdom|wit) " + NUMBER_PATTERN + "$", lower)
+    if match:
+        vector[FIELD_INDEX[STAT_NAMES[match.group(1)]]] = _amount(match.group(2))
+        return vector
+
+    match = re.match(r"^all stats " + NUMBER_PATTERN + "$", lower)
+    if match:
+        for field in STAT_FIELDS:
+            vector[FIELD_INDEX[field]] = _amount(match.group(1))
+        return vector
+
+    match = re.match(r"^(\d+) (?:random )?stats? " + NUMBER_PATTERN + "$", lower)
+    if match:
+        share = int(match.group(1)) / len(STAT_FIELDS)
+        for field in STAT_FIELDS:
+            vector[FIELD_INDEX[field]] = _amount(match.group(2)) * share
+        vector[FIELD_INDEX["random"]] = 1.0
+        return vector
+
+    simple_fields = [
+        (r"^maximum energy ", "max_energy"),
+        (r"^energy ", "energy"),
+        (r"^mood ", "mood"),
+        (r"^skill points ", "skill_points"),
+        (r"^.+ bond ", "bond"),
+        (r"^.+ hint ", "hint"),
+    ]
+    for prefix, field in simple_fields:
+        match = re.match(prefix + NUMBER_PATTERN + "$", lower)
+        if match:
+            vector[FIELD_INDEX[field]] = _amount(match.group(1))
+            return vector
+
+    match = re.match(r"^last trained stat " + NUMBER_PATTERN + "$", lower)
+    if match:
+        for field in STAT_FIELDS:
+            vector[FIELD_INDEX[field]] = _amount(match.group(1)) / len(STAT_FIELDS)
+        return vector
+
+    if lower.startswith("hint for a skill"):
+        vector[FIELD_INDEX["hint"]] = 1.0
+        return vector
+
+    if re.match(r"^obtain .+ skill$", lower):
+        vector[FIELD_INDEX["skill"]] = 1.0
+        return vector
+
+    match = re.match(r"^get (.+) status$", lower)
+    if match:
+        status = match.group(1)
+        field = "bad_status" if any(name in status for name in NEGATIVE_STATUSES) else "good_status"
+        vector[FIELD_INDEX[field]] = 1.0
+        return vector
+
+    if lower.startswith("heal "):
+        vector[FIELD_INDEX["heal_status"]] = 1.0
+        return vector
+
+    if lower == "event chain ended":
+        vector[FIELD_INDEX["chain_end"]] = 1.0
+        return vector
+
+    return None
+
+def parse_outcome(reward):
+    """Vector for a whole option reward. "Randomly either ... or ..." rewards
+    are averaged over their branches (weighted by "(~N%)" when given) and
+    flagged as random."""
+    lines = [line.strip() for line in re.split(r"\r\n|\n|\r", reward or "") if line.strip()]
+    first = re.match(r"^randomly either(?: \(~(\d+)%\))?$", lines[0].lower()) if lines else None
+    randomly_either = first is not None
+    if randomly_either:
+        lines = lines[1:]
+
+    branches = [[]]
+    chances = [first.group(1) if first else None]
+    for line in lines:
+        separator = re.match(r"^or(?: \(~(\d+)%\))?$", line.lower()) if randomly_either else None
+        if separator:
+            branches.append([])
+            chances.append(separator.group(1))
+        else:
+            branches[-1].append(line)
+
+    branch_vectors = []
+    for branch in branches:
+        vector = np.zeros(len(OUTCOME_FIELDS), dtype=np.float32)
+        for line in branch:
+            line_vector = parse_outcome_line(line)
+            if line_vector is None:
+                debug_print(f"[DEBUG] Unknown event outcome: '{line}'")
+                continue
+            vector += line_vector
+        branch_vectors.append(vector)
+
+    if all(chances) and len(chances) > 1:
+        branch_weights = [float(chance) for chance in chances]
+    else:
+        branch_weights = None
+    vector = np.average(branch_vectors, axis=0, weights=branch_weights).astype(np.float32)
+    if randomly_either and len(branch_vectors) > 1:
+        vector[FIELD_INDEX["random"]] = 1.0
+    return vector
+
+def _weights_path():
+    for path in (WEIGHTS_FILE, WEIGHTS_EXAMPLE_FILE):
+        if os.path.exists(path):
+            return path
+    return None
+
+def weights_digest():
+    """Content hash of the weights file in use"""
+    path = _weights_path()
+    return file_digest(path) if path else ""
+
+def load_event_weights():
+    """Weight per outcome field from event_weights.json (or the example file), missing fields use the defaults"""
+    weights = dict(DEFAULT_WEIGHTS)
+    path = _weights_path()
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                weights.update(json.load(f).get("weights", {}))
+        except Exception as e:
+            print(f"[WARNING] Could not load {path}: {e}")
+    return np.array([float(weights.get(field, 0.0)) for field in OUTCOME_FIELDS], dtype=np.float32)
+
+_vectors = None
+
+def build_outcome_vectors():
+    """Parse every option in the event databases once.
+
+    Returns:
+        dict: event name -> {"options": [option names], "matrix": options x fields array}
+    """
+    global _vectors
+    if _vectors is None:
+        _vectors = {}
+        for name, event in load_event_database().items():
+            options = event["options"]
+            if not options:
+                continue
+            _vectors[name] = {
+                "options": list(options.keys()),
+                "matrix": np.stack([parse_outcome(reward) for reward in options.values()]),
+            }
+        debug_print(f"[DEBUG] Built outcome vectors for {len(_vectors)} events")
+    return _vectors
+
+def score_event_options(event_name, options, weights=None):
+    """Score all options of an event with one dot product.
+
+    Uses the prebuilt vectors when the event's options match the database,
+    otherwise parses the given options.
+
+    Returns:
+        dict: option name -> score
+    """
+    if weights is None:
+        weights = load_event_weights()
+    entry = build_outcome_vectors().get(event_name)
+    if entry is None or entry["options"] != list(options.keys()):
+        entry = {
+            "options": list(options.keys()),
+            "matrix": np.stack([parse_outcome(reward) for reward in options.values()]),
+        }
+    scores = entry["matrix"] @ weights
+    return {option: round(float(score), 2) for option, score in zip(entry["options"], scores)}
+
+def recommend_by_weights(event_name, options, weights=None):
+    """Option with the highest weighted score (first one wins ties), or None without options"""
+    if not options:
+        return None, {}
+    scores = score_event_options(event_name, options, weights)
+    best_option = max(scores, key=lambda option: scores[option])
+    return best_option, scores
+
+def save_outcome_vectors(path=VECTORS_PATH):
+    """Save all vectors (event name, option name, one row per option) for offline analysis"""
+    names, options, rows = [], [], []
+    for name, entry in build_outcome_vectors().items():
+        for option, row in zip(entry["options"], entry["matrix"]):
+            names.append(name)
+            options.append(option)
+            rows.append(row)
+    np.savez_compressed(path, fields=np.array(OUTCOME_FIELDS), event_names=np.array(names),
+                        option_names=np.array(options), vectors=np.array(rows, dtype=np.float32))
+    print(f"[INFO] Saved {len(rows)} option vectors to {path}")
+
+if __name__ == "__main__":
+    save_outcome_vectors()
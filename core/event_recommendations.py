@@ -0,0 +1,197 @@
+"""Precompiled event recommendations.
+
+The event databases and event_priority.json don't change while the bot runs,
+so the recommended option for every known event is computed once and cached
+in event_recommendations.json, keyed by hashes of those files. Option rewards
+are matched against the Good/Bad choice lists with an Aho-Corasick automaton,
+one pass per reward string instead of one substring test per priority entry.
+"""
+import json
+import os
+from collections import deque
+
+from core.event_fingerprints import file_digest, PRIORITY_FILE
+from utils.config_file import CONFIG_FILE
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+RECOMMENDATIONS_PATH = "event_recommendations.json"
+EVENT_DB_FILES = [
+    ("assets/events/support_card.json", "Support Card"),
+    ("assets/events/uma_data.json", "Uma Data"),
+    ("assets/events/ura_finale.json", "Ura Finale"),
+]
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+class PriorityMatcher:
+    """Aho-Corasick automaton over the lowercased Good_choices and Bad_choices entries.
+
+    `match()` returns the same lists a substring test per entry would, in the
+    order of the priority lists (duplicates included)."""
+
+    def __init__(self, good_choices, bad_choices):
+        self.good_choices = list(good_choices)
+        self.bad_choices = list(bad_choices)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for kind, choices in (("good", self.good_choices), ("bad", self.bad_choices)):
+            for index, choice in enumerate(choices):
+                pattern = choice.lower()
+                if not pattern:
+                    continue
+                state = 0
+                for char in pattern:
+                    next_state = self.goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self.goto)
+                        self.goto[state][char] = next_state
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.output.append([])
+                    state = next_state
+                self.output[state].append((kind, index))
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def match(self, text):
+        """Return (good_matches, bad_matches) for one reward string"""
+        found = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found.update(self.output[state])
+        good_matches = [self.good_choices[i] for i in range(len(self.good_choices)) if ("good", i) in found]
+        bad_matches = [self.bad_choices[i] for i in range(len(self.bad_choices)) if ("bad", i) in found]
+        return good_matches, bad_matches
+
+_matchers = {}
+
+def get_priority_matcher(priorities):
+    """Matcher for a priorities dict, built once per distinct Good/Bad list"""
+    key = (tuple(priorities.get("Good_choices", [])), tuple(priorities.get("Bad_choices", [])))
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = PriorityMatcher(*key)
+        _matchers[key] = matcher
+    return matcher
+
+def load_event_database():
+    """All events by name with options merged across duplicate entries and sources,
+    the same way the exact name lookup in handle_event_choice merges them."""
+    events = {}
+    for path, source in EVENT_DB_FILES:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if source == "Uma Data":
+            entries = [ev for character in data for ev in character.get("UmaEvents", [])]
+        else:
+            entries = data
+        for ev in entries:
+            name = ev.get("EventName")
+            if not name:
+                continue
+            entry = events.setdefault(name, {"source": source, "options": {}})
+            entry["options"].update(ev.get("EventOptions", {}))
+    return events
+
+def _source_files():
+    return [PRIORITY_FILE] + [path for path, _ in EVENT_DB_FILES]
+
+def _source_hash():
+    return "-".join(file_digest(path) for path in _source_files())
+
+def _source_stamp():
+    """Cheap change check (mtime and size) used between lookups"""
+    stamp = []
+    for path in _source_files():
+        try:
+            stat = os.stat(path)
+            stamp.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            stamp.append((path, None, None))
+    return stamp
+
+def compile_recommendation_table(priorities, path=RECOMMENDATIONS_PATH):
+    """Recommended option (and good/bad option names) for every event in the database"""
+    from core.event_handling import analyze_event_options
+
+    matcher = get_priority_matcher(priorities)
+    table = {}
+    for name, event in load_event_database().items():
+        options = event["options"]
+        if not options:
+            continue
+        analysis = analyze_event_options(options, priorities, matcher)
+        table[name] = {
+            "options": options,
+            "recommended_option": analysis["recommended_option"],
+            "good": [option for option, data in analysis["option_analysis"].items() if data["has_good"]],
+            "bad": [option for option, data in analysis["option_analysis"].items() if data["has_bad"]],
+        }
+
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source_hash": _source_hash(), "table": table}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[WARNING] Could not save event recommendations to {path}: {e}")
+    print(f"[INFO] Compiled recommendations for {len(table)} events")
+    return table
+
+_table = None
+
+def get_recommendation_table(priorities, path=RECOMMENDATIONS_PATH):
+    """Load the compiled table, recompiling when the priority file or an event database changed"""
+    global _table
+    stamp = _source_stamp()
+    if _table is not None and _table["stamp"] == stamp:
+        return _table["table"]
+
+    source_hash = _source_hash()
+    table = None
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("source_hash") == source_hash:
+                table = data.get("table", {})
+                debug_print(f"[DEBUG] Loaded {len(table)} compiled event recommendations")
+        except Exception as e:
+            print(f"[WARNING] Could not load event recommendations from {path}: {e}")
+    if table is None:
+        table = compile_recommendation_table(priorities, path)
+    _table = {"stamp": stamp, "table": table}
+    return table
+
+def lookup_recommendation(event_name, options, priorities):
+    """Compiled entry for an event, or None if the event is unknown or its options differ
+    from the compiled ones (the caller then analyzes the options with the matcher)."""
+    entry = get_recommendation_table(priorities).get(event_name)
+    if entry is None or entry["options"] != options:
+        return None
+    return entry
@@ -9,6 +9,7 @@ pyautogui.useImageNotFoundException(False)
 from core.state import check_support_card, check_failure, check_turn, check_mood, check_current_year, check_criteria, check_skill_points_cap
 from core.logic import do_something, do_something_fallback, all_training_unsafe, MAX_FAILURE
 from utils.constants import MOOD_LIST
+from utils.config_file import CONFIG_FILE
 # Event handling functions integrated directly into execute.py
 
 def count_event_choices():
@@ -616,7 +617,7 @@ def is_racing_available(year):
 from core.recognizer import is_infirmary_active, match_template
 from utils.scenario import ura
 
-with open("config.json", "r", encoding="utf-8") as file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as file:
   config = json.load(file)
 
 MINIMUM_MOOD = config["minimum_mood"]
@@ -750,7 +751,7 @@ def race_day():
   import json
   
   # Load config to check if skill point check is enabled
-  with open("config.json", "r", encoding="utf-8") as file:
+  with open(CONFIG_FILE, "r", encoding="utf-8") as file:
     config = json.load(file)
   
   enable_skill_check = config.get("enable_skill_point_check", True)
@@ -945,7 +946,7 @@ def career_lobby():
       import json
       
       # Load config to check if skill point check is enabled
-      with open("config.json", "r", encoding="utf-8") as file:
+      with open(CONFIG_FILE, "r", encoding="utf-8") as file:
         config = json.load(file)
       
       enable_skill_check = config.get("enable_skill_point_check", True)
@@ -1,24 +1,31 @@
-import time
 import json
 import os
 import random
 from PIL import ImageStat
 
 from utils.adb_recognizer import locate_on_screen, locate_all_on_screen, wait_for_image, is_image_on_screen, match_template, max_match_confidence
-from utils.adb_input import tap, click_at_coordinates, triple_click, move_to_and_click, mouse_down, mouse_up, scroll_down, scroll_up, long_press
+from utils.adb_input import tap, click_at_coordinates, triple_click, move_to_and_click, mouse_down, mouse_up, scroll_down, scroll_up, long_press, touch_down, touch_move, touch_up
 from utils.adb_screenshot import take_screenshot, enhanced_screenshot, capture_region
 from utils.constants_phone import (
     MOOD_LIST, EVENT_REGION, RACE_CARD_REGION, SUPPORT_CARD_ICON_REGION
 )
 
 # Import ADB state and logic modules
-from core.state_adb import check_support_card, check_failure, check_turn, check_mood, check_current_year, check_criteria, check_skill_points_cap, check_goal_name, check_goal_name_with_g1_requirement, check_hint, calculate_training_score, choose_best_training, check_current_stats, check_energy_bar
+from core.state_adb import check_support_card, check_failure, check_turn, check_mood, check_current_year, check_criteria, check_skill_points_cap, check_goal_name, check_goal_name_with_g1_requirement, check_hint, calculate_training_score, load_training_scoring_rules, choose_best_training, check_current_stats, check_energy_bar
+
+from core.career_state import DeviceCareerStates
+from core.race_calendar import has_suitable_race
+from utils.race_list_scanner import find_best_race
+from core.race_flow import RaceFlow
 
 # Import event handling functions
 from core.event_handling import count_event_choices, load_event_priorities, analyze_event_options, generate_event_variations, search_events, handle_event_choice, click_event_choice
+from utils.config_file import CONFIG_FILE
+from utils import clock
+from utils.timing_profile import settle, report_miss
 
 # Load config and check debug mode
-with open("config.json", "r", encoding="utf-8") as config_file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
     config = json.load(config_file)
     DEBUG_MODE = config.get("debug_mode", False)
     RETRY_RACE = config.get("retry_race", True)
@@ -28,6 +35,9 @@ def debug_print(message):
     if DEBUG_MODE:
         print(message)
 
+# Lobby state kept between turns (one per device), actions that use up a turn are noted on it
+career_state = DeviceCareerStates()
+
 # Support icon templates for detailed detection
 SUPPORT_ICON_PATHS = {
     "spd": "assets/icons/support_card_type_spd.png",
@@ -137,7 +147,7 @@ def claw_machine():
     print("[INFO] Claw machine detected, starting interaction...")
     
     # Wait 2 seconds before interacting
-    time.sleep(2)
+    clock.sleep(2)
     
     # Find the claw button location
     claw_location = locate_on_screen("assets/buttons/claw.png", confidence=0.8)
@@ -174,12 +184,15 @@ def is_racing_available(year):
         return False
     return True
 
-def click(img, confidence=0.8, minSearch=1, click=1, text="", region=None):
-    """Click on image with retry logic"""
+def click(img, confidence=0.8, minSearch=1, click=1, text="", region=None, transition=None):
+    """Click on image with retry logic. `transition` is the timing transition that
+    should have brought the image up; needing a retry reports it as too short."""
     debug_print(f"[DEBUG] Looking for: {img}")
     for attempt in range(int(minSearch)):
         btn = locate_on_screen(img, confidence=confidence, region=region)
         if btn:
+            if transition and attempt > 0:
+                report_miss(transition)
             if text:
                 print(text)
             debug_print(f"[DEBUG] Clicking {img} at position {btn}")
@@ -187,154 +200,262 @@ def click(img, confidence=0.8, minSearch=1, click=1, text="", region=None):
             return True
         if attempt < int(minSearch) - 1:  # Don't sleep on last attempt
             debug_print(f"[DEBUG] Attempt {attempt + 1}: {img} not found")
-            time.sleep(0.05)  # Reduced from 0.1 to 0.05
+            clock.sleep(0.05)  # Reduced from 0.1 to 0.05
     debug_print(f"[DEBUG] Failed to find {img} after {minSearch} attempts")
     return False
 
 def go_to_training():
     """Go to training screen"""
     debug_print("[DEBUG] Going to training screen...")
-    time.sleep(1)
-    return click("assets/buttons/training_btn.png", minSearch=10)
+    settle("lobby_ready")
+    return click("assets/buttons/training_btn.png", minSearch=10, transition="lobby_ready")
+
+# Fixed coordinates for each training type
+TRAINING_COORDS = {
+    "spd": (165, 1557),
+    "sta": (357, 1563),
+    "pwr": (546, 1557),
+    "guts": (735, 1566),
+    "wit": (936, 1572)
+}
+
+# Distance to drag above a training button so the preview shows without triggering it
+TRAINING_HOVER_OFFSET = 300
+
+# Seconds to let the preview settle after sliding a held touch onto a training
+HOLD_SCAN_SETTLE = 0.15
+
+def _hover_training_swipe(coords):
+    """Show a training preview with an independent swipe gesture (legacy scan mode)"""
+    from utils.adb_input import swipe
+    # Swipe from button position up 300 pixels with longer duration to simulate holding and moving
+    start_x, start_y = coords
+    end_x, end_y = start_x, start_y - TRAINING_HOVER_OFFSET
+    swipe(start_x, start_y, end_x, end_y, duration_ms=200)  # Longer duration for hover effect
+    settle("training_preview")  # Wait for hover effect to register
+
+def _analyze_training(key, screenshot, read_failure=True):
+    """Evaluate one training preview frame: support counts, bond levels, hint, score
+    and (optionally) the failure rate read from the same frame.
+
+    Only works on the given frame, so it is safe to run in a worker thread while
+    the device is already showing the next training."""
+    left, top, right, bottom = SUPPORT_CARD_ICON_REGION
+    region_cv = (left, top, right - left, bottom - top)
+
+    # Support counts
+    support_counts = check_support_card(screenshot)
+    total_support = sum(support_counts.values()) if support_counts else 0
+
+    # Bond levels per type
+    detailed_support = {}
+    rgb_img = screenshot.convert("RGB")
+    width, height = rgb_img.size
+    dx, dy = BOND_SAMPLE_OFFSET
+    for t_key, tpl in SUPPORT_ICON_PATHS.items():
+        matches = _filtered_template_matches(screenshot, tpl, region_cv, confidence=0.8)
+        if not matches:
+            continue
+        entries = []
+        for (x, y, w, h) in matches:
+            cx, cy = int(x + w // 2), int(y + h // 2)
+            sx, sy = cx + dx, cy + dy
+            sx = max(0, min(width - 1, sx))
+            sy = max(0, min(height - 1, sy))
+            r, g, b = rgb_img.getpixel((sx, sy))
+            level = _classify_bond_level((r, g, b))
+            entries.append({
+                "bbox": [int(x), int(y), int(w), int(h)],
+                "center": [cx, cy],
+                "bond_sample_point": [int(sx), int(sy)],
+                "bond_color": [int(r), int(g), int(b)],
+                "bond_level": int(level),
+            })
+        if entries:
+            detailed_support[t_key] = entries
+
+    # Hint
+    hint_found = check_hint(screenshot)
+
+    # Calculate score for this training type
+    score = calculate_training_score(detailed_support, bool(hint_found), key)
+
+    debug_print(f"[DEBUG] Support counts: {support_counts} | hint_found={hint_found} | score={score}")
+
+    failure_chance, confidence = 100, 0.0
+    if read_failure:
+        debug_print(f"[DEBUG] Checking failure rate for {key.upper()} training...")
+        failure_chance, confidence = check_failure(key, screenshot)
+
+    return {
+        "support": support_counts,
+        "support_detail": detailed_support,
+        "hint": bool(hint_found),
+        "total_support": total_support,
+        "failure": failure_chance,
+        "confidence": confidence,
+        "score": score
+    }
+
+def _should_stop_training_scan(key, failure_chance, maximum_failure, remaining=None):
+    """Early exit rules based on failure rates of the trainings scanned so far.
+    Only applies when every remaining training has a higher base failure rate."""
+    from core.logic import TRAINING_FAILURE_ORDER
+    if remaining and any(TRAINING_FAILURE_ORDER.index(r) < TRAINING_FAILURE_ORDER.index(key) for r in remaining):
+        return False
 
-def check_training():
+    # If WIT training is already too high, no need to check others
+    if key == 'wit' and failure_chance >= maximum_failure:
+        print(f"[INFO] WIT failure rate ({failure_chance}%) is at or above max ({maximum_failure}%). Skipping other training checks.")
+        debug_print("[DEBUG] Optimization: Early exit due to high WIT failure rate.")
+        return True
+
+    # If GUTS or PWR are significantly higher, no need to check STA/SPD
+    high_failure_threshold = maximum_failure * 1.5
+    if key in ['guts', 'pwr'] and failure_chance > high_failure_threshold:
+        print(f"[INFO] {key.upper()} failure rate ({failure_chance}%) is too high. Skipping remaining checks.")
+        debug_print(f"[DEBUG] Optimization: Early exit due to high {key.upper()} failure rate.")
+        return True
+    return False
+
+def _print_training_result(key, data):
+    """Print one training block, matching training_score_test.py output"""
+    print(f"\n[{key.upper()}]")
+
+    # Show support card details (similar to test script)
+    detailed_support = data["support_detail"]
+    if detailed_support:
+        support_lines = []
+        for card_type, entries in detailed_support.items():
+            for idx, entry in enumerate(entries, start=1):
+                level = entry['bond_level']
+                is_rainbow = (card_type == key and level >= 4)
+                label = f"{card_type.upper()}{idx}: {level}"
+                if is_rainbow:
+                    label += " (Rainbow)"
+                support_lines.append(label)
+        print(", ".join(support_lines))
+    else:
+        print("-")
+
+    print(f"hint={data['hint']}")
+    print(f"Fail: {data['failure']}% - Confident: {data['confidence']:.2f}")
+    print(f"Score: {data['score']}")
+
+def check_training(current_stats=None):
     """Check training results using fixed coordinates, collecting support counts,
-    bond levels and hint presence in one hover pass before computing failure rates."""
+    bond levels and hint presence in one hover pass before computing failure rates.
+
+    Trainings whose stat is already at its cap are not scanned, the rest are scanned
+    by expected score and the scan stops once no unscanned training can beat the best
+    eligible one under the training_score.json rules. Pass the lobby stats as
+    `current_stats` to avoid reading them again.
+
+    With `training_scan_mode` set to "hold" the touch is pressed once and slid across
+    all trainings, releasing only after the last preview has been read. Any other
+    value keeps the original per-training swipe gesture.
+
+    With `training_scan_pipeline` enabled each captured frame is analyzed in a worker
+    while the gesture for the next training runs. Frames whose failure rate can't be
+    read confidently are re-checked live before the early exit rules are applied."""
     debug_print("[DEBUG] Checking training options...")
     
     # Load maximum failure from config for early exit logic
-    with open("config.json", "r", encoding="utf-8") as config_file:
+    with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
         config = json.load(config_file)
     maximum_failure = config.get("maximum_failure", 15)
-
-    # Fixed coordinates for each training type
-    training_coords = {
-        "spd": (165, 1557),
-        "sta": (357, 1563),
-        "pwr": (546, 1557),
-        "guts": (735, 1566),
-        "wit": (936, 1572)
-    }
+    scan_mode = config.get("training_scan_mode", "swipe")
+    pipelined = config.get("training_scan_pipeline", False)
     
-    # Optimized training check order: from lowest base failure rate to highest
-    training_order = ["wit", "guts", "pwr", "sta", "spd"]
+    # Plan the scan: drop capped trainings, most promising first
+    from core.logic import plan_training_scan, no_better_training_left, record_training_scores
+    if current_stats is None:
+        current_stats = check_current_stats()
+    training_order = plan_training_scan(current_stats)
+    scoring_rules = load_training_scoring_rules()
+    debug_print(f"[DEBUG] Training scan plan: {training_order}")
     
     results = {}
-
-    for key in training_order:
-        # Get coordinates from the original map
-        coords = training_coords[key]
-
+    scan_start = clock.time()
+
+    # Continuous-hold scan: press once on the first training and keep the touch down
+    hold_active = False
+    if scan_mode == "hold":
+        first_x, first_y = TRAINING_COORDS[training_order[0]]
+        hold_active = touch_down(first_x, first_y) is not None
+        if not hold_active:
+            print("[WARNING] Touch hold not supported by device, falling back to swipe scan.")
+    last_coords = TRAINING_COORDS[training_order[0]]
+
+    def show_preview(key):
+        nonlocal last_coords
+        coords = TRAINING_COORDS[key]
+        last_coords = coords
         debug_print(f"[DEBUG] Checking {key.upper()} training at coordinates {coords}...")
-        
-        # Proper hover simulation: move to position, hold, check, move away, release
-        debug_print(f"[DEBUG] Hovering over {key.upper()} training to check support cards...")
-        
-        # Step 1: Hold at button position and move mouse up 300 pixels to simulate hover
-        debug_print(f"[DEBUG] Holding at {key.upper()} training button and moving mouse up...")
-        from utils.adb_input import swipe
-        # Swipe from button position up 300 pixels with longer duration to simulate holding and moving
-        start_x, start_y = coords
-        end_x, end_y = start_x, start_y - 300  # Move up 300 pixels
-        swipe(start_x, start_y, end_x, end_y, duration_ms=200)  # Longer duration for hover effect
-        time.sleep(0.3)  # Wait for hover effect to register
-        
-        # Step 2: One pass: capture screenshot, evaluate support counts, bond levels, and hint
-        screenshot = take_screenshot()
-        left, top, right, bottom = SUPPORT_CARD_ICON_REGION
-        region_cv = (left, top, right - left, bottom - top)
-
-        # Support counts
-        support_counts = check_support_card(screenshot)
-        total_support = sum(support_counts.values()) if support_counts else 0
-
-        # Bond levels per type
-        detailed_support = {}
-        rgb_img = screenshot.convert("RGB")
-        width, height = rgb_img.size
-        dx, dy = BOND_SAMPLE_OFFSET
-        for t_key, tpl in SUPPORT_ICON_PATHS.items():
-            matches = _filtered_template_matches(screenshot, tpl, region_cv, confidence=0.8)
-            if not matches:
-                continue
-            entries = []
-            for (x, y, w, h) in matches:
-                cx, cy = int(x + w // 2), int(y + h // 2)
-                sx, sy = cx + dx, cy + dy
-                sx = max(0, min(width - 1, sx))
-                sy = max(0, min(height - 1, sy))
-                r, g, b = rgb_img.getpixel((sx, sy))
-                level = _classify_bond_level((r, g, b))
-                entries.append({
-                    "bbox": [int(x), int(y), int(w), int(h)],
-                    "center": [cx, cy],
-                    "bond_sample_point": [int(sx), int(sy)],
-                    "bond_color": [int(r), int(g), int(b)],
-                    "bond_level": int(level),
-                })
-            if entries:
-                detailed_support[t_key] = entries
-
-        # Hint
-        hint_found = check_hint(screenshot)
-
-        # Calculate score for this training type
-        from core.state_adb import calculate_training_score
-        score = calculate_training_score(detailed_support, bool(hint_found), key)
-
-        debug_print(f"[DEBUG] Support counts: {support_counts} | hint_found={hint_found} | score={score}")
-
-        debug_print(f"[DEBUG] Checking failure rate for {key.upper()} training...")
-        failure_chance, confidence = check_failure(key)
-        
-        results[key] = {
-            "support": support_counts,
-            "support_detail": detailed_support,
-            "hint": bool(hint_found),
-            "total_support": total_support,
-            "failure": failure_chance,
-            "confidence": confidence,
-            "score": score
-        }
+        if hold_active:
+            # Slide the held touch onto this training and let the preview settle
+            debug_print(f"[DEBUG] Sliding held touch onto {key.upper()} training...")
+            touch_move(coords[0], coords[1])
+            clock.sleep(HOLD_SCAN_SETTLE)
+        else:
+            # Proper hover simulation: move to position, hold, check, move away, release
+            debug_print(f"[DEBUG] Hovering over {key.upper()} training to check support cards...")
+            _hover_training_swipe(coords)
+
+    def finalize(key, data, recheck=False):
+        """Record a training result and apply the early exit rules. With `recheck`, a failure
+        rate that couldn't be read from the captured frame is first re-read live."""
+        if recheck and data["confidence"] <= 0.0:
+            debug_print(f"[DEBUG] Failure rate for {key.upper()} unreadable on pipelined frame, re-checking live...")
+            show_preview(key)
+            data["failure"], data["confidence"] = check_failure(key)
+        results[key] = data
+        remaining = training_order[training_order.index(key) + 1:]
+        if _should_stop_training_scan(key, data["failure"], maximum_failure, remaining):
+            return True
+        _print_training_result(key, data)
+        return no_better_training_left(results, remaining, scoring_rules, config)
 
-        # --- Optimization: Early exit based on failure rates ---
-        # If WIT training is already too high, no need to check others
-        if key == 'wit' and failure_chance >= maximum_failure:
-            print(f"[INFO] WIT failure rate ({failure_chance}%) is at or above max ({maximum_failure}%). Skipping other training checks.")
-            debug_print("[DEBUG] Optimization: Early exit due to high WIT failure rate.")
-            break # Exit the loop
-
-        # If GUTS or PWR are significantly higher, no need to check STA/SPD
-        high_failure_threshold = maximum_failure * 1.5
-        if key in ['guts', 'pwr'] and failure_chance > high_failure_threshold:
-            print(f"[INFO] {key.upper()} failure rate ({failure_chance}%) is too high. Skipping remaining checks.")
-            debug_print(f"[DEBUG] Optimization: Early exit due to high {key.upper()} failure rate.")
-            break # Exit the loop
-        # --- End of Optimization ---
-        
-        # Use clean format matching training_score_test.py exactly
-        print(f"\n[{key.upper()}]")
-        
-        # Show support card details (similar to test script)
-        if detailed_support:
-            support_lines = []
-            for card_type, entries in detailed_support.items():
-                for idx, entry in enumerate(entries, start=1):
-                    level = entry['bond_level']
-                    is_rainbow = (card_type == key and level >= 4)
-                    label = f"{card_type.upper()}{idx}: {level}"
-                    if is_rainbow:
-                        label += " (Rainbow)"
-                    support_lines.append(label)
-            print(", ".join(support_lines))
+    try:
+        if pipelined:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pending = []
+                for key in training_order:
+                    show_preview(key)
+                    screenshot = take_screenshot()
+                    pending.append((key, executor.submit(_analyze_training, key, screenshot)))
+                    # Settle the previous training while this frame is being analyzed
+                    if len(pending) > 1:
+                        prev_key, prev_future = pending.pop(0)
+                        if finalize(prev_key, prev_future.result(), recheck=True):
+                            pending = []
+                            break
+                for key, future in pending:
+                    if finalize(key, future.result(), recheck=True):
+                        break
         else:
-            print("-")
-        
-        print(f"hint={hint_found}")
-        print(f"Fail: {failure_chance}% - Confident: {confidence:.2f}")
-        print(f"Score: {score}")
-        
+            for key in training_order:
+                show_preview(key)
 
+                # One pass: capture screenshot, evaluate support counts, bond levels, and hint
+                screenshot = take_screenshot()
+                data = _analyze_training(key, screenshot, read_failure=False)
+
+                # Failure rate is read live so low-confidence OCR can retry on fresh frames
+                debug_print(f"[DEBUG] Checking failure rate for {key.upper()} training...")
+                data["failure"], data["confidence"] = check_failure(key)
+                if finalize(key, data):
+                    break
+    finally:
+        if hold_active:
+            # Drag off the button before lifting so the release doesn't start a training
+            release_x, release_y = last_coords[0], last_coords[1] - TRAINING_HOVER_OFFSET
+            touch_move(release_x, release_y)
+            touch_up(release_x, release_y)
+
+    print(f"[INFO] Training scan took {clock.time() - scan_start:.2f}s, {len(results)}/{len(training_order)} trainings ({'hold' if hold_active else 'swipe'} mode{', pipelined' if pipelined else ''})")
+    record_training_scores(results)
     
     debug_print("[DEBUG] Going back from training screen...")
     click("assets/buttons/back_btn.png")
@@ -358,27 +479,19 @@ def do_train(train):
         return
     
     # Wait for screen to load and verify we're on training screen
-    time.sleep(1.0)
-    
-    # Fixed coordinates for each training type
-    training_coords = {
-        "spd": (165, 1557),
-        "sta": (357, 1563),
-        "pwr": (546, 1557),
-        "guts": (735, 1566),
-        "wit": (936, 1572)
-    }
+    settle("training_screen")
     
     # Check if the requested training type exists
-    if train not in training_coords:
+    if train not in TRAINING_COORDS:
         debug_print(f"[DEBUG] Unknown training type: {train}")
         return
     
     # Get the coordinates for the requested training type
-    train_coords = training_coords[train]
+    train_coords = TRAINING_COORDS[train]
     debug_print(f"[DEBUG] Found {train.upper()} training at coordinates {train_coords}")
     triple_click(train_coords[0], train_coords[1], interval=0.1)
     debug_print(f"[DEBUG] Triple clicked {train.upper()} training button")
+    career_state.note_action("train")
 
 def do_rest():
     """Perform rest action"""
@@ -394,7 +507,7 @@ def do_rest():
         print("[INFO] Going back to lobby to find rest button...")
         from utils.adb_input import tap
         tap(back_btn[0], back_btn[1])
-        time.sleep(1.0)  # Wait for lobby to load
+        settle("back_to_lobby")  # Wait for lobby to load
     
     # Now look for rest buttons in the lobby
     rest_btn = locate_on_screen("assets/buttons/rest_btn.png", confidence=0.5)
@@ -410,6 +523,7 @@ def do_rest():
         tap(rest_btn[0], rest_btn[1])
         debug_print("[DEBUG] Clicked rest button")
         print("[INFO] Rest button clicked")
+        career_state.note_action("rest")
     elif rest_summer_btn:
         debug_print(f"[DEBUG] Clicking summer rest button at {rest_summer_btn}")
         print(f"[INFO] Clicking summer rest button at {rest_summer_btn}")
@@ -417,9 +531,12 @@ def do_rest():
         tap(rest_summer_btn[0], rest_summer_btn[1])
         debug_print("[DEBUG] Clicked summer rest button")
         print("[INFO] Summer rest button clicked")
+        career_state.note_action("rest")
     else:
         debug_print("[DEBUG] No rest button found in lobby")
         print("[WARNING] No rest button found in lobby")
+        if back_btn:
+            report_miss("back_to_lobby")
 
 def do_recreation():
     """Perform recreation action"""
@@ -431,10 +548,12 @@ def do_recreation():
         debug_print(f"[DEBUG] Found recreation button at {recreation_btn}")
         tap(recreation_btn[0], recreation_btn[1])
         debug_print("[DEBUG] Clicked recreation button")
+        career_state.note_action("recreation")
     elif recreation_summer_btn:
         debug_print(f"[DEBUG] Found summer recreation button at {recreation_summer_btn}")
         tap(recreation_summer_btn[0], recreation_summer_btn[1])
         debug_print("[DEBUG] Clicked summer recreation button")
+        career_state.note_action("recreation")
     else:
         debug_print("[DEBUG] No recreation button found")
 
@@ -442,14 +561,13 @@ def do_race(prioritize_g1=False):
     """Perform race action"""
     debug_print(f"[DEBUG] Performing race action (G1 priority: {prioritize_g1})...")
     click("assets/buttons/races_btn.png", minSearch=10)
-    time.sleep(1.2)
+    settle("race_menu")
     click("assets/buttons/ok_btn.png", confidence=0.5, minSearch=1)
 
     found = race_select(prioritize_g1=prioritize_g1)
     if found:
         debug_print("[DEBUG] Race found and selected, proceeding to race preparation")
         race_prep()
-        time.sleep(1)
         # If race failed screen appears, handle retry before proceeding
         handle_race_retry_if_failed()
         after_race()
@@ -465,7 +583,7 @@ def race_day():
     import json
     
     # Load config to check if skill point check is enabled
-    with open("config.json", "r", encoding="utf-8") as file:
+    with open(CONFIG_FILE, "r", encoding="utf-8") as file:
         config = json.load(file)
     
     enable_skill_check = config.get("enable_skill_point_check", True)
@@ -477,31 +595,31 @@ def race_day():
     debug_print("[DEBUG] Clicking race day button...")
     if click("assets/buttons/race_day_btn.png", minSearch=10):
         debug_print("[DEBUG] Race day button clicked, clicking OK button...")
-        time.sleep(1.3)
+        clock.sleep(1.3)
         click("assets/buttons/ok_btn.png", confidence=0.5, minSearch=2)
-        time.sleep(1.0)  # Increased wait time
+        clock.sleep(1.0)  # Increased wait time
         
         # Try to find and click race button with better error handling
         race_clicked = False
         for attempt in range(3):  # Try up to 3 times
             if click("assets/buttons/race_btn.png", confidence=0.7, minSearch=1):
                 debug_print(f"[DEBUG] Race button clicked successfully, attempt {attempt + 1}")
-                time.sleep(0.5)  # Wait between clicks
+                clock.sleep(0.5)  # Wait between clicks
                 
                 # Click race button twice like in race_select
                 for j in range(2):
                     if click("assets/buttons/race_btn.png", confidence=0.7, minSearch=1):
                         debug_print(f"[DEBUG] Race button clicked {j+1} time(s)")
-                        time.sleep(0.5)
+                        clock.sleep(0.5)
                     else:
                         debug_print(f"[DEBUG] Failed to click race button {j+1} time(s)")
                 
                 race_clicked = True
-                time.sleep(0.8)  # Wait for UI to respond
+                clock.sleep(0.8)  # Wait for UI to respond
                 break
             else:
                 debug_print(f"[DEBUG] Race button not found, attempt {attempt + 1}")
-                time.sleep(0.5)
+                clock.sleep(0.5)
         
         if not race_clicked:
             debug_print("[ERROR] Failed to click race button after multiple attempts")
@@ -509,7 +627,6 @@ def race_day():
             
         debug_print("[DEBUG] Starting race preparation...")
         race_prep()
-        time.sleep(1)
         # If race failed screen appears, handle retry before proceeding
         handle_race_retry_if_failed()
         after_race()
@@ -520,137 +637,32 @@ def race_select(prioritize_g1=False):
     """Select race"""
     debug_print(f"[DEBUG] Selecting race (G1 priority: {prioritize_g1})...")
     
+    # Wait for race list to load before detection
+    debug_print("[DEBUG] Waiting for race list to load...")
+    settle("race_list")
     
-    def find_and_select_race():
-        """Helper function to find and select a race (G1 or normal)"""
-        # Wait for race list to load before detection
-        debug_print("[DEBUG] Waiting for race list to load...")
-        time.sleep(1.5)
-        
-        # Check initial screen first
-        if prioritize_g1:
-            debug_print("[DEBUG] Looking for G1 race.")
-            screenshot = take_screenshot()
-            race_cards = match_template(screenshot, "assets/ui/g1_race.png", confidence=0.9)
-            debug_print(f"[DEBUG] Initial G1 detection result: {race_cards}")
-            
-            if race_cards:
-                debug_print(f"[DEBUG] Found {len(race_cards)} G1 race card(s), searching for match_track within regions...")
-                for x, y, w, h in race_cards:
-                    # Search for match_track.png within the race card region
-                    region = (x, y, RACE_CARD_REGION[2], RACE_CARD_REGION[3])
-                    debug_print(f"[DEBUG] Searching region: {region}")
-                    match_aptitude = locate_match_track_with_brightness(confidence=0.6, region=region, brightness_threshold=180.0)
-                    if match_aptitude:
-                        debug_print(f"[DEBUG] ✅ Match track found at {match_aptitude} in region {region}")
-                    else:
-                        debug_print(f"[DEBUG] ❌ No match track found in region {region}")
-                    if match_aptitude:
-                        debug_print(f"[DEBUG] G1 race found at {match_aptitude}")
-                        tap(match_aptitude[0], match_aptitude[1])
-                        time.sleep(0.2)
-                        
-                        # Click race button twice like PC version
-                        for j in range(2):
-                            race_btn = locate_on_screen("assets/buttons/race_btn.png", confidence=0.6)
-                            if race_btn:
-                                debug_print(f"[DEBUG] Found race button at {race_btn}")
-                                tap(race_btn[0], race_btn[1])
-                                time.sleep(0.5)
-                            else:
-                                debug_print("[DEBUG] Race button not found")
-                        return True
-            else:
-                debug_print("[DEBUG] No G1 race cards found on initial screen, will try swiping...")
-        else:
-            debug_print("[DEBUG] Looking for race.")
-            match_aptitude = locate_match_track_with_brightness(confidence=0.6, brightness_threshold=180.0)
-            if match_aptitude:
-                debug_print(f"[DEBUG] Race found at {match_aptitude}")
-                tap(match_aptitude[0], match_aptitude[1])
-                time.sleep(0.2)
-                
-                # Click race button twice like PC version
-                for j in range(2):
-                    race_btn = locate_on_screen("assets/buttons/race_btn.png", confidence=0.8)
-                    if race_btn:
-                        debug_print(f"[DEBUG] Found race button at {race_btn}")
-                        tap(race_btn[0], race_btn[1])
-                        time.sleep(0.5)
-                    else:
-                        debug_print("[DEBUG] Race button not found")
-                return True
-        
-        # If not found on initial screen, try scrolling up to 4 times
-        for scroll in range(4):
-            # Use direct swipe instead of scroll_down
-            from utils.adb_input import swipe
-            debug_print(f"[DEBUG] Swiping from (378,1425) to (378,1106) (attempt {scroll+1}/4)")
-            swipe(378, 1425, 378, 1106, duration_ms=500)
-            time.sleep(0.2)
-            
-            # Check for race again after each swipe
-            if prioritize_g1:
-                screenshot = take_screenshot()
-                race_cards = match_template(screenshot, "assets/ui/g1_race.png", confidence=0.9)
-                
-                if race_cards:
-                    debug_print(f"[DEBUG] Found {len(race_cards)} G1 race card(s) after swipe {scroll+1}")
-                    for i, (x, y, w, h) in enumerate(race_cards):
-                        debug_print(f"[DEBUG] G1 Race Card {i+1}: bbox=({x}, {y}, {w}, {h})")
-                        # Search for match_track.png within the race card region
-                        region = (x, y, RACE_CARD_REGION[2], RACE_CARD_REGION[3])
-                        debug_print(f"[DEBUG] Extended region: {region}")
-                        match_aptitude = locate_match_track_with_brightness(confidence=0.6, region=region, brightness_threshold=180.0)
-                        if match_aptitude:
-                            debug_print(f"[DEBUG] ✅ Match track found at {match_aptitude} in region {region}")
-                        else:
-                            debug_print(f"[DEBUG] ❌ No match track found in region {region}")
-                        if match_aptitude:
-                            debug_print(f"[DEBUG] G1 race found at {match_aptitude} after swipe {scroll+1}")
-                            tap(match_aptitude[0], match_aptitude[1])
-                            time.sleep(0.2)
-                            
-                            # Click race button twice like PC version
-                            for j in range(2):
-                                race_btn = locate_on_screen("assets/buttons/race_btn.png", confidence=0.8)
-                                if race_btn:
-                                    debug_print(f"[DEBUG] Found race button at {race_btn}")
-                                    tap(race_btn[0], race_btn[1])
-                                    time.sleep(0.5)
-                                else:
-                                    debug_print("[DEBUG] Race button not found")
-                            return True
-                else:
-                    debug_print(f"[DEBUG] No G1 race cards found after swipe {scroll+1}")
-            else:
-                debug_print(f"[DEBUG] Looking for any race (non-G1) after swipe {scroll+1}")
-                match_aptitude = locate_match_track_with_brightness(confidence=0.6, brightness_threshold=180.0)
-                if match_aptitude:
-                    debug_print(f"[DEBUG] Race found at {match_aptitude} after swipe {scroll+1}")
-                    tap(match_aptitude[0], match_aptitude[1])
-                    time.sleep(0.2)
-                    
-                    # Click race button twice like PC version
-                    for j in range(2):
-                        race_btn = locate_on_screen("assets/buttons/race_btn.png", confidence=0.8)
-                        if race_btn:
-                            debug_print(f"[DEBUG] Found race button at {race_btn}")
-                            tap(race_btn[0], race_btn[1])
-                            time.sleep(0.5)
-                        else:
-                            debug_print("[DEBUG] Race button not found")
-                    return True
-                else:
-                    debug_print(f"[DEBUG] No races found after swipe {scroll+1}")
-        
+    # Scan the whole list once, then scroll back to the best race
+    race_position = find_best_race(prioritize_g1=prioritize_g1)
+    if not race_position:
+        debug_print("[DEBUG] No suitable race found")
         return False
     
-    # Use the unified race finding logic
-    found = find_and_select_race()
-    if not found:
-        debug_print("[DEBUG] No suitable race found")
-    return found
+    debug_print(f"[DEBUG] Race found at {race_position}")
+    tap(race_position[0], race_position[1])
+    settle("race_selected")
+    
+    # Click race button twice like PC version
+    for j in range(2):
+        race_btn = locate_on_screen("assets/buttons/race_btn.png", confidence=0.8)
+        if race_btn:
+            debug_print(f"[DEBUG] Found race button at {race_btn}")
+            tap(race_btn[0], race_btn[1])
+            clock.sleep(0.5)
+        else:
+            debug_print("[DEBUG] Race button not found")
+            if j == 0:
+                report_miss("race_selected")
+    return True
 
 def check_strategy_before_race(region=(660, 974, 378, 120)) -> bool:
     """Check and ensure strategy matches config before race."""
@@ -699,7 +711,7 @@ def check_strategy_before_race(region=(660, 974, 378, 120)) -> bool:
         
         # Load expected strategy from config
         try:
-            with open("config.json", "r", encoding="utf-8") as f:
+            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                 config = json.load(f)
             expected_strategy = config.get("strategy", "").upper()
         except Exception:
@@ -783,7 +795,7 @@ def change_strategy_before_race(expected_strategy: str) -> bool:
         debug_print("[DEBUG] Tapped confirm button")
         
         # Wait a moment for the change to take effect
-        time.sleep(2)
+        clock.sleep(2)
         
         debug_print(f"[DEBUG] Strategy change completed for {expected_strategy}")
         return True
@@ -796,23 +808,7 @@ def change_strategy_before_race(expected_strategy: str) -> bool:
 def race_prep():
     """Prepare for race"""
     debug_print("[DEBUG] Preparing for race...")
-    
-    view_result_btn = wait_for_image("assets/buttons/view_results.png", timeout=20)
-        
-    # Check and ensure strategy matches config before race
-    if not check_strategy_before_race():
-        debug_print("[DEBUG] Failed to ensure correct strategy, proceeding anyway...")
-    if view_result_btn:
-        debug_print(f"[DEBUG] Found view results button at {view_result_btn}")
-        tap(view_result_btn[0], view_result_btn[1])
-        time.sleep(0.5)
-        for i in range(1):
-            debug_print(f"[DEBUG] Clicking view results {i + 1}/3")
-            triple_click(view_result_btn[0], view_result_btn[1], interval=0.01)
-            time.sleep(0.01)
-        debug_print("[DEBUG] Race preparation complete")
-    else:
-        debug_print("[DEBUG] View results button not found")
+    return RaceFlow(check_strategy=check_strategy_before_race).prepare()
 
 def handle_race_retry_if_failed():
     """Detect race failure on race day and retry based on config.
@@ -823,8 +819,8 @@ def handle_race_retry_if_failed():
     """
     try:
         # Check for failure indicator (clock icon)
-        clock = locate_on_screen("assets/icons/clock.png", confidence=0.8)
-        if not clock:
+        clock_icon = locate_on_screen("assets/icons/clock.png", confidence=0.8)
+        if not clock_icon:
             return False
 
         print("[INFO] Race failed detected (clock icon).")
@@ -845,7 +841,7 @@ def handle_race_retry_if_failed():
 
         # Wait before re-prepping the race
         print("[INFO] Waiting 5 seconds before retrying the race...")
-        time.sleep(5)
+        clock.sleep(5)
         print("[INFO] Re-preparing race...")
         race_prep()
         return True
@@ -858,39 +854,63 @@ def handle_race_retry_if_failed():
 def after_race():
     """Handle post-race actions"""
     debug_print("[DEBUG] Handling post-race actions...")
-    
-    # Try to click first next button with fallback mechanism
-    if not click("assets/buttons/next_btn.png", confidence=0.7, minSearch=10):
-        debug_print("[DEBUG] First next button not found after 10 attempts, clicking middle of screen as fallback...")
-        tap(540, 960)  # Click middle of screen (1080x1920 resolution)
-        time.sleep(1)
-        debug_print("[DEBUG] Retrying next button search after screen tap...")
-        click("assets/buttons/next_btn.png", confidence=0.7, minSearch=10)
-    
-    time.sleep(4)
-    
-    # Try to click second next button with fallback mechanism
-    if not click("assets/buttons/next2_btn.png", confidence=0.7, minSearch=10):
-        debug_print("[DEBUG] Second next button not found after 10 attempts, clicking middle of screen as fallback...")
-        tap(540, 960)  # Click middle of screen (1080x1920 resolution)
-        time.sleep(1)
-        debug_print("[DEBUG] Retrying next2 button search after screen tap...")
-        click("assets/buttons/next2_btn.png", confidence=0.7, minSearch=10)
-    
-    debug_print("[DEBUG] Post-race actions complete")
+    RaceFlow(on_failed=handle_race_retry_if_failed).finish()
+    career_state.note_action("race")
 
-def career_lobby():
-    """Main career lobby loop"""
-    # Load configuration
+def load_lobby_settings():
+    """(config, minimum mood, prioritize G1 race) for the career loop"""
     try:
-        with open("config.json", "r", encoding="utf-8") as file:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as file:
             config = json.load(file)
-        MINIMUM_MOOD = config["minimum_mood"]
-        PRIORITIZE_G1_RACE = config["prioritize_g1_race"]
+        return config, config["minimum_mood"], config["prioritize_g1_race"]
     except Exception as e:
         print(f"Error loading config: {e}")
-        MINIMUM_MOOD = "GREAT"
-        PRIORITIZE_G1_RACE = False
+        return {}, "GREAT", False
+
+def handle_event_screen(screenshot):
+    """Answer the event on screen, if any. Returns True when an event was handled."""
+    debug_print("[DEBUG] Checking for events...")
+    try:
+        event_choice_region = (6, 450, 126, 1776)
+        event_matches = match_template(screenshot, "assets/icons/event_choice_1.png", confidence=0.45, region=event_choice_region)
+        
+        if event_matches:
+            print("[INFO] Event detected, analyzing choices...")
+            choice_number, success, choice_locations = handle_event_choice(screenshot)
+            if success:
+                click_success = click_event_choice(choice_number, choice_locations)
+                if click_success:
+                    print(f"[INFO] Successfully selected choice {choice_number}")
+                    clock.sleep(0.5)
+                    return True
+                else:
+                    print("[WARNING] Failed to click event choice, falling back to top choice")
+                    # Fallback using existing match
+                    x, y, w, h = event_matches[0]
+                    center = (x + w//2, y + h//2)
+                    tap(center[0], center[1])
+                    return True
+            else:
+                # If no choice locations were returned, skip clicking and continue loop
+                if not choice_locations and not success:
+                    debug_print("[DEBUG] Skipping event click due to no visible choices after stabilization")
+                    return True
+                print("[WARNING] Event analysis failed, falling back to top choice")
+                # Fallback using existing match
+                x, y, w, h = event_matches[0]
+                center = (x + w//2, y + h//2)
+                tap(center[0], center[1])
+                return True
+        else:
+            debug_print("[DEBUG] No events found")
+    except Exception as e:
+        print(f"[ERROR] Event handling error: {e}")
+    return False
+
+def career_lobby():
+    """Main career lobby loop"""
+    # Load configuration
+    settings = load_lobby_settings()
 
     # Program start
     while True:
@@ -918,42 +938,8 @@ def career_lobby():
             continue
         
         # Check for events
-        debug_print("[DEBUG] Checking for events...")
-        try:
-            event_choice_region = (6, 450, 126, 1776)
-            event_matches = match_template(screenshot, "assets/icons/event_choice_1.png", confidence=0.45, region=event_choice_region)
-            
-            if event_matches:
-                print("[INFO] Event detected, analyzing choices...")
-                choice_number, success, choice_locations = handle_event_choice()
-                if success:
-                    click_success = click_event_choice(choice_number, choice_locations)
-                    if click_success:
-                        print(f"[INFO] Successfully selected choice {choice_number}")
-                        time.sleep(0.5)
-                        continue
-                    else:
-                        print("[WARNING] Failed to click event choice, falling back to top choice")
-                        # Fallback using existing match
-                        x, y, w, h = event_matches[0]
-                        center = (x + w//2, y + h//2)
-                        tap(center[0], center[1])
-                        continue
-                else:
-                    # If no choice locations were returned, skip clicking and continue loop
-                    if not choice_locations and not success:
-                        debug_print("[DEBUG] Skipping event click due to no visible choices after stabilization")
-                        continue
-                    print("[WARNING] Event analysis failed, falling back to top choice")
-                    # Fallback using existing match
-                    x, y, w, h = event_matches[0]
-                    center = (x + w//2, y + h//2)
-                    tap(center[0], center[1])
-                    continue
-            else:
-                debug_print("[DEBUG] No events found")
-        except Exception as e:
-            print(f"[ERROR] Event handling error: {e}")
+        if handle_event_screen(screenshot):
+            continue
 
         # Check inspiration button
         debug_print("[DEBUG] Checking for inspiration...")
@@ -993,270 +979,281 @@ def career_lobby():
             print("[INFO] Should be in career lobby.")
             continue
 
-        debug_print("[DEBUG] Confirmed in career lobby")
-        time.sleep(0.5)
+        career_turn(settings)
 
-        # Check if there is debuff status
-        debug_print("[DEBUG] Checking for debuff status...")
-        # Use match_template to get full bounding box for brightness check
-        screenshot = take_screenshot()
-        infirmary_matches = match_template(screenshot, "assets/buttons/infirmary_btn2.png", confidence=0.9)
+def career_turn(settings):
+    """Play one turn from the career lobby (tazuna hint already confirmed)"""
+    config, MINIMUM_MOOD, PRIORITIZE_G1_RACE = settings
+    debug_print("[DEBUG] Confirmed in career lobby")
+    clock.sleep(0.5)
+
+    # Check if there is debuff status
+    debug_print("[DEBUG] Checking for debuff status...")
+    # Use match_template to get full bounding box for brightness check
+    screenshot = take_screenshot()
+    infirmary_matches = match_template(screenshot, "assets/buttons/infirmary_btn2.png", confidence=0.9)
+    
+    if infirmary_matches:
+        debuffed_box = infirmary_matches[0]  # Get first match (x, y, w, h)
+        x, y, w, h = debuffed_box
+        center_x, center_y = x + w//2, y + h//2
         
-        if infirmary_matches:
-            debuffed_box = infirmary_matches[0]  # Get first match (x, y, w, h)
-            x, y, w, h = debuffed_box
-            center_x, center_y = x + w//2, y + h//2
-            
-            # Check if the button is actually active (bright) or just disabled (dark)
-            if is_infirmary_active_adb(debuffed_box):
-                tap(center_x, center_y)
-                print("[INFO] Character has debuff, go to infirmary instead.")
-                continue
+        # Check if the button is actually active (bright) or just disabled (dark)
+        if is_infirmary_active_adb(debuffed_box):
+            tap(center_x, center_y)
+            print("[INFO] Character has debuff, go to infirmary instead.")
+            career_state.note_action("infirmary")
+            return
+        else:
+            debug_print("[DEBUG] Infirmary button found but is disabled (dark)")
+    else:
+        debug_print("[DEBUG] No infirmary button detected")
+
+    # Get current state, re-reading only what changed since the last turn
+    debug_print("[DEBUG] Getting current game state...")
+    state = career_state.read(screenshot)
+    mood = state["mood"]
+    mood_index = MOOD_LIST.index(mood)
+    minimum_mood = MOOD_LIST.index(MINIMUM_MOOD)
+    turn = state["turn"]
+    year = state["year"]
+    goal_data = state["goal"]
+    criteria_text = state["criteria"]
+    current_stats = state["stats"]
+    
+    print("\n=======================================================================================\n")
+    print(f"Year: {year}")
+    print(f"Mood: {mood}")
+    print(f"Turn: {turn}")
+    print(f"Goal Name: {goal_data['text']}")
+    print(f"Status: {criteria_text}")
+    print(f"G1 Race Requirement: {goal_data['requires_g1_races']}")
+    debug_print(f"[DEBUG] Mood index: {mood_index}, Minimum mood index: {minimum_mood}")
+    
+    # Check energy bar before proceeding with training decisions
+    energy_percentage = state["energy"]
+    min_energy = config.get("min_energy", 30)
+    
+    print(f"Energy: {energy_percentage:.1f}% (Minimum: {min_energy}%)")
+    
+    # Check if goals criteria are NOT met AND it is not Pre-Debut AND turn is less than 10
+    # Prioritize racing when criteria are not met to help achieve goals
+    debug_print("[DEBUG] Checking goal criteria...")
+    goal_analysis = check_goal_criteria({"text": criteria_text, "requires_g1_races": goal_data['requires_g1_races']}, year, turn)
+    
+    if goal_analysis["should_prioritize_racing"]:
+        if goal_analysis["should_prioritize_g1_races"] and not has_suitable_race(year):
+            print(f"Decision: Criteria not met - No suitable G1 race on the calendar for {year}, skipping the race menu")
+        elif goal_analysis["should_prioritize_g1_races"]:
+            print(f"Decision: Criteria not met - Prioritizing G1 races to meet goals")
+            race_found = do_race(prioritize_g1=True)
+            if race_found:
+                print("Race Result: Found G1 Race")
+                return
             else:
-                debug_print("[DEBUG] Infirmary button found but is disabled (dark)")
+                print("Race Result: No G1 Race Found")
+                # If there is no G1 race found, go back and do training instead
+                click("assets/buttons/back_btn.png", text="[INFO] G1 race not found. Proceeding to training.")
+                clock.sleep(0.5)
         else:
-            debug_print("[DEBUG] No infirmary button detected")
-
-        # Get current state
-        debug_print("[DEBUG] Getting current game state...")
-        mood = check_mood()
-        mood_index = MOOD_LIST.index(mood)
-        minimum_mood = MOOD_LIST.index(MINIMUM_MOOD)
-        turn = check_turn()
-        year = check_current_year()
-        goal_data = check_goal_name_with_g1_requirement()
-        criteria_text = check_criteria()
-        
-        print("\n=======================================================================================\n")
-        print(f"Year: {year}")
-        print(f"Mood: {mood}")
-        print(f"Turn: {turn}")
-        print(f"Goal Name: {goal_data['text']}")
-        print(f"Status: {criteria_text}")
-        print(f"G1 Race Requirement: {goal_data['requires_g1_races']}")
-        debug_print(f"[DEBUG] Mood index: {mood_index}, Minimum mood index: {minimum_mood}")
-        
-        # Check energy bar before proceeding with training decisions
-        debug_print("[DEBUG] Checking energy bar...")
-        energy_percentage = check_energy_bar()
-        min_energy = config.get("min_energy", 30)
+            print(f"Decision: Criteria not met - Prioritizing normal races to meet goals")
+            race_found = do_race()
+            if race_found:
+                print("Race Result: Found Race")
+                return
+            else:
+                print("Race Result: No Race Found")
+                # If there is no race found, go back and do training instead
+                click("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to training.")
+                clock.sleep(0.5)
+    else:
+        print("Decision: Criteria met or conditions not suitable for racing")
+        debug_print(f"[DEBUG] Racing not prioritized - Criteria met: {goal_analysis['criteria_met']}, Pre-debut: {goal_analysis['is_pre_debut']}, Turn < 10: {goal_analysis['turn_less_than_10']}")
+    
+    print("")
+
+    # URA SCENARIO
+    debug_print("[DEBUG] Checking for URA scenario...")
+    if year == "Finale Season" and turn == "Race Day":
+        print("[INFO] URA Finale")
         
-        print(f"Energy: {energy_percentage:.1f}% (Minimum: {min_energy}%)")
+        # Check skill points cap before URA race day (if enabled)
+        enable_skill_check = config.get("enable_skill_point_check", True)
         
-        # Check if goals criteria are NOT met AND it is not Pre-Debut AND turn is less than 10
-        # Prioritize racing when criteria are not met to help achieve goals
-        debug_print("[DEBUG] Checking goal criteria...")
-        goal_analysis = check_goal_criteria({"text": criteria_text, "requires_g1_races": goal_data['requires_g1_races']}, year, turn)
+        if enable_skill_check:
+            print("[INFO] URA Finale Race Day - Checking skill points cap...")
+            check_skill_points_cap()
         
-        if goal_analysis["should_prioritize_racing"]:
-            if goal_analysis["should_prioritize_g1_races"]:
-                print(f"Decision: Criteria not met - Prioritizing G1 races to meet goals")
-                race_found = do_race(prioritize_g1=True)
-                if race_found:
-                    print("Race Result: Found G1 Race")
-                    continue
+        # URA race logic would go here
+        debug_print("[DEBUG] Starting URA race...")
+        if click("assets/buttons/race_ura.png", minSearch=10):
+            clock.sleep(0.5)
+            # Click race button 2 times after entering race menu
+            for i in range(2):
+                if click("assets/buttons/race_btn.png", minSearch=2):
+                    debug_print(f"[DEBUG] Successfully clicked race button {i+1}/2")
+                    clock.sleep(1)
                 else:
-                    print("Race Result: No G1 Race Found")
-                    # If there is no G1 race found, go back and do training instead
-                    click("assets/buttons/back_btn.png", text="[INFO] G1 race not found. Proceeding to training.")
-                    time.sleep(0.5)
-            else:
-                print(f"Decision: Criteria not met - Prioritizing normal races to meet goals")
-                race_found = do_race()
-                if race_found:
-                    print("Race Result: Found Race")
-                    continue
-                else:
-                    print("Race Result: No Race Found")
-                    # If there is no race found, go back and do training instead
-                    click("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to training.")
-                    time.sleep(0.5)
-        else:
-            print("Decision: Criteria met or conditions not suitable for racing")
-            debug_print(f"[DEBUG] Racing not prioritized - Criteria met: {goal_analysis['criteria_met']}, Pre-debut: {goal_analysis['is_pre_debut']}, Turn < 10: {goal_analysis['turn_less_than_10']}")
+                    debug_print(f"[DEBUG] Race button not found on attempt {i+1}/2")
         
-        print("")
+        race_prep()
+        # If race failed screen appears, handle retry before proceeding
+        handle_race_retry_if_failed()
+        after_race()
+        return
+    else:
+        debug_print("[DEBUG] Not URA scenario")
 
-        # URA SCENARIO
-        debug_print("[DEBUG] Checking for URA scenario...")
-        if year == "Finale Season" and turn == "Race Day":
-            print("[INFO] URA Finale")
-            
-            # Check skill points cap before URA race day (if enabled)
-            enable_skill_check = config.get("enable_skill_point_check", True)
-            
-            if enable_skill_check:
-                print("[INFO] URA Finale Race Day - Checking skill points cap...")
-                check_skill_points_cap()
-            
-            # URA race logic would go here
-            debug_print("[DEBUG] Starting URA race...")
-            if click("assets/buttons/race_ura.png", minSearch=10):
-                time.sleep(0.5)
-                # Click race button 2 times after entering race menu
-                for i in range(2):
-                    if click("assets/buttons/race_btn.png", minSearch=2):
-                        debug_print(f"[DEBUG] Successfully clicked race button {i+1}/2")
-                        time.sleep(1)
-                    else:
-                        debug_print(f"[DEBUG] Race button not found on attempt {i+1}/2")
-            
-            race_prep()
-            time.sleep(1)
-            # If race failed screen appears, handle retry before proceeding
-            handle_race_retry_if_failed()
-            after_race()
-            continue
+    # If calendar is race day, do race
+    debug_print("[DEBUG] Checking for race day...")
+    if turn == "Race Day" and year != "Finale Season":
+        print("[INFO] Race Day.")
+        race_day()
+        return
+    else:
+        debug_print("[DEBUG] Not race day")
+
+    # Mood check
+    debug_print("[DEBUG] Checking mood...")
+    if mood_index < minimum_mood:
+        # Check if energy is too high (>90%) before doing recreation
+        if energy_percentage > 90:
+            debug_print(f"[DEBUG] Mood too low ({mood_index} < {minimum_mood}) but energy too high ({energy_percentage:.1f}% > 90%), skipping recreation")
+            print(f"[INFO] Mood is low but energy is too high ({energy_percentage:.1f}% > 90%), skipping recreation")
         else:
-            debug_print("[DEBUG] Not URA scenario")
+            debug_print(f"[DEBUG] Mood too low ({mood_index} < {minimum_mood}), doing recreation")
+            print("[INFO] Mood is low, trying recreation to increase mood")
+            do_recreation()
+            return
+    else:
+        debug_print(f"[DEBUG] Mood is good ({mood_index} >= {minimum_mood})")
 
-        # If calendar is race day, do race
-        debug_print("[DEBUG] Checking for race day...")
-        if turn == "Race Day" and year != "Finale Season":
-            print("[INFO] Race Day.")
-            race_day()
-            continue
-        else:
-            debug_print("[DEBUG] Not race day")
-
-        # Mood check
-        debug_print("[DEBUG] Checking mood...")
-        if mood_index < minimum_mood:
-            # Check if energy is too high (>90%) before doing recreation
-            if energy_percentage > 90:
-                debug_print(f"[DEBUG] Mood too low ({mood_index} < {minimum_mood}) but energy too high ({energy_percentage:.1f}% > 90%), skipping recreation")
-                print(f"[INFO] Mood is low but energy is too high ({energy_percentage:.1f}% > 90%), skipping recreation")
-            else:
-                debug_print(f"[DEBUG] Mood too low ({mood_index} < {minimum_mood}), doing recreation")
-                print("[INFO] Mood is low, trying recreation to increase mood")
-                do_recreation()
-                continue
+    # If Prioritize G1 Race is true, check G1 race every turn
+    debug_print(f"[DEBUG] Checking G1 race priority: {PRIORITIZE_G1_RACE}")
+    if PRIORITIZE_G1_RACE and not is_pre_debut_year(year) and is_racing_available(year):
+        if not has_suitable_race(year):
+            print(f"G1 Race Check: No suitable G1 race on the calendar for {year}, skipping the race menu")
         else:
-            debug_print(f"[DEBUG] Mood is good ({mood_index} >= {minimum_mood})")
-
-        # If Prioritize G1 Race is true, check G1 race every turn
-        debug_print(f"[DEBUG] Checking G1 race priority: {PRIORITIZE_G1_RACE}")
-        if PRIORITIZE_G1_RACE and not is_pre_debut_year(year) and is_racing_available(year):
             print("G1 Race Check: Looking for G1 race...")
             g1_race_found = do_race(PRIORITIZE_G1_RACE)
             if g1_race_found:
                 print("G1 Race Result: Found G1 Race")
-                continue
+                return
             else:
                 print("G1 Race Result: No G1 Race Found")
                 # If there is no G1 race, go back and do training instead
                 click("assets/buttons/back_btn.png", text="[INFO] G1 race not found. Proceeding to training.")
-                time.sleep(0.5)
-        else:
-            debug_print("[DEBUG] G1 race priority disabled or conditions not met")
-        
-        # Check training button
-        debug_print("[DEBUG] Going to training...")
+                clock.sleep(0.5)
+    else:
+        debug_print("[DEBUG] G1 race priority disabled or conditions not met")
+    
+    # Check training button
+    debug_print("[DEBUG] Going to training...")
+    
+    # Check energy before proceeding with training
+    if energy_percentage < min_energy:
+        print(f"[INFO] Energy too low ({energy_percentage:.1f}% < {min_energy}%), skipping training and going to rest")
+        do_rest()
+        return
         
-        # Check energy before proceeding with training
-        if energy_percentage < min_energy:
-            print(f"[INFO] Energy too low ({energy_percentage:.1f}% < {min_energy}%), skipping training and going to rest")
-            do_rest()
-            continue
-            
-        if not go_to_training():
-            print("[INFO] Training button is not found.")
-            continue
+    if not go_to_training():
+        print("[INFO] Training button is not found.")
+        return
 
-        # Last, do training
-        debug_print("[DEBUG] Analyzing training options...")
-        time.sleep(0.5)
-        results_training = check_training()
-        
-        debug_print("[DEBUG] Deciding best training action using scoring algorithm...")
-        
-        # Load config for scoring thresholds
-        try:
-            with open("config.json", "r", encoding="utf-8") as file:
-                training_config = json.load(file)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-            training_config = {"maximum_failure": 15, "min_score": 1.0, "min_wit_score": 1.0, "priority_stat": ["spd", "sta", "wit", "pwr", "guts"]}
-        
-        # Use new scoring algorithm to choose best training
-        from core.state_adb import choose_best_training
-        best_training = choose_best_training(results_training, training_config)
-        
-        if best_training:
-            debug_print(f"[DEBUG] Scoring algorithm selected: {best_training.upper()} training")
-            print(f"[INFO] Selected {best_training.upper()} training based on scoring algorithm")
-            do_train(best_training)
-        else:
-            # Fallback logic when no training meets standard criteria
-            debug_print("[DEBUG] No suitable training found based on scoring criteria")
-            print("[INFO] No suitable training found based on scoring criteria.")
+    # Last, do training
+    debug_print("[DEBUG] Analyzing training options...")
+    clock.sleep(0.5)
+    results_training = check_training(current_stats)
+    
+    debug_print("[DEBUG] Deciding best training action using scoring algorithm...")
+    
+    # Load config for scoring thresholds
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as file:
+            training_config = json.load(file)
+    except Exception as e:
+        print(f"Error loading config: {e}")
+        training_config = {"maximum_failure": 15, "min_score": 1.0, "min_wit_score": 1.0, "priority_stat": ["spd", "sta", "wit", "pwr", "guts"]}
+    
+    # Use new scoring algorithm to choose best training
+    from core.state_adb import choose_best_training
+    best_training = choose_best_training(results_training, training_config, current_stats)
+    
+    if best_training:
+        debug_print(f"[DEBUG] Scoring algorithm selected: {best_training.upper()} training")
+        print(f"[INFO] Selected {best_training.upper()} training based on scoring algorithm")
+        do_train(best_training)
+    else:
+        # Fallback logic when no training meets standard criteria
+        debug_print("[DEBUG] No suitable training found based on scoring criteria")
+        print("[INFO] No suitable training found based on scoring criteria.")
 
-            # High-energy fallback: Avoid resting at high energy
-            if energy_percentage > 90:
-                print("[INFO] Energy is high. Attempting to find a productive alternative to resting.")
-                
-                # Create a config that ignores score but respects safety
-                desperate_config = {**training_config, 'min_score': -1.0, 'min_wit_score': -1.0}
-                
-                # 1. Prioritize safe WIT training as it recovers energy
-                wit_data = results_training.get('wit')
-                if wit_data and wit_data.get('failure', 100) <= training_config.get('maximum_failure', 15):
-                    print("[INFO] Prioritizing safe WIT training to recover energy.")
-                    do_train('wit')
-                    continue
-                
-                desperate_training = choose_best_training(results_training, desperate_config)
-                
-                # 2. If WIT is not an option, take any other safe training
-                if desperate_training:
-                    print(f"[INFO] No safe WIT training. Selected best available safe option: {desperate_training.upper()}")
-                    do_train(desperate_training)
-                    continue
-                else:
-                    print("[INFO] No safe training options available at all. Proceeding to default action.")
+        # High-energy fallback: Avoid resting at high energy
+        if energy_percentage > 90:
+            print("[INFO] Energy is high. Attempting to find a productive alternative to resting.")
             
-            # If not high energy, or if high-energy fallbacks failed, proceed with original logic
+            # Create a config that ignores score but respects safety
+            desperate_config = {**training_config, 'min_score': -1.0, 'min_wit_score': -1.0}
             
-            # Original fallback logic
-            # Check if we should prioritize racing when no good training is available
-            do_race_when_bad_training = training_config.get("do_race_when_bad_training", True)
+            # 1. Prioritize safe WIT training as it recovers energy
+            wit_data = results_training.get('wit')
+            if wit_data and wit_data.get('failure', 100) <= training_config.get('maximum_failure', 15):
+                print("[INFO] Prioritizing safe WIT training to recover energy.")
+                do_train('wit')
+                return
             
-            if do_race_when_bad_training:
-                # Check if all training options have failure rates above maximum
-                from core.logic import all_training_unsafe
-                max_failure = training_config.get('maximum_failure', 15)
-                debug_print(f"[DEBUG] Checking if all training options have failure rate > {max_failure}%")
-                debug_print(f"[DEBUG] Training results: {[(k, v['failure']) for k, v in results_training.items()]}")
-                
-                if all_training_unsafe(results_training, max_failure):
-                    debug_print(f"[DEBUG] All training options have failure rate > {max_failure}%")
-                    print(f"[INFO] All training options have failure rate > {max_failure}%. Skipping race and choosing to rest.")
+            desperate_training = choose_best_training(results_training, desperate_config, current_stats)
+            
+            # 2. If WIT is not an option, take any other safe training
+            if desperate_training:
+                print(f"[INFO] No safe WIT training. Selected best available safe option: {desperate_training.upper()}")
+                do_train(desperate_training)
+                return
+            else:
+                print("[INFO] No safe training options available at all. Proceeding to default action.")
+        
+        # If not high energy, or if high-energy fallbacks failed, proceed with original logic
+        
+        # Original fallback logic
+        # Check if we should prioritize racing when no good training is available
+        do_race_when_bad_training = training_config.get("do_race_when_bad_training", True)
+        
+        if do_race_when_bad_training:
+            # Check if all training options have failure rates above maximum
+            from core.logic import all_training_unsafe
+            max_failure = training_config.get('maximum_failure', 15)
+            debug_print(f"[DEBUG] Checking if all training options have failure rate > {max_failure}%")
+            debug_print(f"[DEBUG] Training results: {[(k, v['failure']) for k, v in results_training.items()]}")
+            
+            if all_training_unsafe(results_training, max_failure):
+                debug_print(f"[DEBUG] All training options have failure rate > {max_failure}%")
+                print(f"[INFO] All training options have failure rate > {max_failure}%. Skipping race and choosing to rest.")
+                do_rest()
+            else:
+                # Check if racing is available (no races in July/August)
+                if not is_racing_available(year):
+                    debug_print("[DEBUG] Racing not available (summer break)")
+                    print("[INFO] July/August detected. No races available during summer break. Choosing to rest.")
                     do_rest()
                 else:
-                    # Check if racing is available (no races in July/August)
-                    if not is_racing_available(year):
-                        debug_print("[DEBUG] Racing not available (summer break)")
-                        print("[INFO] July/August detected. No races available during summer break. Choosing to rest.")
-                        do_rest()
+                    print("[INFO] Prioritizing race due to insufficient training scores.")
+                    print("Training Race Check: Looking for race due to insufficient training scores...")
+                    race_found = do_race()
+                    if race_found:
+                        print("Training Race Result: Found Race")
+                        return
                     else:
-                        print("[INFO] Prioritizing race due to insufficient training scores.")
-                        print("Training Race Check: Looking for race due to insufficient training scores...")
-                        race_found = do_race()
-                        if race_found:
-                            print("Training Race Result: Found Race")
-                            continue
-                        else:
-                            print("Training Race Result: No Race Found")
-                            # If no race found, go back and rest
-                            click("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to rest.")
-                            time.sleep(0.5)
-                            do_rest()
-            else:
-                print("[INFO] Race prioritization disabled. Choosing to rest.")
-                do_rest()
-        
-        debug_print("[DEBUG] Waiting before next iteration...")
-        time.sleep(1)
+                        print("Training Race Result: No Race Found")
+                        # If no race found, go back and rest
+                        click("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to rest.")
+                        clock.sleep(0.5)
+                        do_rest()
+        else:
+            print("[INFO] Race prioritization disabled. Choosing to rest.")
+            do_rest()
+    
+    debug_print("[DEBUG] Waiting before next iteration...")
+    clock.sleep(1)
 
 def is_pre_debut_year(year):
     return ("Pre-Debut" in year or "PreDebut" in year or 
@@ -1,8 +1,10 @@
 import json
 
 from core.state_adb import check_current_year, stat_state
+from utils.config_file import CONFIG_FILE
+from utils.adb_screenshot import current_device
 
-with open("config.json", "r", encoding="utf-8") as file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as file:
   config = json.load(file)
 
 PRIORITY_STAT = config["priority_stat"]
@@ -11,6 +13,21 @@ STAT_CAPS = config["stat_caps"]
 DO_RACE_WHEN_BAD_TRAINING = config.get("do_race_when_bad_training", True)
 MIN_CONFIDENCE = 0.5  # Minimum confidence threshold for training decisions (currently used for retry logic)
 
+# Training scan planning
+TRAINING_FAILURE_ORDER = ["wit", "guts", "pwr", "sta", "spd"]  # lowest base failure rate first
+MAX_SUPPORTS_PER_TRAINING = 5
+SUPPORT_DECK_SIZE = config.get("support_deck_size", 6)
+PRIOR_SMOOTHING = 0.3  # Weight of the latest turn in the expected score prior
+
+# Expected score per training, learned from previous scans this session.
+# Device address -> {stat: score}, devices in one process train different decks
+training_score_priors = {}
+
+def get_training_score_prior(device_address=None):
+  if device_address is None:
+    device_address = current_device()
+  return training_score_priors.setdefault(device_address, {})
+
 # Get priority stat from config
 def get_stat_priority(stat_key: str) -> int:
   return PRIORITY_STAT.index(stat_key) if stat_key in PRIORITY_STAT else 999
@@ -36,3 +53,79 @@ def filter_by_stat_caps(results, current_stats):
       print(f"[INFO] {stat.upper()} training filtered out: current {current_stat_value} >= cap {stat_cap}")
   
   return filtered
+
+
+# Remember how each scanned training scored, used to order the next scan
+def record_training_scores(results):
+  training_score_prior = get_training_score_prior()
+  for stat, data in results.items():
+    previous = training_score_prior.get(stat)
+    if previous is None:
+      training_score_prior[stat] = data["score"]
+    else:
+      training_score_prior[stat] = round(previous + PRIOR_SMOOTHING * (data["score"] - previous), 3)
+
+# Decide which trainings to hover and in which order
+def plan_training_scan(current_stats, order=None):
+  if order is None:
+    order = TRAINING_FAILURE_ORDER
+  plan = []
+  for stat in order:
+    current_stat_value = current_stats.get(stat, 0) if current_stats else 0
+    stat_cap = STAT_CAPS.get(stat, 1200)
+    if current_stat_value >= stat_cap:
+      print(f"[INFO] {stat.upper()} training not scanned: current {current_stat_value} >= cap {stat_cap}")
+      continue
+    plan.append(stat)
+
+  # Everything capped: scan all so the fallback logic still gets failure rates
+  if not plan:
+    return list(order)
+
+  # Highest expected score first, base order breaks ties (sort is stable)
+  training_score_prior = get_training_score_prior()
+  plan.sort(key=lambda stat: -training_score_prior.get(stat, 0.0))
+  return plan
+
+# Highest score a training could still reach with the supports that haven't shown up yet
+def training_score_upper_bound(supports_left, scoring_rules):
+  per_support = max(
+    scoring_rules.get("rainbow_support", {}).get("points", 1.0),
+    scoring_rules.get("not_rainbow_support_low", {}).get("points", 0.7),
+    scoring_rules.get("not_rainbow_support_high", {}).get("points", 0.0),
+  )
+  hint_points = max(scoring_rules.get("hint", {}).get("points", 0.3), 0.0)
+  supports = min(MAX_SUPPORTS_PER_TRAINING, max(supports_left, 0))
+  return round(supports * max(per_support, 0.0) + hint_points, 2)
+
+# Check if no unscanned training can beat the best eligible one found so far
+def no_better_training_left(results, remaining, scoring_rules, config):
+  if not remaining:
+    return True
+
+  maximum_failure = config.get("maximum_failure", 15)
+  min_score = config.get("min_score", 1.0)
+  min_wit_score = config.get("min_wit_score", 1.0)
+
+  best_stat = None
+  best_score = None
+  for stat, data in results.items():
+    threshold = min_wit_score if stat == "wit" else min_score
+    if data["failure"] > maximum_failure or data["score"] < threshold:
+      continue
+    if best_score is None or data["score"] > best_score or (data["score"] == best_score and get_stat_priority(stat) < get_stat_priority(best_stat)):
+      best_stat, best_score = stat, data["score"]
+  if best_stat is None:
+    return False
+
+  # Each support card shows up on at most one training per turn
+  supports_seen = sum(data.get("total_support", 0) for data in results.values())
+  bound = training_score_upper_bound(SUPPORT_DECK_SIZE - supports_seen, scoring_rules)
+  for stat in remaining:
+    if bound > best_score:
+      return False
+    if bound == best_score and get_stat_priority(stat) < get_stat_priority(best_stat):
+      return False
+
+  print(f"[INFO] {best_stat.upper()} score {best_score} can't be beaten (remaining bound {bound}). Skipping {', '.join(s.upper() for s in remaining)}.")
+  return True
@@ -3,14 +3,20 @@ from PIL import Image, ImageOps, ImageEnhance
 import numpy as np
 import cv2
 import os
+import re
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.config_file import CONFIG_FILE
+from utils.session_recorder import record_ocr
 
 # Configure Tesseract to use the custom trained data
 tessdata_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tessdata')
 os.environ['TESSDATA_PREFIX'] = tessdata_dir
 
 # Load config and check debug mode
-with open("config.json", "r", encoding="utf-8") as config_file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
     config = json.load(config_file)
     DEBUG_MODE = config.get("debug_mode", False)
 
@@ -35,6 +41,203 @@ try:
 except Exception:
     pass  # Fall back to system PATH
 
+# OCR result cache: the same crops (year, goal, criteria, mood labels) are read turn after turn
+OCR_CACHE_CONFIG = config.get("ocr_cache", {})
+OCR_CACHE_ENABLED = OCR_CACHE_CONFIG.get("enabled", True)
+OCR_CACHE_MAX_ENTRIES = OCR_CACHE_CONFIG.get("max_entries", 512)
+OCR_CACHE_NEAR_DUPLICATES = OCR_CACHE_CONFIG.get("near_duplicates", False)
+OCR_CACHE_HAMMING_THRESHOLD = OCR_CACHE_CONFIG.get("hamming_threshold", 8)
+DHASH_SIZE = 16  # 256-bit difference hash for the near-duplicate tier
+
+_ocr_cache = OrderedDict()
+_ocr_cache_lock = threading.Lock()  # Training scan OCRs from worker threads
+_ocr_cache_stats = {"hits": 0, "near_hits": 0, "misses": 0}
+
+def _ocr_input(img):
+    """Return the image as the numpy array Tesseract will see"""
+    if isinstance(img, Image.Image):
+        return np.array(img)
+    return np.ascontiguousarray(img)
+
+def _dhash(img_np):
+    """Difference hash of a crop, used to find near-duplicate crops"""
+    gray = img_np
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGBA2GRAY if gray.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+def _cached_ocr(kind, img, config, lang, compute):
+    """Look up an OCR result by crop content and OCR settings, running `compute` on a miss"""
+    img_np = _ocr_input(img)
+    if not OCR_CACHE_ENABLED:
+        return compute(img_np)
+
+    group = (kind, config, lang, img_np.shape, str(img_np.dtype))
+    digest = hashlib.blake2b(repr(group).encode("utf-8"), digest_size=16)
+    digest.update(img_np.tobytes())
+    key = digest.hexdigest()
+    dhash = _dhash(img_np) if OCR_CACHE_NEAR_DUPLICATES else None
+
+    with _ocr_cache_lock:
+        entry = _ocr_cache.get(key)
+        if entry is not None:
+            _ocr_cache.move_to_end(key)
+            _ocr_cache_stats["hits"] += 1
+            return entry["result"]
+
+        if dhash is not None:
+            for near_key, near_entry in reversed(_ocr_cache.items()):
+                if near_entry["group"] != group or near_entry["dhash"] is None:
+                    continue
+                if bin(near_entry["dhash"] ^ dhash).count("1") <= OCR_CACHE_HAMMING_THRESHOLD:
+                    _ocr_cache.move_to_end(near_key)
+                    _ocr_cache_stats["near_hits"] += 1
+                    return near_entry["result"]
+
+        _ocr_cache_stats["misses"] += 1
+
+    result = compute(img_np)
+
+    with _ocr_cache_lock:
+        _ocr_cache[key] = {"group": group, "dhash": dhash, "result": result}
+        _ocr_cache.move_to_end(key)
+        while len(_ocr_cache) > OCR_CACHE_MAX_ENTRIES:
+            _ocr_cache.popitem(last=False)
+    return result
+
+def cached_image_to_string(img, config='', lang=None) -> str:
+    """pytesseract.image_to_string through the OCR cache"""
+    text = _cached_ocr("string", img, config, lang,
+                       lambda img_np: pytesseract.image_to_string(img_np, config=config, lang=lang))
+    record_ocr(text, config, np.shape(img))
+    return text
+
+def cached_image_to_data(img, config='', lang=None) -> dict:
+    """pytesseract.image_to_data (dict output) through the OCR cache"""
+    data = _cached_ocr("data", img, config, lang,
+                       lambda img_np: pytesseract.image_to_data(img_np, config=config, lang=lang, output_type=pytesseract.Output.DICT))
+    # Callers get their own lists so a cached result can't be modified
+    return {field: list(values) for field, values in data.items()}
+
+def get_ocr_cache_stats() -> dict:
+    """Hit/miss counters of the OCR cache"""
+    with _ocr_cache_lock:
+        stats = dict(_ocr_cache_stats)
+        stats["entries"] = len(_ocr_cache)
+    lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits"] + stats["near_hits"]) / lookups, 3) if lookups else 0.0
+    return stats
+
+def clear_ocr_cache():
+    """Drop all cached OCR results and reset the counters"""
+    with _ocr_cache_lock:
+        _ocr_cache.clear()
+        for counter in _ocr_cache_stats:
+            _ocr_cache_stats[counter] = 0
+
+# OCR mosaics: small crops stacked into one image and read with a single Tesseract call
+MOSAIC_SEPARATOR_HEIGHT = 24  # Blank rows between two crops
+MOSAIC_MARGIN = 16
+# Single line/word modes can't read a stack of crops, they are read as a uniform block instead
+MOSAIC_PSM = {"7": "6", "8": "6", "13": "6", "3": "6"}
+
+def _mosaic_tile(img):
+    """Grayscale tile with dark text on a light background"""
+    img_np = _ocr_input(img)
+    if img_np.ndim == 3:
+        img_np = cv2.cvtColor(img_np, cv2.COLOR_RGBA2GRAY if img_np.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    img_np = img_np.astype(np.uint8)
+    if np.median(img_np) < 128:
+        img_np = 255 - img_np
+    return img_np
+
+def build_ocr_mosaic(images):
+    """
+    Stack crops into one white image with blank separator rows.
+    Returns:
+        tuple: (mosaic, bands) - grayscale numpy image and the (top, bottom) rows of each crop
+    """
+    tiles = [_mosaic_tile(img) for img in images]
+    width = max(tile.shape[1] for tile in tiles) + 2 * MOSAIC_MARGIN
+    height = sum(tile.shape[0] for tile in tiles) + MOSAIC_SEPARATOR_HEIGHT * (len(tiles) - 1) + 2 * MOSAIC_MARGIN
+    mosaic = np.full((height, width), 255, dtype=np.uint8)
+    bands = []
+    top = MOSAIC_MARGIN
+    for tile in tiles:
+        tile_height, tile_width = tile.shape
+        mosaic[top:top + tile_height, MOSAIC_MARGIN:MOSAIC_MARGIN + tile_width] = tile
+        bands.append((top, top + tile_height))
+        top += tile_height + MOSAIC_SEPARATOR_HEIGHT
+    return mosaic, bands
+
+def _mosaic_config(config):
+    """Tesseract config for a mosaic of crops that would be read with `config` one by one"""
+    match = re.search(r"--psm\s+(\d+)", config)
+    if match is None:
+        return f"{config} --psm 6".strip()
+    psm = MOSAIC_PSM.get(match.group(1), match.group(1))
+    return config[:match.start(1)] + psm + config[match.end(1):]
+
+def ocr_mosaic(images, config='', lang=None):
+    """
+    Read many small crops with one image_to_data call.
+    Words are assigned to the crop whose band contains their vertical center and
+    joined per line (lines by position, words left to right).
+    Returns:
+        list: Text per image, '' when nothing was read
+    """
+    if not images:
+        return []
+    mosaic, bands = build_ocr_mosaic(images)
+    data = cached_image_to_data(mosaic, config=_mosaic_config(config), lang=lang)
+
+    lines = [{} for _ in images]
+    half_gap = MOSAIC_SEPARATOR_HEIGHT / 2
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        center = data["top"][i] + data["height"][i] / 2
+        for index, (top, bottom) in enumerate(bands):
+            if top - half_gap <= center < bottom + half_gap:
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                lines[index].setdefault(key, []).append((data["top"][i], data["left"][i], word))
+                break
+
+    texts = []
+    for crop_lines in lines:
+        ordered = sorted(crop_lines.values(), key=lambda words: min(word[0] for word in words))
+        texts.append("\n".join(" ".join(word[2] for word in sorted(words, key=lambda word: word[1])) for words in ordered))
+    debug_print(f"[DEBUG] OCR mosaic: {len(images)} crops in one call")
+    return texts
+
+def batch_image_to_string(items, lang=None):
+    """
+    OCR many crops with as few Tesseract calls as possible.
+    Crops sharing a config are read together in one mosaic, a crop with a
+    config of its own is read on its own.
+    Args:
+        items: List of (image, config) tuples, config as for a single crop
+    Returns:
+        list: Text per item, in input order
+    """
+    groups = OrderedDict()
+    for index, (img, config) in enumerate(items):
+        groups.setdefault(config, []).append(index)
+    texts = [""] * len(items)
+    for config, indexes in groups.items():
+        if len(indexes) == 1:
+            # Nothing to batch, read the crop with its own config
+            texts[indexes[0]] = cached_image_to_string(items[indexes[0]][0], config=config, lang=lang)
+            continue
+        results = ocr_mosaic([items[i][0] for i in indexes], config=config, lang=lang)
+        for i, text in zip(indexes, results):
+            texts[i] = text
+            record_ocr(text, config, np.shape(items[i][0]))
+    return texts
+
 def extract_text(pil_img: Image.Image) -> str:
     """Extract text from image using Tesseract OCR"""
     try:
@@ -46,7 +249,7 @@ def extract_text(pil_img: Image.Image) -> str:
             
         # Use Tesseract with custom configuration for better accuracy
         config = '--oem 3 --psm 6 -c tessedit_char_whitelist="ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789%().- "'
-        text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+        text = cached_image_to_string(img_np, config=config, lang='eng')
         return text.strip()
     except Exception as e:
         print(f"[WARNING] OCR extraction failed: {e}")
@@ -63,7 +266,7 @@ def extract_number(pil_img: Image.Image) -> str:
             
         # Use Tesseract with configuration optimized for numbers
         config = '--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789 '
-        text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+        text = cached_image_to_string(img_np, config=config, lang='eng')
         return text.strip()
     except Exception as e:
         print(f"[WARNING] Number extraction failed: {e}")
@@ -86,14 +289,14 @@ def extract_turn_number(pil_img: Image.Image) -> str:
         ]
         
         for config in configs:
-            text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+            text = cached_image_to_string(img_np, config=config, lang='eng')
             text = text.strip()
             if text and text.isdigit():
                 return text
         
         # If no config worked, return the first non-empty result
         for config in configs:
-            text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+            text = cached_image_to_string(img_np, config=config, lang='eng')
             text = text.strip()
             if text:
                 return text
@@ -120,7 +323,7 @@ def extract_mood_text(pil_img: Image.Image) -> str:
         ]
         
         for config in configs:
-            text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+            text = cached_image_to_string(img_np, config=config, lang='eng')
             text = text.strip()
             if text:
                 return text
@@ -148,7 +351,7 @@ def extract_failure_text(pil_img: Image.Image) -> str:
         ]
         
         for config in configs:
-            text = pytesseract.image_to_string(img_np, config=config, lang='eng')
+            text = cached_image_to_string(img_np, config=config, lang='eng')
             text = text.strip()
             if text:
                 return text
@@ -169,7 +372,7 @@ def extract_failure_text_with_confidence(pil_img: Image.Image) -> tuple[str, flo
             
         # Use Tesseract with data output to get confidence scores
         config = '--oem 3 --psm 6 -c tessedit_char_whitelist="ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789%(). "'
-        ocr_data = pytesseract.image_to_data(img_np, config=config, lang='eng', output_type=pytesseract.Output.DICT)
+        ocr_data = cached_image_to_data(img_np, config=config, lang='eng')
         
         # Extract text and calculate average confidence
         text_parts = []
@@ -230,7 +433,7 @@ def extract_event_name_text(pil_img: Image.Image) -> str:
         try:
             cfg_simple = "-c tessedit_char_whitelist=\"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz1234567890'!,♪☆():.-?!\" -c preserve_interword_spaces=1 -c user_defined_dpi=300"
             debug_print(f"[DEBUG] Simple OCR cfg: {cfg_simple}")
-            simple_text = pytesseract.image_to_string(enhanced_gray, config=cfg_simple, lang='eng')
+            simple_text = cached_image_to_string(enhanced_gray, config=cfg_simple, lang='eng')
             simple_text = (simple_text or "").strip()
             debug_print(f"[DEBUG] Simple OCR raw: '{simple_text}'")
             # Optionally save enhanced image for debugging
@@ -271,7 +474,7 @@ def extract_event_name_text(pil_img: Image.Image) -> str:
         for config in configs:
             try:
                 debug_print(f"[DEBUG] Tesseract config: {config}")
-                data = pytesseract.image_to_data(img_np_proc, config=config, lang='eng', output_type=pytesseract.Output.DICT)
+                data = cached_image_to_data(img_np_proc, config=config, lang='eng')
             except Exception as ocr_e:
                 print(f"[WARNING] image_to_data failed for config: {config}. Error: {ocr_e}")
                 continue
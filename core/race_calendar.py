@@ -0,0 +1,129 @@
+"""Bundled race calendar.
+
+assets/races/race_calendar.json lists the races (grade, surface, distance)
+and the calendar labels they are held on ("Classic Year Late Oct"), the same
+labels check_current_year reads from the lobby. The lobby looks up the
+current date here before opening the race menu, so turns without a suitable
+race skip the race list round trip.
+"""
+import json
+import os
+
+from core.career_state import CALENDAR_YEARS, CALENDAR_MONTHS
+from utils.config_file import CONFIG_FILE
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+CALENDAR_CONFIG = config.get("race_calendar", {})
+CALENDAR_ENABLED = CALENDAR_CONFIG.get("enabled", True)
+CALENDAR_PATH = CALENDAR_CONFIG.get("path", "assets/races/race_calendar.json")
+
+SURFACES = ("turf", "dirt")
+DISTANCES = ("short", "mile", "medium", "long")
+
+# Upper bound (meters) of each distance category, anything longer is "long"
+DISTANCE_LIMITS = (("short", 1400), ("mile", 1800), ("medium", 2400))
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+def distance_category(distance):
+    """Distance category of a race length in meters (1600 -> "mile")"""
+    for category, limit in DISTANCE_LIMITS:
+        if distance <= limit:
+            return category
+    return "long"
+
+def calendar_label(year):
+    """Normalized calendar label of an OCR'd year ("Classic  Year Late Oct"), or None
+    if it isn't a race calendar date (Pre-Debut, Finale Season, unreadable text)."""
+    parts = year.split() if isinstance(year, str) else []
+    if len(parts) != 4 or parts[2] not in ("Early", "Late") or parts[3] not in CALENDAR_MONTHS:
+        return None
+    year_name = f"{parts[0]} {parts[1]}"
+    if year_name not in CALENDAR_YEARS:
+        return None
+    return f"{year_name} {parts[2]} {parts[3]}"
+
+class RaceCalendar:
+    """Races indexed by calendar label"""
+
+    def __init__(self, races=()):
+        self.by_date = {}
+        for race in races:
+            race = dict(race)
+            race["category"] = distance_category(race["distance"])
+            for date in race.get("dates", []):
+                self.by_date.setdefault(date, []).append(race)
+
+    def races_on(self, year, grade=None):
+        """Races held on an OCR'd calendar date, optionally of one grade.
+
+        Returns:
+            list: race dicts (name, grade, surface, distance, category), or None
+            when the date isn't a calendar date and the calendar can't tell
+        """
+        label = calendar_label(year)
+        if label is None:
+            return None
+        races = self.by_date.get(label, [])
+        if grade is not None:
+            races = [race for race in races if race["grade"] == grade]
+        return races
+
+    def suitable_races(self, year, surfaces=SURFACES, distances=DISTANCES, grade="G1"):
+        """Races on a date that match the trainee's surfaces and distances, None when unknown"""
+        races = self.races_on(year, grade)
+        if races is None:
+            return None
+        return [race for race in races if race["surface"] in surfaces and race["category"] in distances]
+
+def load_race_calendar(path=CALENDAR_PATH):
+    """Calendar from the bundled data file, None if it can't be loaded"""
+    if not os.path.exists(path):
+        print(f"[WARNING] Race calendar {path} not found")
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            calendar = RaceCalendar(json.load(f).get("races", []))
+        debug_print(f"[DEBUG] Loaded race calendar with {len(calendar.by_date)} race dates")
+        return calendar
+    except Exception as e:
+        print(f"[WARNING] Could not load race calendar from {path}: {e}")
+        return None
+
+_calendar = None
+
+def get_race_calendar():
+    """Shared calendar instance, None when disabled in config or unreadable"""
+    global _calendar
+    if not CALENDAR_ENABLED:
+        return None
+    if _calendar is None:
+        _calendar = load_race_calendar()
+    return _calendar
+
+def has_suitable_race(year, grade="G1"):
+    """
+    Whether the race menu can have a suitable race on this date.
+
+    Uses the trainee's surfaces and distances from the race_calendar config.
+    Returns True whenever the calendar can't tell (disabled, missing file,
+    unreadable date), so the caller falls back to opening the race menu.
+    """
+    calendar = get_race_calendar()
+    if calendar is None:
+        return True
+    surfaces = CALENDAR_CONFIG.get("surfaces", list(SURFACES))
+    distances = CALENDAR_CONFIG.get("distances", list(DISTANCES))
+    races = calendar.suitable_races(year, surfaces, distances, grade)
+    if races is None:
+        debug_print(f"[DEBUG] '{year}' is not a race calendar date, checking the race menu")
+        return True
+    debug_print(f"[DEBUG] Race calendar for '{year}': {[race['name'] for race in races]}")
+    return bool(races)
@@ -0,0 +1,167 @@
+"""Race flow state machine.
+
+Drives the screens from the paddock to the lobby with one multi-template
+waiter (one screenshot per poll, every template of the current state matched
+on it). Skip and speed controls are tapped as soon as they show up and each
+screen is left the moment the next one is detected, instead of waiting out
+fixed sleeps between button searches.
+
+    paddock  -> view results (or skip a watched race) -> results
+    results  -> next -> next2 -> done
+             -> lobby or event dialog (results already left) -> done
+"""
+import json
+
+from utils.adb_recognizer import wait_for_any_image
+from utils.adb_input import tap, triple_click
+from utils.config_file import CONFIG_FILE
+from utils import clock
+
+# Load config and check debug mode
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
+    config = json.load(config_file)
+    DEBUG_MODE = config.get("debug_mode", False)
+
+PADDOCK_TIMEOUT = 20  # Same wait the view results search had
+RESULTS_TIMEOUT = 30
+NUDGE_AFTER = 1.5  # Tap the screen when nothing is detected for this long
+NUDGE_POSITION = (540, 960)
+MAX_NUDGES = 3  # Blind taps per finish(), more could pick an event choice
+TAP_COOLDOWN = 0.6  # A tapped control is ignored this long while its screen changes
+
+# (name, template, confidence, region), first match in this order wins
+SKIP_TEMPLATES = [
+    ("skip", "assets/buttons/skip_btn.png", 0.8, None),
+    ("skip_x1", "assets/buttons/skip_x1.png", 0.8, None),
+    ("skip_off", "assets/buttons/skip_off.png", 0.8, None),
+]
+PADDOCK_TEMPLATES = [
+    ("view_results", "assets/buttons/view_results.png", 0.8, None),
+    ("next", "assets/buttons/next_btn.png", 0.7, None),
+] + SKIP_TEMPLATES
+RESULTS_TEMPLATES = [
+    ("failed", "assets/icons/clock.png", 0.8, None),
+    ("next2", "assets/buttons/next2_btn.png", 0.7, None),
+    ("next", "assets/buttons/next_btn.png", 0.7, None),
+    # Screens after the results: stop here, the career loop handles them
+    ("event", "assets/icons/event_choice_1.png", 0.45, (6, 450, 126, 1776)),
+    ("lobby", "assets/ui/tazuna_hint.png", 0.8, None),
+] + SKIP_TEMPLATES
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+class RaceFlow:
+    """
+    One race from the paddock to the lobby.
+
+    Args:
+        check_strategy: Called once on the paddock before the race starts
+        on_failed: Called when the failed race screen (clock icon) shows up,
+                   returns True if the race was retried
+    """
+
+    def __init__(self, check_strategy=None, on_failed=None):
+        self.check_strategy = check_strategy
+        self.on_failed = on_failed
+        self.state = "paddock"
+        self.cooldowns = {}
+
+    def _wait(self, templates, timeout):
+        """Wait for a template of the current state, skipping controls tapped a moment ago"""
+        now = clock.time()
+        active = [template for template in templates if self.cooldowns.get(template[0], 0) <= now]
+        return wait_for_any_image(active, timeout=timeout)
+
+    def _tap(self, name, position):
+        debug_print(f"[DEBUG] Race flow ({self.state}): tapping {name} at {position}")
+        tap(position[0], position[1])
+        self.cooldowns[name] = clock.time() + TAP_COOLDOWN
+
+    def prepare(self, timeout=PADDOCK_TIMEOUT):
+        """
+        Start the race from the paddock and get to its results.
+
+        Returns:
+            bool: True once the results are showing (or being skipped to)
+        """
+        self.state = "paddock"
+        strategy_checked = False
+        deadline = clock.time() + timeout
+        while clock.time() < deadline:
+            name, position, _ = self._wait(PADDOCK_TEMPLATES, deadline - clock.time())
+            if name is None:
+                break
+            if name == "view_results":
+                if self.check_strategy and not strategy_checked:
+                    strategy_checked = True
+                    if not self.check_strategy():
+                        debug_print("[DEBUG] Failed to ensure correct strategy, proceeding anyway...")
+                    # The strategy check may have changed the screen, locate the button again
+                    continue
+                debug_print(f"[DEBUG] Found view results button at {position}")
+                self._tap(name, position)
+                clock.sleep(0.5)
+                # Tap through the placing animation
+                triple_click(position[0], position[1], interval=0.01)
+                self.state = "results"
+                debug_print("[DEBUG] Race preparation complete")
+                return True
+            if name == "next":
+                self.state = "results"
+                return True
+            # Skip button, or the skip toggle (skip_off -> skip_x1 -> skip_x2, one step per tap)
+            self._tap(name, position)
+
+        if self.check_strategy and not strategy_checked:
+            if not self.check_strategy():
+                debug_print("[DEBUG] Failed to ensure correct strategy, proceeding anyway...")
+        debug_print("[DEBUG] View results button not found")
+        return False
+
+    def finish(self, timeout=RESULTS_TIMEOUT):
+        """
+        Leave the result screens (next, next2), skipping any cutscene on the way.
+        The middle of the screen is tapped at most MAX_NUDGES times when nothing
+        is detected.
+
+        Returns:
+            bool: True when the last result screen was left
+        """
+        self.state = "results"
+        deadline = clock.time() + timeout
+        nudges = 0
+        while clock.time() < deadline:
+            name, position, _ = self._wait(RESULTS_TEMPLATES, min(NUDGE_AFTER, deadline - clock.time()))
+            if name is None:
+                if nudges < MAX_NUDGES:
+                    debug_print("[DEBUG] No race screen detected, tapping middle of screen")
+                    tap(*NUDGE_POSITION)
+                    nudges += 1
+                continue
+            if name in ("event", "lobby"):
+                # Results ended on another screen, leave it to the career loop
+                debug_print(f"[DEBUG] Race results left, now on {name} screen")
+                self.state = "done"
+                return True
+            if name == "failed":
+                if self.on_failed and self.on_failed():
+                    # Retried race is back on its results
+                    deadline = clock.time() + timeout
+                    continue
+                return False
+            if name == "next":
+                self._tap(name, position)
+                self.state = "next"
+                continue
+            if name == "next2":
+                self._tap(name, position)
+                self.state = "done"
+                debug_print("[DEBUG] Post-race actions complete")
+                return True
+            self._tap(name, position)
+
+        print("[WARNING] Race result screens not finished before timeout")
+        return False
@@ -7,6 +7,7 @@ from core.ocr import extract_text, extract_number, extract_turn_number, extract_
 from core.recognizer import match_template
 
 from utils.constants import SUPPORT_CARD_ICON_REGION, MOOD_REGION, TURN_REGION, FAILURE_REGION, YEAR_REGION, MOOD_LIST, CRITERIA_REGION
+from utils.config_file import CONFIG_FILE
 
 # Get Stat
 def stat_state():
@@ -381,7 +382,7 @@ def check_skill_points_cap():
   from pymsgbox import confirm
   
   # Load config
-  with open("config.json", "r", encoding="utf-8") as file:
+  with open(CONFIG_FILE, "r", encoding="utf-8") as file:
     config = json.load(file)
   
   skill_point_cap = config.get("skill_point_cap", 100)
@@ -1,24 +1,26 @@
 import re
-import time
 import json
 import os
 
 from PIL import Image, ImageEnhance
 from utils.adb_screenshot import capture_region, enhanced_screenshot, enhanced_screenshot_for_failure, enhanced_screenshot_for_year, take_screenshot
-from core.ocr import extract_text, extract_number, extract_turn_number, extract_mood_text, extract_failure_text, extract_failure_text_with_confidence
+from core.ocr import cached_image_to_string, cached_image_to_data, batch_image_to_string, extract_text, extract_number, extract_turn_number, extract_mood_text, extract_failure_text, extract_failure_text_with_confidence
 from utils.adb_recognizer import match_template
 from utils.skill_auto_purchase import execute_skill_purchases, click_image_button, extract_skill_points
 from utils.skill_recognizer import scan_all_skills_with_scroll
-from utils.skill_purchase_optimizer import load_skill_config, create_purchase_plan, filter_affordable_skills
+from utils.skill_lexicon import get_skill_lexicon
+from utils.skill_purchase_optimizer import load_skill_config, create_purchase_plan, filter_affordable_skills, create_purchase_candidates, optimize_skill_purchases
 
 from utils.constants_phone import (
     SUPPORT_CARD_ICON_REGION, MOOD_REGION, TURN_REGION, FAILURE_REGION, YEAR_REGION, 
     MOOD_LIST, CRITERIA_REGION, SPD_REGION, STA_REGION, PWR_REGION, GUTS_REGION, WIT_REGION,
-    SKILL_PTS_REGION, FAILURE_REGION_SPD, FAILURE_REGION_STA, FAILURE_REGION_PWR, FAILURE_REGION_GUTS, FAILURE_REGION_WIT
+    SKILL_PTS_REGION, GOAL_REGION, ENERGY_BAR_REGION, FAILURE_REGION_SPD, FAILURE_REGION_STA, FAILURE_REGION_PWR, FAILURE_REGION_GUTS, FAILURE_REGION_WIT
 )
+from utils.config_file import CONFIG_FILE
+from utils import clock
 
 # Load config and check debug mode
-with open("config.json", "r", encoding="utf-8") as config_file:
+with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
     config = json.load(config_file)
     DEBUG_MODE = config.get("debug_mode", False)
 
@@ -159,15 +161,15 @@ def check_hint(screenshot=None, template_path: str = "assets/icons/hint.png", co
         debug_print(f"[DEBUG] check_hint failed: {e}")
         return False
 
-def _check_failure_single_pass(train_type: str) -> tuple[int, float]:
+def _check_failure_single_pass(train_type: str, screenshot=None) -> tuple[int, float]:
     """
     Performs a single full pass of OCR logic (white and yellow text) to find the failure rate.
     This is the internal helper for the main check_failure function.
+    Both passes read from `screenshot` when given, otherwise each captures a fresh frame.
     """
     from utils.constants_phone import FAILURE_REGION_SPD, FAILURE_REGION_STA, FAILURE_REGION_PWR, FAILURE_REGION_GUTS, FAILURE_REGION_WIT
     from utils.adb_screenshot import enhanced_screenshot, take_screenshot
     import numpy as np
-    import pytesseract
     import re
     from PIL import ImageEnhance
 
@@ -180,11 +182,11 @@ def _check_failure_single_pass(train_type: str) -> tuple[int, float]:
 
     # Step 1: Try white-specialized OCR
     debug_print(f"[DEBUG] White OCR pass for {train_type.upper()}")
-    img = enhanced_screenshot(region)
+    img = enhanced_screenshot(region, screenshot)
     if DEBUG_MODE:
         img.save(f"debug_failure_{train_type}_white.png")
     
-    ocr_data = pytesseract.image_to_data(np.array(img), config='--oem 3 --psm 6', output_type=pytesseract.Output.DICT)
+    ocr_data = cached_image_to_data(np.array(img), config='--oem 3 --psm 6')
     text = ' '.join(ocr_data['text']).strip()
     debug_print(f"[DEBUG] White OCR result: '{text}'")
     
@@ -202,7 +204,7 @@ def _check_failure_single_pass(train_type: str) -> tuple[int, float]:
 
     # Step 2: Try yellow threshold OCR
     debug_print(f"[DEBUG] Yellow OCR pass for {train_type.upper()}")
-    raw_img = take_screenshot().crop(region)
+    raw_img = (screenshot if screenshot is not None else take_screenshot()).crop(region)
     raw_img = raw_img.resize((raw_img.width * 2, raw_img.height * 2), Image.BICUBIC)
     raw_img = raw_img.convert("RGB")
     raw_np = np.array(raw_img)
@@ -216,7 +218,7 @@ def _check_failure_single_pass(train_type: str) -> tuple[int, float]:
     if DEBUG_MODE:
         yellow_img.save(f"debug_failure_{train_type}_yellow.png")
     
-    ocr_data = pytesseract.image_to_data(np.array(yellow_img), config='--oem 3 --psm 6', output_type=pytesseract.Output.DICT)
+    ocr_data = cached_image_to_data(np.array(yellow_img), config='--oem 3 --psm 6')
     text = ' '.join(ocr_data['text']).strip()
     debug_print(f"[DEBUG] Yellow OCR result: '{text}'")
     
@@ -235,15 +237,21 @@ def _check_failure_single_pass(train_type: str) -> tuple[int, float]:
     # If no confident match was found in this pass
     return (100, 0.0)
 
-def check_failure(train_type: str) -> tuple[int, float]:
+def check_failure(train_type: str, screenshot=None) -> tuple[int, float]:
     """
     Check failure rate for a training type, with retries on low confidence.
     Args:
         train_type (str): One of 'spd', 'sta', 'pwr', 'guts', 'wit'
+        screenshot: Optional frame to read from. Retrying the same frame cannot
+            change the result, so a single pass is made and a 0.0 confidence is
+            returned for the caller to re-check live.
     Returns:
         tuple[int, float]: The failure rate and the OCR confidence.
     """
     debug_print(f"[DEBUG] ===== STARTING FAILURE DETECTION for {train_type.upper()} =====")
+    if screenshot is not None:
+        return _check_failure_single_pass(train_type, screenshot)
+
     max_retries = 5
     for i in range(max_retries):
         rate, confidence = _check_failure_single_pass(train_type)
@@ -255,7 +263,7 @@ def check_failure(train_type: str) -> tuple[int, float]:
         # If confidence is 0.0, log and retry if we have attempts left.
         if i < max_retries - 1:
             print(f"[INFO] OCR for {train_type.upper()} failure rate failed (confidence 0.0). Retrying... ({i+1}/{max_retries-1})")
-            time.sleep(0.2) # Small delay before retrying
+            clock.sleep(0.2) # Small delay before retrying
 
     # If all retries fail, return the safe fallback.
     print(f"[WARNING] All {max_retries} OCR attempts for {train_type.upper()} failure rate failed. Defaulting to 100%.")
@@ -313,12 +321,13 @@ def fuzzy_match_mood(text):
     debug_print(f"[DEBUG] No fuzzy match found for: '{text}'")
     return "UNKNOWN"
 
-def check_mood():
+def check_mood(screenshot=None):
     # Try up to 3 times to detect mood
     max_attempts = 3
     
     for attempt in range(1, max_attempts + 1):
-        mood_img = enhanced_screenshot(MOOD_REGION)
+        # Only the first attempt can use the given frame, retries need a fresh one
+        mood_img = enhanced_screenshot(MOOD_REGION, screenshot if attempt == 1 else None)
         mood_text = extract_mood_text(mood_img)
         
         # Apply fuzzy matching for mood detection
@@ -334,17 +343,17 @@ def check_mood():
         
         if attempt < max_attempts:
             print(f"{attempt}). Retrying...")
-            time.sleep(0.5)
+            clock.sleep(0.5)
     
     print(f"[WARNING] Mood not recognized after {max_attempts} attempts: {mood_text}")
     return "UNKNOWN"
 
-def check_turn():
+def check_turn(screenshot=None):
     """Fast turn detection with minimal OCR"""
     debug_print("[DEBUG] Starting turn detection...")
     
     try:
-        turn_img = enhanced_screenshot(TURN_REGION)
+        turn_img = enhanced_screenshot(TURN_REGION, screenshot)
         debug_print(f"[DEBUG] Turn region screenshot taken: {TURN_REGION}")
         
         # Save the turn region image for debugging
@@ -367,7 +376,6 @@ def check_turn():
         debug_print("[DEBUG] Saved enhanced turn image to debug_turn_enhanced.png")
         
         # Use the best method found in testing: basic processing + PSM 7
-        import pytesseract
         import re
         
         # Apply basic grayscale processing (like test_turn_basic_grayscale)
@@ -375,7 +383,7 @@ def check_turn():
         turn_img = turn_img.resize((turn_img.width * 2, turn_img.height * 2), Image.BICUBIC)
         
         # Use PSM 7 (single line) which had 94% confidence in testing
-        turn_text = pytesseract.image_to_string(turn_img, config='--oem 3 --psm 7').strip()
+        turn_text = cached_image_to_string(turn_img, config='--oem 3 --psm 7').strip()
         debug_print(f"[DEBUG] Turn OCR raw result: '{turn_text}'")
         
         # Check for "Race Day" first (before character replacements that would corrupt it)
@@ -402,13 +410,12 @@ def check_turn():
         debug_print(f"[DEBUG] Turn detection failed with error: {e}")
         return 1
 
-def check_current_year():
+def check_current_year(screenshot=None):
     """Fast year detection using regular screenshot"""
-    year_img = enhanced_screenshot(YEAR_REGION)
+    year_img = enhanced_screenshot(YEAR_REGION, screenshot)
     
     # Simple OCR with PSM 7 (single line text)
-    import pytesseract
-    text = pytesseract.image_to_string(year_img, config='--oem 3 --psm 7').strip()
+    text = cached_image_to_string(year_img, config='--oem 3 --psm 7').strip()
     
     if text:
         debug_print(f"[DEBUG] Year OCR result: '{text}'")
@@ -416,13 +423,12 @@ def check_current_year():
     
     return "Unknown Year"
 
-def check_criteria():
+def check_criteria(screenshot=None):
     """Enhanced criteria detection"""
-    criteria_img = enhanced_screenshot(CRITERIA_REGION)
+    criteria_img = enhanced_screenshot(CRITERIA_REGION, screenshot)
     
     # Use single, fast OCR configuration
-    import pytesseract
-    text = pytesseract.image_to_string(criteria_img, config='--oem 3 --psm 7').strip()
+    text = cached_image_to_string(criteria_img, config='--oem 3 --psm 7').strip()
     
     if text:
         # Apply common OCR corrections
@@ -443,23 +449,20 @@ def check_criteria():
     
     return text
 
-def check_goal_name():
+def check_goal_name(screenshot=None):
     """Detect the current goal name using simple Tesseract OCR.
 
-    Captures the region (372, 113, 912, 152) and returns the recognized
-    goal name as a string. Mirrors the lightweight OCR approach used in
-    check_criteria (PSM 7, single line) with a single fallback to the
-    shared extract_text helper.
+    Captures GOAL_REGION and returns the recognized goal name as a string.
+    Mirrors the lightweight OCR approach used in check_criteria (PSM 7,
+    single line) with a single fallback to the shared extract_text helper.
     """
-    GOAL_REGION = (372, 113, 912, 152)
-
     # Capture enhanced image of the goal name region for better OCR
-    goal_img = enhanced_screenshot(GOAL_REGION)
+    goal_img = enhanced_screenshot(GOAL_REGION, screenshot)
 
     # Save debug images if enabled
     if DEBUG_MODE:
         try:
-            raw_img = capture_region(GOAL_REGION)
+            raw_img = screenshot.crop(GOAL_REGION) if screenshot is not None else capture_region(GOAL_REGION)
             raw_img.save("debug_goal_region_raw.png")
         except Exception:
             pass
@@ -469,8 +472,7 @@ def check_goal_name():
             pass
 
     # Primary OCR path: single line recognition
-    import pytesseract
-    text = pytesseract.image_to_string(goal_img, config='--oem 3 --psm 7').strip()
+    text = cached_image_to_string(goal_img, config='--oem 3 --psm 7').strip()
 
     if not text:
         # Fallback once to the shared OCR helper
@@ -484,13 +486,13 @@ def check_goal_name():
 
     return text
 
-def check_goal_name_with_g1_requirement():
+def check_goal_name_with_g1_requirement(screenshot=None):
     """Detect the current goal name and check if it requires G1 races.
     
     Returns:
         dict: Dictionary with goal name text and G1 race requirement flag
     """
-    goal_name = check_goal_name()
+    goal_name = check_goal_name(screenshot)
     
     # Check if goal name contains G1 race requirements
     requires_g1_races = False
@@ -542,7 +544,7 @@ def check_skill_points_cap():
     
     # Load config
     try:
-        with open("config.json", "r", encoding="utf-8") as file:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as file:
             config = json.load(file)
     except Exception as e:
         print(f"Error loading config: {e}")
@@ -566,21 +568,24 @@ def check_skill_points_cap():
                 if not entered:
                     print("[ERROR] Could not find/open skills screen")
                     return True
-                time.sleep(2.0)
+                clock.sleep(2.0)
 
                 # 2) Scan skills and prepare purchase plan
-                scan_result = scan_all_skills_with_scroll()
+                skill_file = config.get("skill_file", "skills.json")
+                print(f"[INFO] Loading skills from: {skill_file}")
+                cfg = load_skill_config(skill_file)
+                scan_result = scan_all_skills_with_scroll(lexicon=get_skill_lexicon(cfg))
                 if 'error' in scan_result:
                     print(f"[ERROR] Skill scanning failed: {scan_result['error']}")
                     # Attempt to go back anyway
                     click_image_button("assets/buttons/back_btn.png", "back button", max_attempts=5)
-                    time.sleep(1.5)
+                    clock.sleep(1.5)
                     return True
                 all_skills = scan_result.get('all_skills', [])
                 if not all_skills:
                     print("[WARNING] No skills detected on skill screen")
                     click_image_button("assets/buttons/back_btn.png", "back button", max_attempts=5)
-                    time.sleep(1.5)
+                    clock.sleep(1.5)
                     return True
 
                 # Read current available skill points from the skill screen
@@ -588,31 +593,34 @@ def check_skill_points_cap():
                 print(f"[INFO] Detected available skill points: {available_points}")
 
                 # Build purchase plan from config priorities
-                skill_file = config.get("skill_file", "skills.json")
-                print(f"[INFO] Loading skills from: {skill_file}")
-                cfg = load_skill_config(skill_file)
                 purchase_plan = create_purchase_plan(all_skills, cfg)
                 if not purchase_plan:
                     print("[INFO] No skills from priority list are currently available")
                     click_image_button("assets/buttons/back_btn.png", "back button", max_attempts=5)
-                    time.sleep(1.5)
+                    clock.sleep(1.5)
                     return True
 
                 # Filter by budget if we have points
                 final_plan = purchase_plan
                 if isinstance(available_points, int) and available_points > 0:
-                    affordable_skills, total_cost, remaining_points = filter_affordable_skills(purchase_plan, available_points)
+                    if config.get("skill_purchase_strategy", "knapsack") == "knapsack":
+                        # Best total value within the budget
+                        candidate_groups = create_purchase_candidates(all_skills, cfg)
+                        affordable_skills, total_cost, remaining_points = optimize_skill_purchases(candidate_groups, available_points)
+                    else:
+                        # Priority order, skipping what doesn't fit
+                        affordable_skills, total_cost, remaining_points = filter_affordable_skills(purchase_plan, available_points)
                     final_plan = affordable_skills if affordable_skills else []
                     print(f"[INFO] Affordable skills: {len(final_plan)}; Total cost: {total_cost}; Remaining: {remaining_points}")
 
                 if not final_plan:
                     print("[INFO] Nothing affordable to purchase at the moment")
                     click_image_button("assets/buttons/back_btn.png", "back button", max_attempts=5)
-                    time.sleep(1.5)
+                    clock.sleep(1.5)
                     return True
 
                 # Execute automated purchases
-                exec_result = execute_skill_purchases(final_plan)
+                exec_result = execute_skill_purchases(final_plan, scroll_offset=scan_result.get('scroll_offset'))
                 if not exec_result.get('success'):
                     print(f"[WARNING] Automated purchase completed with issues: {exec_result.get('error', 'unknown error')}")
 
@@ -620,7 +628,7 @@ def check_skill_points_cap():
                 back = click_image_button("assets/buttons/back_btn.png", "back button", max_attempts=5)
                 if not back:
                     print("[WARNING] Could not find back button after purchases; ensure you return to lobby manually")
-                time.sleep(1.5)
+                clock.sleep(1.5)
             except Exception as e:
                 print(f"[ERROR] Auto skill purchase failed: {e}")
             
@@ -651,16 +659,19 @@ def check_skill_points_cap():
     
     return True
 
-def check_current_stats():
+def check_current_stats(screenshot=None, stat_names=None):
     """
     Check current character stats using OCR on the stat regions.
     
+    Args:
+        screenshot: Frame to read from (captured once when None)
+        stat_names: Only read these stats (all five when None)
+    
     Returns:
         dict: Dictionary of current stats with keys: spd, sta, pwr, guts, wit
     """
     from utils.constants_phone import SPD_REGION, STA_REGION, PWR_REGION, GUTS_REGION, WIT_REGION
     from utils.adb_screenshot import take_screenshot
-    import pytesseract
     from PIL import Image, ImageEnhance
     
     stats = {}
@@ -672,19 +683,40 @@ def check_current_stats():
         'wit': WIT_REGION
     }
     
+    # One frame for all stats
+    if screenshot is None:
+        screenshot = take_screenshot()
+    
+    stat_config = '--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789'
+    stat_images = {}
     for stat_name, region in stat_regions.items():
+        if stat_names is not None and stat_name not in stat_names:
+            continue
         try:
-            # Take screenshot and crop to stat region
-            screenshot = take_screenshot()
             stat_img = screenshot.crop(region)
             
             # Enhance image for better OCR
             stat_img = stat_img.resize((stat_img.width * 2, stat_img.height * 2), Image.BICUBIC)
             stat_img = stat_img.convert("L")  # Convert to grayscale
             stat_img = ImageEnhance.Contrast(stat_img).enhance(2.0)  # Increase contrast
-            
-            # OCR the stat value
-            stat_text = pytesseract.image_to_string(stat_img, config='--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789').strip()
+            stat_images[stat_name] = stat_img
+        except Exception as e:
+            debug_print(f"[DEBUG] Error reading {stat_name.upper()} stat: {e}")
+            stats[stat_name] = 0
+    
+    # OCR all stat values in one call
+    try:
+        stat_texts = dict(zip(stat_images, batch_image_to_string([(img, stat_config) for img in stat_images.values()])))
+    except Exception as e:
+        debug_print(f"[DEBUG] Batched stat OCR failed, reading stats one by one: {e}")
+        stat_texts = {}
+    
+    for stat_name, stat_img in stat_images.items():
+        try:
+            stat_text = stat_texts.get(stat_name, "").strip()
+            if not stat_text:
+                # Single crop read if the mosaic missed this one
+                stat_text = cached_image_to_string(stat_img, config=stat_config).strip()
             
             # Try to extract the number
             if stat_text:
@@ -708,6 +740,23 @@ def check_current_stats():
     debug_print(f"[DEBUG] Current stats: {stats}")
     return stats
 
+def load_training_scoring_rules():
+    """Load scoring rules from training_score.json, falling back to the default values"""
+    try:
+        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'training_score.json')
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+            return config.get('scoring_rules', {})
+    except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+        print(f"Warning: Could not load training_score.json: {e}")
+        # Fallback to default values if config file is not available
+        return {
+            "rainbow_support": {"points": 1.0},
+            "not_rainbow_support_low": {"points": 0.7},
+            "not_rainbow_support_high": {"points": 0.0},
+            "hint": {"points": 0.3}
+        }
+
 def calculate_training_score(support_detail, hint_found, training_type):
     """
     Calculate training score based on support cards, bond levels, and hints.
@@ -721,21 +770,7 @@ def calculate_training_score(support_detail, hint_found, training_type):
         float: Calculated score for the training
     """
     # Load scoring rules from training_score.json
-    scoring_rules = {}
-    try:
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'training_score.json')
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            scoring_rules = config.get('scoring_rules', {})
-    except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-        print(f"Warning: Could not load training_score.json: {e}")
-        # Fallback to default values if config file is not available
-        scoring_rules = {
-            "rainbow_support": {"points": 1.0},
-            "not_rainbow_support_low": {"points": 0.7},
-            "not_rainbow_support_high": {"points": 0.0},
-            "hint": {"points": 0.3}
-        }
+    scoring_rules = load_training_scoring_rules()
     
     score = 0.0
     
@@ -758,7 +793,7 @@ def calculate_training_score(support_detail, hint_found, training_type):
     
     return round(score, 2)
 
-def check_energy_bar():
+def check_energy_bar(screenshot=None):
     """
     Check the energy bar fill percentage using the same logic as energy_detector.py.
     
@@ -769,10 +804,10 @@ def check_energy_bar():
         import cv2
         import numpy as np
         
-        # Take screenshot and crop to energy bar region (updated coordinates from user)
-        screenshot = take_screenshot()
-        x, y, width, height = 294, 203, 648, 102
-        cropped = screenshot.crop((x, y, x + width, y + height))
+        # Take screenshot and crop to energy bar region
+        if screenshot is None:
+            screenshot = take_screenshot()
+        cropped = screenshot.crop(ENERGY_BAR_REGION)
         
         # Convert to numpy array and handle RGBA -> RGB
         cropped_np = np.array(cropped, dtype=np.uint8)
@@ -859,13 +894,14 @@ def check_energy_bar():
         debug_print(f"[DEBUG] Energy bar check failed: {e}")
         return 0.0
 
-def choose_best_training(training_results, config):
+def choose_best_training(training_results, config, current_stats=None):
     """
     Choose the best training based on scoring algorithm and stat caps.
     
     Args:
         training_results: Dictionary of training results with scores, failure rates, etc.
         config: Configuration dictionary with thresholds and priorities
+        current_stats: Stats already read this turn (re-read from screen when None)
     
     Returns:
         str: Best training type to choose, or None if no suitable training
@@ -876,7 +912,8 @@ def choose_best_training(training_results, config):
     priority_order = config.get("priority_stat", ["spd", "sta", "wit", "pwr", "guts"])
     
     # Get current stats for stat cap filtering
-    current_stats = check_current_stats()
+    if current_stats is None:
+        current_stats = check_current_stats()
     print(f"[INFO] Current stats: {current_stats}")
     debug_print(f"[DEBUG] Current stats for stat cap filtering: {current_stats}")
     
@@ -0,0 +1,219 @@
+import copy
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from utils.config_file import CONFIG_ENV
+
+# Runs one career loop per emulator, each in its own process.
+# Bot modules read their config when imported, so nothing from core/ may be
+# imported at the top of this file: workers import it only after pointing
+# UMA_CONFIG at their device's merged config.
+
+FARM_DIR = "farm"
+
+def load_base_config(path="config.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def deep_merge(base, override):
+    """Copy of `base` with `override` applied on top, nested dicts merged key by key"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def write_device_configs(base_config):
+    """
+    Write farm/<name>/config.json for every device: the shared base config with the
+    device's address and overrides on top. Files the bot writes while running
+    (event fingerprints, timing profiles) default to the device's folder.
+
+    Returns:
+        list: [(name, config_path), ...]
+    """
+    farm_config = base_config.get("farm", {})
+    shared = {key: value for key, value in base_config.items() if key != "farm"}
+    devices = []
+    for index, device in enumerate(farm_config.get("devices", [])):
+        name = device.get("name") or f"device-{index + 1}"
+        device_dir = os.path.join(FARM_DIR, name)
+        os.makedirs(device_dir, exist_ok=True)
+        defaults = {
+            "event_fingerprints": {"path": os.path.join(device_dir, "event_fingerprints.json")},
+            # Workers would overwrite each other's updates in a shared file
+            "timing_profile": {"path": os.path.join(device_dir, "timing_profiles.json")},
+        }
+        config = deep_merge(deep_merge(shared, defaults), device.get("config", {}))
+        config = deep_merge(config, {"adb_config": {"device_address": device.get("device_address", "")}})
+        config_path = os.path.join(device_dir, "config.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+        devices.append((name, config_path))
+    return devices
+
+def warm_shared_tables():
+    """Compile the event recommendation table once, so workers only load the file"""
+    from core.event_handling import load_event_priorities
+    from core.event_recommendations import get_recommendation_table
+    get_recommendation_table(load_event_priorities())
+
+def run_device(name, config_path, events):
+    """Worker process: one device's career loop, output goes to farm/<name>/bot.log"""
+    os.environ[CONFIG_ENV] = config_path
+    log_file = open(os.path.join(os.path.dirname(config_path), "bot.log"), "a", encoding="utf-8", buffering=1)
+    sys.stdout = log_file
+    sys.stderr = log_file
+    print(f"\n===== {name} started {time.strftime('%Y-%m-%d %H:%M:%S')} =====")
+
+    from main_adb import check_adb_connection, get_device_info
+    from core.execute_adb import career_lobby, career_state
+
+    def report(event, data):
+        if event == "state":
+            data = {"year": data.get("year"), "turn": data.get("turn")}
+        events.put((name, event, data, time.time()))
+
+    career_state.add_listener(report)
+    if not check_adb_connection() or not get_device_info():
+        print("Could not establish ADB connection.")
+        sys.exit(2)
+    career_lobby()
+
+class DeviceWorker:
+    """Process and progress of one device"""
+
+    def __init__(self, name, config_path):
+        self.name = name
+        self.config_path = config_path
+        self.process = None
+        self.restarts = 0
+        self.restart_at = None
+        self.status = "starting"
+        self.turns = 0
+        self.year = None
+        self.turn = None
+        self.running_time = 0.0
+        self.started_at = None
+
+    def start(self, context, events):
+        self.process = context.Process(target=run_device, args=(self.name, self.config_path, events), name=self.name, daemon=True)
+        self.process.start()
+        self.started_at = time.time()
+        self.restart_at = None
+        self.status = "running"
+
+    def uptime(self):
+        running = time.time() - self.started_at if self.status == "running" else 0.0
+        return self.running_time + running
+
+    def turns_per_hour(self):
+        hours = self.uptime() / 3600
+        return self.turns / hours if hours > 0 else 0.0
+
+class FarmSupervisor:
+    """Starts a worker per device, restarts crashed workers and reports progress"""
+
+    def __init__(self, devices, restart_delay=10, max_restarts=5, report_interval=60):
+        self.context = multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.workers = [DeviceWorker(name, path) for name, path in devices]
+        self.restart_delay = restart_delay
+        self.max_restarts = max_restarts
+        self.report_interval = report_interval
+
+    def _handle_event(self, name, event, data):
+        worker = next((w for w in self.workers if w.name == name), None)
+        if worker is None:
+            return
+        if event == "action":
+            worker.turns += 1
+        elif event == "state":
+            worker.year = data.get("year")
+            worker.turn = data.get("turn")
+
+    def _check_workers(self):
+        now = time.time()
+        for worker in self.workers:
+            if worker.status == "running" and not worker.process.is_alive():
+                worker.running_time += now - worker.started_at
+                code = worker.process.exitcode
+                if code == 0:
+                    worker.status = "finished"
+                    print(f"[INFO] {worker.name}: worker finished")
+                elif worker.restarts >= self.max_restarts:
+                    worker.status = "failed"
+                    print(f"[ERROR] {worker.name}: worker exited with code {code}, restart limit reached")
+                else:
+                    worker.status = "restarting"
+                    worker.restart_at = now + self.restart_delay
+                    print(f"[WARNING] {worker.name}: worker exited with code {code}, restarting in {self.restart_delay}s")
+            elif worker.status == "restarting" and now >= worker.restart_at:
+                worker.restarts += 1
+                worker.start(self.context, self.events)
+                print(f"[INFO] {worker.name}: worker restarted ({worker.restarts}/{self.max_restarts})")
+
+    def report(self):
+        print("\n" + "=" * 72)
+        print(f"{'Device':<16}{'Status':<12}{'Year':<24}{'Turns':>6}{'Turns/h':>9}{'Restarts':>9}")
+        for worker in self.workers:
+            print(f"{worker.name:<16}{worker.status:<12}{str(worker.year or '-'):<24}"
+                  f"{worker.turns:>6}{worker.turns_per_hour():>9.1f}{worker.restarts:>9}")
+        print("=" * 72)
+
+    def run(self):
+        for worker in self.workers:
+            worker.start(self.context, self.events)
+            print(f"[INFO] {worker.name}: worker started (log: {os.path.join(os.path.dirname(worker.config_path), 'bot.log')})")
+
+        next_report = time.time() + self.report_interval
+        try:
+            while any(worker.status in ("running", "restarting") for worker in self.workers):
+                try:
+                    name, event, data, _ = self.events.get(timeout=1.0)
+                    self._handle_event(name, event, data)
+                except queue.Empty:
+                    pass
+                self._check_workers()
+                if time.time() >= next_report:
+                    self.report()
+                    next_report = time.time() + self.report_interval
+        except KeyboardInterrupt:
+            print("\nFarm stopped by user.")
+        finally:
+            for worker in self.workers:
+                if worker.process is not None and worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join(timeout=5)
+            self.report()
+
+def main():
+    print("Uma Auto - ADB Farm")
+    print("=" * 40)
+
+    base_config = load_base_config()
+    farm_config = base_config.get("farm", {})
+    devices = write_device_configs(base_config)
+    if not devices:
+        print("No devices configured in config.json (farm.devices).")
+        sys.exit(1)
+
+    print(f"Preparing shared event tables for {len(devices)} device(s)...")
+    warm_shared_tables()
+
+    supervisor = FarmSupervisor(
+        devices,
+        restart_delay=farm_config.get("restart_delay", 10),
+        max_restarts=farm_config.get("max_restarts", 5),
+        report_interval=farm_config.get("report_interval", 60),
+    )
+    supervisor.run()
+
+if __name__ == "__main__":
+    main()
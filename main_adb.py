@@ -4,7 +4,8 @@ import sys
 import json
 import os
 from utils.adb_screenshot import run_adb_command, get_screen_size, load_config
-from core.execute_adb import career_lobby
+from core.execute_adb import career_lobby, career_state
+from utils.session_recorder import start_recording, stop_recording, record_decision, RECORDER_CONFIG
 
 def check_adb_connection():
     """Check if ADB is connected to a device"""
@@ -125,12 +126,18 @@ def main():
     print("Press Ctrl+C to stop the automation.")
     print("=" * 40)
     
+    if RECORDER_CONFIG.get("enabled", False):
+        start_recording()
+        career_state.add_listener(record_decision)
+    
     try:
         career_lobby()
     except KeyboardInterrupt:
         print("\nAutomation stopped by user.")
     except Exception as e:
         print("\nAutomation error: " + str(e))
+    finally:
+        stop_recording()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,78 @@
+import argparse
+import json
+import sys
+import time
+
+from utils import clock
+from utils.adb_screenshot import use_fake_device
+from utils.fake_device import FakeDevice, ScreenGraph, ReplayFinished
+from utils.input_backends import ShellInputBackend, use_input_backend
+
+# Plays a career against a fake device (utils/fake_device.py) instead of an
+# emulator: frames come from a recorded screen graph and every wait runs on a
+# virtual clock, so a run takes seconds and gives the same result every time.
+
+def run_replay(graph_path, max_commands=None, real_time=False):
+    """
+    Run career_lobby against the screen graph until it reaches an end screen
+    or max_commands ADB commands.
+
+    Returns:
+        dict: replay report (commands, taps, screens visited, virtual and real seconds)
+    """
+    from core.execute_adb import career_lobby
+
+    device = FakeDevice(ScreenGraph.load(graph_path), max_commands=max_commands)
+    virtual_clock = None if real_time else clock.VirtualClock()
+    previous_clock = clock.use_clock(virtual_clock) if virtual_clock else None
+    use_fake_device(device)
+    use_input_backend(ShellInputBackend())
+    start = time.monotonic()
+    stopped_by = "end screen"
+    try:
+        career_lobby()
+    except ReplayFinished as e:
+        print(f"[INFO] {e}")
+        if not device.graph.screens[device.screen].get("end"):
+            stopped_by = "command limit"
+    finally:
+        use_input_backend(None)
+        use_fake_device(None)
+        if virtual_clock:
+            clock.use_clock(previous_clock)
+
+    report = {
+        "graph": graph_path,
+        "stopped_by": stopped_by,
+        "final_screen": device.screen,
+        "commands": device.commands,
+        "taps": sum(1 for _, command, _ in device.log if " input " in f" {command} "),
+        "screenshots": sum(1 for _, command, _ in device.log if command.endswith("screencap")),
+        "visits": device.visits,
+        "real_seconds": round(time.monotonic() - start, 3),
+    }
+    if virtual_clock:
+        report["virtual_seconds"] = round(virtual_clock.monotonic(), 3)
+        report["slept_seconds"] = round(virtual_clock.slept(), 3)
+        report["sleeps_by_caller"] = {caller: [count, round(total, 3)] for caller, (count, total) in list(virtual_clock.summary().items())[:10]}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ADB bot offline against a recorded screen graph")
+    parser.add_argument("graph", help="Screen graph JSON (see utils/fake_device.py)")
+    parser.add_argument("--max-commands", type=int, default=5000, help="Stop after this many ADB commands")
+    parser.add_argument("--real-time", action="store_true", help="Sleep for real instead of on a virtual clock")
+    parser.add_argument("--report", help="Write the replay report to this JSON file")
+    args = parser.parse_args()
+
+    print("Uma Auto - ADB Replay")
+    print("=" * 40)
+    report = run_replay(args.graph, args.max_commands, args.real_time)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["stopped_by"] == "end screen" else 1)
+
+if __name__ == "__main__":
+    main()
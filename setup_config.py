@@ -16,7 +16,8 @@ def copy_example_files():
     config_files = [
         ('config.example.json', 'config.json'),
         ('event_priority.example.json', 'event_priority.json'),
-        ('training_score.example.json', 'training_score.json')
+        ('training_score.example.json', 'training_score.json'),
+        ('event_weights.example.json', 'event_weights.json')
     ]
     
     print("Uma Musume Auto Trainer - Configuration Setup")
@@ -1,24 +1,37 @@
 import subprocess
-import time
 import json
+import contextvars
+from contextlib import contextmanager
+from utils.config_file import CONFIG_FILE
+from utils import clock
+from utils.adb_screenshot import current_device, fake_device_for
+from utils.input_backends import get_input_backend
+
+# Output of an `input` command the device didn't understand. Before Android 10
+# `input motionevent` prints a usage text or "Unknown command" and still exits 0.
+INPUT_REJECTED_MARKERS = ("unknown command", "usage:", "error:", "exception")
 
 def load_config():
     """Load ADB configuration from config.json"""
     try:
-        with open('config.json', 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
             return config.get('adb_config', {})
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
 
-def run_adb_command(command):
-    """Run ADB command and return result"""
+def run_adb_command(command, apply_input_delay=True):
+    """Run ADB command and return result. Gestures below go through utils.input_backends instead."""
+    clock.check_stop()
     try:
         adb_config = load_config()
         adb_path = adb_config.get('adb_path', 'adb')
-        device_address = adb_config.get('device_address', '')
+        device_address = current_device(adb_config)
         input_delay = adb_config.get('input_delay', 0.5)
+        fake_device = fake_device_for(device_address)
+        if fake_device is not None:
+            return fake_device.run(command)
         
         # Build the full command
         full_command = [adb_path]
@@ -27,8 +40,8 @@ def run_adb_command(command):
         full_command.extend(command)
         
         # Add delay for input commands
-        if 'input' in command:
-            time.sleep(input_delay)
+        if apply_input_delay and 'input' in command:
+            clock.sleep(input_delay)
         
         # Run the command
         result = subprocess.run(full_command, capture_output=True, text=True, check=True)
@@ -40,13 +53,49 @@ def run_adb_command(command):
         print(f"Error running ADB command: {e}")
         return None
 
+_batch = contextvars.ContextVar("input_batch", default=None)
+
+@contextmanager
+def input_batch(interval=None):
+    """
+    Queue the gestures made inside the block and send them together when it ends
+    (one shell invocation / socket write). Calls inside return "" right away.
+    If the block raises, the queued gestures are dropped, not sent.
+
+    Args:
+        interval: Pause between the queued gestures, backend default if None
+    """
+    if _batch.get() is not None:
+        # Nested batch joins the outer one
+        yield
+        return
+    pending = []
+    token = _batch.set(pending)
+    try:
+        yield
+    except BaseException:
+        # Never send half of a gesture sequence after the flow failed
+        pending.clear()
+        raise
+    finally:
+        _batch.reset(token)
+    if pending:
+        get_input_backend().send(pending, interval)
+
+def _send(gestures, interval=None):
+    pending = _batch.get()
+    if pending is not None:
+        pending.extend(gestures)
+        return ""
+    return get_input_backend().send(gestures, interval)
+
 def tap(x, y):
     """Tap at coordinates (x, y)"""
-    return run_adb_command(['shell', 'input', 'tap', str(x), str(y)])
+    return _send([("tap", x, y)])
 
 def swipe(start_x, start_y, end_x, end_y, duration_ms=100):
     """Swipe from (start_x, start_y) to (end_x, end_y) with duration in milliseconds"""
-    return run_adb_command(['shell', 'input', 'swipe', str(start_x), str(start_y), str(end_x), str(end_y), str(duration_ms)])
+    return _send([("swipe", start_x, start_y, end_x, end_y, duration_ms)])
 
 def scroll_down():
     """Scroll down on the screen"""
@@ -62,18 +111,32 @@ def long_press(x, y, duration_ms=1000):
 
 def mouse_down(x, y):
     """Simulate mouse down at coordinates (x, y)"""
-    return run_adb_command(['shell', 'input', 'touchscreen', 'swipe', str(x), str(y), str(x), str(y), '100'])
+    return swipe(x, y, x, y, 100)
 
 def mouse_up(x, y):
     """Simulate mouse up at coordinates (x, y)"""
-    return run_adb_command(['shell', 'input', 'touchscreen', 'swipe', str(x), str(y), str(x), str(y), '100'])
+    return swipe(x, y, x, y, 100)
+
+def touch_down(x, y):
+    """Press and hold a touch at (x, y) with a low-level motion event.
+    Returns None when the device doesn't support touch holds."""
+    result = _send([("down", x, y)])
+    if result and any(marker in result.lower() for marker in INPUT_REJECTED_MARKERS):
+        print(f"[WARNING] Touch hold rejected by device: {result.splitlines()[0]}")
+        return None
+    return result
+
+def touch_move(x, y):
+    """Move the currently held touch to (x, y) without releasing it"""
+    return _send([("move", x, y)])
+
+def touch_up(x, y):
+    """Release the currently held touch at (x, y)"""
+    return _send([("up", x, y)])
 
 def triple_click(x, y, interval=0.1):
-    """Perform triple click at coordinates (x, y)"""
-    for i in range(3):
-        tap(x, y)
-        if i < 2:  # Don't wait after the last click
-            time.sleep(interval)
+    """Perform triple click at coordinates (x, y), sent as one gesture burst"""
+    return _send([("tap", x, y)] * 3, interval)
 
 def click_at_coordinates(x, y):
     """Click at specific coordinates (alias for tap)"""
@@ -81,4 +144,10 @@ def click_at_coordinates(x, y):
 
 def move_to_and_click(x, y):
     """Move to coordinates and click (alias for tap)"""
-    return tap(x, y) 
\ No newline at end of file
+    return tap(x, y) 
+
+def tap_many(points, interval=None):
+    """Tap several coordinates in one send (one shell running all taps)"""
+    if not points:
+        return None
+    return _send([("tap", x, y) for x, y in points], interval)
@@ -3,6 +3,7 @@ import numpy as np
 from PIL import Image
 import os
 from utils.adb_screenshot import take_screenshot
+from utils import clock
 
 def match_template(screenshot, template_path, confidence=0.8, region=None):
     """
@@ -166,13 +167,41 @@ def wait_for_image(template_path, timeout=10, confidence=0.8, region=None):
     Returns:
         (x, y) center coordinates or None if timeout
     """
-    import time
-    start_time = time.time()
+    start_time = clock.time()
     
-    while time.time() - start_time < timeout:
+    while clock.time() - start_time < timeout:
         result = locate_on_screen(template_path, confidence, region)
         if result:
             return result
-        time.sleep(0.1)
+        clock.sleep(0.1)
     
-    return None 
\ No newline at end of file
+    return None
+
+def wait_for_any_image(templates, timeout=10, poll_interval=0.1):
+    """
+    Wait for the first of several templates to appear on screen.
+    Every poll takes one screenshot and matches all templates on it.
+    
+    Args:
+        templates: List of (name, template_path, confidence, region) in priority order,
+                   region may be None for the full screen
+        timeout: Maximum time to wait in seconds
+        poll_interval: Pause between screenshots in seconds
+    
+    Returns:
+        tuple: (name, (x, y) center, screenshot) of the first template found in priority
+               order, or (None, None, last screenshot) on timeout
+    """
+    start_time = clock.time()
+    screenshot = None
+    
+    while True:
+        screenshot = take_screenshot()
+        for name, template_path, confidence, region in templates:
+            matches = match_template(screenshot, template_path, confidence, region)
+            if matches:
+                x, y, w, h = matches[0]
+                return name, (x + w//2, y + h//2), screenshot
+        if clock.time() - start_time >= timeout:
+            return None, None, screenshot
+        clock.sleep(poll_interval)
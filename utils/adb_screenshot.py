@@ -2,25 +2,66 @@ import subprocess
 import tempfile
 import os
 import json
+import contextvars
 from PIL import Image, ImageEnhance
 import numpy as np
+from utils.config_file import CONFIG_FILE
+from utils.session_recorder import record_frame
+from utils import clock
 
 def load_config():
     """Load ADB configuration from config.json"""
     try:
-        with open('config.json', 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
             return config.get('adb_config', {})
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
 
+# Device the calling task or thread is bound to (see use_device), None = adb_config.device_address
+_bound_device = contextvars.ContextVar("adb_device", default=None)
+
+def use_device(device_address):
+    """Bind ADB commands run from the current context (task, thread) to device_address"""
+    return _bound_device.set(device_address)
+
+def current_device(adb_config=None):
+    """Address ADB commands go to: the bound device, or adb_config.device_address"""
+    bound = _bound_device.get()
+    if bound is not None:
+        return bound
+    if adb_config is None:
+        adb_config = load_config()
+    return adb_config.get('device_address', '')
+
+# Fake devices (utils.fake_device) answering ADB commands in-process, by device address.
+# A fake registered for None answers for every device.
+_fake_devices = {}
+
+def use_fake_device(device, device_address=None):
+    """Send ADB commands for device_address (all devices if None) to a fake device, None removes it"""
+    if device is None:
+        _fake_devices.pop(device_address, None)
+    else:
+        _fake_devices[device_address] = device
+
+def fake_device_for(device_address):
+    """Fake device registered for device_address, None when commands go to real ADB"""
+    if not _fake_devices:
+        return None
+    return _fake_devices.get(device_address) or _fake_devices.get(None)
+
 def run_adb_command(command, binary=False):
     """Run ADB command and return result"""
+    clock.check_stop()
     try:
         adb_config = load_config()
         adb_path = adb_config.get('adb_path', 'adb')
-        device_address = adb_config.get('device_address', '')
+        device_address = current_device(adb_config)
+        fake_device = fake_device_for(device_address)
+        if fake_device is not None:
+            return fake_device.run(command, binary)
         
         # Build the full command
         full_command = [adb_path]
@@ -42,32 +83,38 @@ def run_adb_command(command, binary=False):
         print(f"Error running ADB command: {e}")
         return None
 
+def decode_screencap(result):
+    """PIL Image from raw `screencap` output"""
+    cleaned_result = result.replace(b'\r\n', b'\n') # Remove carriage returns
+    
+    # Parse the header: width (4 bytes), height (4 bytes), format (4 bytes), unknown (4 bytes)
+    width = int.from_bytes(cleaned_result[0:4], byteorder='little')
+    height = int.from_bytes(cleaned_result[4:8], byteorder='little')
+    # format_info = int.from_bytes(cleaned_result[8:12], byteorder='little') # Not used directly
+    
+    pixel_data = cleaned_result[16:] # Skip the header (16 bytes)
+    
+    return Image.frombytes('RGBA', (width, height), pixel_data) # Create image from raw pixel data
+
 def take_screenshot():
     """Take a screenshot using ADB and return PIL Image"""
     try:
         result = run_adb_command(['shell', 'screencap'], binary=True)
         if result is None:
             raise Exception("Failed to take screenshot")
-        
-        cleaned_result = result.replace(b'\r\n', b'\n') # Remove carriage returns
-        
-        # Parse the header: width (4 bytes), height (4 bytes), format (4 bytes), unknown (4 bytes)
-        width = int.from_bytes(cleaned_result[0:4], byteorder='little')
-        height = int.from_bytes(cleaned_result[4:8], byteorder='little')
-        # format_info = int.from_bytes(cleaned_result[8:12], byteorder='little') # Not used directly
-        
-        pixel_data = cleaned_result[16:] # Skip the header (16 bytes)
-        
-        img = Image.frombytes('RGBA', (width, height), pixel_data) # Create image from raw pixel data
+        img = decode_screencap(result)
+        record_frame(img)
         return img
     except Exception as e:
         print(f"Error taking screenshot: {e}")
         raise
 
-def enhanced_screenshot(region):
-    """Take a screenshot of a specific region with enhancement (same as PC version)"""
+def enhanced_screenshot(region, screenshot=None):
+    """Take a screenshot of a specific region with enhancement (same as PC version).
+    Pass an already captured `screenshot` to crop from it instead of capturing again."""
     try:
-        screenshot = take_screenshot()
+        if screenshot is None:
+            screenshot = take_screenshot()
         cropped = screenshot.crop(region)
         
         # Resize for better OCR (same as PC version)
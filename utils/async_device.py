@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.adb_screenshot import decode_screencap, load_config, use_device
+from utils.adb_recognizer import match_template
+from utils.config_file import CONFIG_FILE
+from utils import adb_input
+from utils import clock
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    config = {}
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+COMMAND_TIMEOUT = 10  # Seconds before an ADB command is killed
+STABLE_DIFF_LEVEL = 8  # Gray levels a pixel may change by and still count as unchanged
+STABLE_DIFF_RATIO = 0.002  # Fraction of changed pixels below which two frames are the same
+MATCH_WORKERS = config.get("async_career", {}).get("match_workers") or os.cpu_count() or 4
+
+_match_executor = None
+
+def match_executor():
+    """Thread pool shared by all devices for matching, OCR and image work"""
+    global _match_executor
+    if _match_executor is None:
+        _match_executor = ThreadPoolExecutor(max_workers=MATCH_WORKERS, thread_name_prefix="match")
+    return _match_executor
+
+class AsyncDevice:
+    """
+    Non-blocking access to one ADB device.
+
+    ADB commands run as asyncio subprocesses and template matching, OCR and
+    other CPU work run in a pool shared by all devices, so one event loop can
+    drive many devices. A cancelled or timed out command kills its adb process.
+
+    Blocking bot code (call) runs in the device's own worker thread, so a long
+    turn never holds up another device's matching. Threads can't be cancelled;
+    instead a cancelled or timed out call sets the device's stop event and the
+    thread stops at its next clock.sleep or ADB command (utils.clock.Stopped).
+    A stopped device refuses further calls.
+    """
+
+    def __init__(self, device_address=None, adb_path=None):
+        adb_config = load_config()
+        self.device_address = device_address if device_address is not None else adb_config.get('device_address', '')
+        self.adb_path = adb_path or adb_config.get('adb_path', 'adb')
+        self.stop_event = threading.Event()
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"device-{self.device_address or 'default'}")
+
+    def __repr__(self):
+        return f"AsyncDevice({self.device_address!r})"
+
+    async def adb(self, *args, timeout=COMMAND_TIMEOUT):
+        """Run an adb command for this device and return its raw stdout (None on failure)"""
+        command = [self.adb_path]
+        if self.device_address:
+            command.extend(['-s', self.device_address])
+        command.extend(str(arg) for arg in args)
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            print(f"[ERROR] {self.device_address}: adb {' '.join(str(arg) for arg in args)} failed: {stderr.decode(errors='replace').strip()}")
+            return None
+        return stdout
+
+    async def shell(self, *args, timeout=COMMAND_TIMEOUT):
+        result = await self.adb('shell', *args, timeout=timeout)
+        return result.decode(errors='replace').strip() if result is not None else None
+
+    async def frame(self):
+        """Screenshot as a PIL Image"""
+        result = await self.adb('shell', 'screencap')
+        if result is None:
+            raise RuntimeError(f"Failed to take screenshot on {self.device_address}")
+        return await self.run(decode_screencap, result)
+
+    # Gestures go through the device's input backend (utils.input_backends) like
+    # the blocking bot code: same backend, pacing, capture and session recording
+
+    async def tap(self, x, y):
+        return await self.call(adb_input.tap, x, y)
+
+    async def swipe(self, start_x, start_y, end_x, end_y, duration_ms=100):
+        return await self.call(adb_input.swipe, start_x, start_y, end_x, end_y, duration_ms)
+
+    async def tap_many(self, points):
+        """Several taps in one send"""
+        return await self.call(adb_input.tap_many, points)
+
+    async def run(self, func, *args):
+        """Run CPU-bound work (matching, OCR, image processing) in the shared match pool"""
+        return await asyncio.get_running_loop().run_in_executor(match_executor(), func, *args)
+
+    async def call(self, func, *args, timeout=None, **kwargs):
+        """
+        Run a blocking bot function (career_turn, claw_machine, ...) in this device's
+        worker thread with its ADB commands bound to this device.
+
+        On cancellation or timeout the device is stopped (see class docstring)
+        and the error is raised right away, without waiting for the thread.
+        """
+        if self.stop_event.is_set():
+            raise RuntimeError(f"{self.device_address} is stopped")
+
+        def bound():
+            use_device(self.device_address)
+            clock.use_stop_event(self.stop_event)
+            return func(*args, **kwargs)
+        future = asyncio.get_running_loop().run_in_executor(self.worker, bound)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.stop()
+            raise
+
+    def stop(self):
+        """Stop the worker thread at its next sleep or ADB command and drop queued calls"""
+        self.stop_event.set()
+        self.worker.shutdown(wait=False, cancel_futures=True)
+
+    async def match(self, frame, template_path, confidence=0.8, region=None):
+        """Template matches on a frame, same result as match_template"""
+        return await self.run(match_template, frame, template_path, confidence, region)
+
+    async def first_match(self, frame, templates):
+        """
+        First template found on the frame.
+
+        Args:
+            templates: List of (name, template_path, confidence, region) in priority order
+
+        Returns:
+            tuple: (name, (x, y) center) or (None, None)
+        """
+        def find():
+            for name, template_path, confidence, region in templates:
+                matches = match_template(frame, template_path, confidence, region)
+                if matches:
+                    x, y, w, h = matches[0]
+                    return name, (x + w//2, y + h//2)
+            return None, None
+        return await self.run(find)
+
+    async def wait_for(self, templates, timeout=10, poll_interval=0.1):
+        """
+        Wait for the first of several templates, one screenshot per poll.
+
+        Returns:
+            tuple: (name, (x, y) center, frame), (None, None, last frame) on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            frame = await self.frame()
+            name, center = await self.first_match(frame, templates)
+            if name is not None or time.monotonic() >= deadline:
+                return name, center, frame
+            await asyncio.sleep(poll_interval)
+
+    async def wait_stable(self, region=None, timeout=2.0, poll_interval=0.1):
+        """
+        Wait until two consecutive frames show the same pixels in region (x1, y1, x2, y2).
+
+        Returns:
+            PIL Image: the first stable frame, or the last frame captured at timeout
+        """
+        def gray(image):
+            if region is not None:
+                image = image.crop(region)
+            return np.asarray(image.convert("L"), dtype=np.int16)
+
+        deadline = time.monotonic() + timeout
+        frame = await self.frame()
+        previous = await self.run(gray, frame)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            frame = await self.frame()
+            current = await self.run(gray, frame)
+            changed = np.count_nonzero(np.abs(current - previous) > STABLE_DIFF_LEVEL)
+            if changed <= current.size * STABLE_DIFF_RATIO:
+                return frame
+            previous = current
+        debug_print(f"[DEBUG] {self.device_address}: screen not stable after {timeout}s")
+        return frame
@@ -0,0 +1,128 @@
+"""Clock used by the bot for every wait, timeout and timestamp.
+
+Bot code calls clock.sleep(), clock.time() and clock.monotonic() instead of
+the time module, so a simulated device can swap in a VirtualClock: sleeps
+return immediately and advance the virtual time, which makes a replayed
+career run in seconds. A virtual clock also keeps a trace of every sleep
+(when, how long, and from where), so waits can be inspected after a run.
+
+Timeouts on real device I/O (ADB subprocesses, sockets) keep using real time.
+
+A thread can also be given a stop event (use_stop_event): once it is set,
+a sleep in progress returns early and the thread's next clock.sleep or ADB
+command raises Stopped. The async career loop uses this to stop a turn
+that runs in a worker thread.
+"""
+import contextvars
+import sys
+import threading
+import time as _time
+
+class RealClock:
+    """Wall-clock time, sleeps block the calling thread"""
+
+    def time(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            event = _stop_event.get()
+            if event is None:
+                _time.sleep(seconds)
+            else:
+                event.wait(seconds)
+
+class VirtualClock:
+    """
+    Simulated time that only moves when someone sleeps (or advance() is called).
+
+    Args:
+        start: Initial time.time() value, monotonic() starts at 0
+        trace: Record every sleep in `sleeps` as (monotonic time, seconds, caller)
+    """
+
+    def __init__(self, start=1_700_000_000.0, trace=True):
+        self.start = start
+        self.elapsed = 0.0
+        self.trace = trace
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def time(self):
+        return self.start + self.elapsed
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, seconds):
+        with self.lock:
+            self.elapsed += max(seconds, 0)
+
+    def sleep(self, seconds):
+        seconds = max(seconds, 0)
+        with self.lock:
+            if self.trace:
+                self.sleeps.append((self.elapsed, seconds, _caller()))
+            self.elapsed += seconds
+
+    def slept(self):
+        """Total virtual seconds slept"""
+        return sum(seconds for _, seconds, _ in self.sleeps)
+
+    def summary(self):
+        """{caller: (sleep count, total seconds)}, longest total first"""
+        totals = {}
+        for _, seconds, caller in self.sleeps:
+            count, total = totals.get(caller, (0, 0.0))
+            totals[caller] = (count + 1, total + seconds)
+        return dict(sorted(totals.items(), key=lambda item: -item[1][1]))
+
+def _caller():
+    """module:function:line of the code that called clock.sleep"""
+    frame = sys._getframe(3)
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+class Stopped(BaseException):
+    """Raised in a thread whose stop event is set.
+
+    A BaseException like KeyboardInterrupt, so the bot's `except Exception`
+    fallbacks don't swallow it."""
+
+_stop_event = contextvars.ContextVar("clock_stop_event", default=None)
+
+def use_stop_event(event):
+    """Stop the current context (thread, task) once the threading.Event is set, None removes it"""
+    return _stop_event.set(event)
+
+def check_stop():
+    """Raise Stopped if the current context's stop event is set"""
+    event = _stop_event.get()
+    if event is not None and event.is_set():
+        raise Stopped()
+
+_clock = RealClock()
+
+def use_clock(clock):
+    """Make `clock` the bot's clock, returns the previous one"""
+    global _clock
+    previous = _clock
+    _clock = clock
+    return previous
+
+def get_clock():
+    return _clock
+
+def time():
+    return _clock.time()
+
+def monotonic():
+    return _clock.monotonic()
+
+def sleep(seconds):
+    check_stop()
+    _clock.sleep(seconds)
+    check_stop()
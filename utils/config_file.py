@@ -0,0 +1,6 @@
+import os
+
+# Path of the bot's config.json. Farm workers set UMA_CONFIG to their device's
+# merged config before importing any bot module, everything else uses config.json.
+CONFIG_ENV = "UMA_CONFIG"
+CONFIG_FILE = os.environ.get(CONFIG_ENV, "config.json")
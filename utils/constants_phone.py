@@ -20,6 +20,12 @@ YEAR_REGION=(21, 66, 276, 96)
 # Criteria region (top area)
 CRITERIA_REGION=(363, 153, 867, 201)
 
+# Goal name region (top area)
+GOAL_REGION=(372, 113, 912, 152)
+
+# Energy bar region (top area)
+ENERGY_BAR_REGION=(294, 203, 942, 305)
+
 # Skill points region (bottom right)
 SKILL_PTS_REGION=(903, 1383, 1035, 1443) 
 
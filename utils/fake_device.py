@@ -0,0 +1,254 @@
+"""Fake ADB device for offline runs.
+
+Answers the ADB commands the bot uses (`shell screencap`, `shell input
+tap/swipe/motionevent`, `shell wm size`, `shell getprop`, `devices`,
+`connect`) in-process, from a screen graph of recorded frames. Register it
+with utils.adb_screenshot.use_fake_device and every ADB call goes to it
+instead of the adb binary; replay_adb.py does that for whole careers.
+
+Screen graph (JSON):
+
+    {
+      "start": "lobby",
+      "screens": {
+        "lobby": {
+          "frame": "recording/lobby.png",
+          "taps": [{"region": [x, y, w, h], "next": "training"}],
+          "swipes": [{"region": [x, y, w, h], "direction": "up", "next": "lobby_scrolled"}]
+        },
+        "race_start": {
+          "frames": ["recording/race_1.png", "recording/race_2.png"],
+          "after": {"seconds": 3, "next": "race_result"}
+        },
+        "career_end": {"frame": "recording/end.png", "end": true}
+      }
+    }
+
+- A tap inside one of the screen's tap regions moves to its `next` screen
+  (first match wins). Taps anywhere else leave the screen as it is.
+- A swipe starting inside a swipe region moves on; `direction` is optional.
+- `frames` plays one frame per screencap and then keeps the last one.
+- `after` moves on by itself once that many seconds (utils.clock) have passed.
+- Entering an `end` screen finishes the replay: the next command raises
+  ReplayFinished.
+- Frame paths are relative to the graph file. With "archive": "<session
+  directory>" at the top level, a frame can also be a frame id of that
+  recorded session (utils/session_recorder.py).
+"""
+import json
+import os
+import re
+import threading
+
+import numpy as np
+from PIL import Image
+
+from utils import clock
+from utils.session_recorder import SessionReader
+
+class ReplayFinished(BaseException):
+    """Raised by the fake device once the replay is over.
+
+    A BaseException like KeyboardInterrupt, so the bot's `except Exception`
+    fallbacks don't swallow it and the career loop stops."""
+
+def _in_region(x, y, region):
+    rx, ry, rw, rh = region
+    return rx <= x < rx + rw and ry <= y < ry + rh
+
+def _direction(start_x, start_y, end_x, end_y):
+    dx, dy = end_x - start_x, end_y - start_y
+    if abs(dy) >= abs(dx):
+        return "up" if dy < 0 else "down"
+    return "left" if dx < 0 else "right"
+
+def encode_screencap(image):
+    """Raw `screencap` output for an image: width, height, format (RGBA_8888), colorspace, pixels"""
+    image = image.convert("RGBA")
+    header = np.array([image.width, image.height, 1, 0], dtype="<u4").tobytes()
+    # decode_screencap turns \r\n into \n (Windows adb output), keep pixels from forming one
+    return header + image.tobytes().replace(b"\r\n", b"\x0c\n")
+
+class ScreenGraph:
+    """Screens, their frames and the transitions between them"""
+
+    def __init__(self, screens, start, base_dir=".", archive=None):
+        self.screens = screens
+        self.start = start
+        self.base_dir = base_dir
+        self.archive = SessionReader(os.path.join(base_dir, archive)) if archive else None
+        self._frames = {}
+        if start not in screens:
+            raise ValueError(f"Start screen '{start}' is not in the screen graph")
+        for name, screen in screens.items():
+            targets = [entry["next"] for entry in screen.get("taps", []) + screen.get("swipes", [])]
+            if "after" in screen:
+                targets.append(screen["after"]["next"])
+            missing = [target for target in targets if target not in screens]
+            if missing:
+                raise ValueError(f"Screen '{name}' leads to unknown screen(s): {missing}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["screens"], data["start"], os.path.dirname(os.path.abspath(path)), data.get("archive"))
+
+    def frame_paths(self, name):
+        screen = self.screens[name]
+        return screen.get("frames") or [screen["frame"]]
+
+    def frame(self, name, index):
+        """Raw screencap bytes of frame `index` of a screen (last frame past the end)"""
+        paths = self.frame_paths(name)
+        path = paths[min(index, len(paths) - 1)]
+        if path not in self._frames:
+            if isinstance(path, int):
+                image = self.archive.frame(path)
+                self._frames[path] = (image.size, encode_screencap(image))
+            else:
+                with Image.open(os.path.join(self.base_dir, path)) as image:
+                    self._frames[path] = (image.size, encode_screencap(image))
+        return self._frames[path]
+
+class FakeDevice:
+    """
+    In-process device playing a screen graph.
+
+    Args:
+        graph: ScreenGraph to play
+        max_commands: Finish the replay after this many commands (None = no limit)
+        model: Reported by getprop ro.product.model
+    """
+
+    def __init__(self, graph, max_commands=None, model="FakeDevice"):
+        self.graph = graph
+        self.max_commands = max_commands
+        self.model = model
+        self.screen = None
+        self.frame_index = 0
+        self.entered_at = 0.0
+        self.finished = False
+        self.touch = None
+        self.commands = 0
+        self.log = []  # (clock time, command, screen after)
+        self.visits = {}
+        self.lock = threading.Lock()
+        self._enter(graph.start)
+
+    def _enter(self, name):
+        self.screen = name
+        self.frame_index = 0
+        self.entered_at = clock.monotonic()
+        self.visits[name] = self.visits.get(name, 0) + 1
+        if self.graph.screens[name].get("end"):
+            self.finished = True
+
+    def _advance_timed(self):
+        """Follow `after` transitions whose time has come"""
+        while True:
+            after = self.graph.screens[self.screen].get("after")
+            if not after or clock.monotonic() - self.entered_at < after["seconds"]:
+                return
+            self._enter(after["next"])
+
+    def _tap(self, x, y):
+        for entry in self.graph.screens[self.screen].get("taps", []):
+            if _in_region(x, y, entry["region"]):
+                self._enter(entry["next"])
+                return
+
+    def _swipe(self, start_x, start_y, end_x, end_y):
+        direction = _direction(start_x, start_y, end_x, end_y)
+        for entry in self.graph.screens[self.screen].get("swipes", []):
+            if "region" in entry and not _in_region(start_x, start_y, entry["region"]):
+                continue
+            if entry.get("direction", direction) == direction:
+                self._enter(entry["next"])
+                return
+
+    def _input(self, args):
+        if args[:1] == ["touchscreen"]:
+            args = args[1:]
+        kind, values = args[0], args[1:]
+        if kind == "tap":
+            self._tap(int(float(values[0])), int(float(values[1])))
+        elif kind == "swipe":
+            start_x, start_y, end_x, end_y = (int(float(value)) for value in values[:4])
+            if len(values) > 4:
+                clock.sleep(int(values[4]) / 1000)
+            if (start_x, start_y) == (end_x, end_y):
+                # Long press / mouse down: a tap that is held
+                self._tap(start_x, start_y)
+            else:
+                self._swipe(start_x, start_y, end_x, end_y)
+        elif kind == "motionevent":
+            action, x, y = values[0].upper(), int(float(values[1])), int(float(values[2]))
+            if action == "DOWN":
+                self.touch = (x, y)
+            elif action == "UP" and self.touch is not None:
+                start, self.touch = self.touch, None
+                if abs(x - start[0]) + abs(y - start[1]) < 20:
+                    self._tap(x, y)
+                else:
+                    self._swipe(start[0], start[1], x, y)
+        else:
+            raise ValueError(f"unsupported input command: input {' '.join(args)}")
+        return ""
+
+    def _shell(self, args, binary):
+        if args[0] == "screencap":
+            self._advance_timed()
+            _, data = self.graph.frame(self.screen, self.frame_index)
+            self.frame_index += 1
+            return data if binary else data.decode("latin-1")
+        if args[0] == "input":
+            return self._input(args[1:])
+        if args[0] == "sleep":
+            clock.sleep(float(args[1]))
+            return ""
+        if args[:2] == ["wm", "size"]:
+            (width, height), _ = self.graph.frame(self.screen, 0)
+            return f"Physical size: {width}x{height}"
+        if args[0] == "getprop":
+            return {"ro.product.model": self.model, "ro.build.version.release": "13"}.get(args[1] if len(args) > 1 else "", "")
+        if args[0] in ("echo", "true"):
+            return " ".join(args[1:])
+        raise ValueError(f"unsupported shell command: {' '.join(args)}")
+
+    def run(self, command, binary=False):
+        """
+        Answer an ADB command (arguments after `adb -s <device>`) like the adb binary would.
+
+        Returns:
+            bytes or str: command output (bytes when binary), None for unsupported commands
+        """
+        with self.lock:
+            return self._run(command, binary)
+
+    def _run(self, command, binary):
+        if self.finished or (self.max_commands is not None and self.commands >= self.max_commands):
+            self.finished = True
+            raise ReplayFinished(f"replay finished on screen '{self.screen}' after {self.commands} commands")
+        self.commands += 1
+        try:
+            if command[0] == "shell":
+                # One shell may run several commands: "input tap 1 2 ; sleep 0.1 ; input tap 1 2"
+                outputs = []
+                for part in re.split(r"\s*(?:;|&&|\n)\s*", " ".join(str(arg) for arg in command[1:])):
+                    if part:
+                        outputs.append(self._shell(part.split(), binary))
+                result = outputs[-1] if outputs else ""
+            elif command[0] == "devices":
+                result = "List of devices attached\nfake\tdevice"
+            elif command[0] in ("connect", "forward"):
+                result = ""
+            else:
+                raise ValueError(f"unsupported command: {' '.join(command)}")
+        except ValueError as e:
+            print(f"[ERROR] Fake device: {e}")
+            return None
+        self.log.append((clock.monotonic(), " ".join(str(arg) for arg in command), self.screen))
+        if binary:
+            return result if isinstance(result, bytes) else result.encode()
+        return result.strip()
@@ -0,0 +1,544 @@
+"""Input injection backends.
+
+utils.adb_input sends every gesture through one of these, picked with
+adb_config.input_backend:
+
+    input      `adb shell input ...`, one shell per send (default, works everywhere)
+    sendevent  raw touchscreen events written with `sendevent` through one
+               persistent `adb shell`, no Java process per tap
+    monkey     `monkey --port` on the device, commands over a forwarded TCP socket
+
+A send is a list of gestures that goes out in one shell invocation, socket
+write or script: a single tap, a triple click, or everything queued inside
+adb_input.input_batch(). Instead of sleeping a fixed delay before every
+command, a backend only waits until `input_delay` has passed since its last
+send finished, so time spent on screenshots and matching counts toward it.
+Pacing goes through utils.clock, so it costs nothing under a virtual clock.
+
+Backends built with capture=True don't touch a device: each send is encoded
+as usual and the payload is appended to `captured` (gestures to `gestures`),
+so the exact commands can be checked without an emulator.
+"""
+import json
+import queue
+import re
+import socket
+import subprocess
+import threading
+import time
+
+from utils.config_file import CONFIG_FILE
+from utils import clock
+from utils.session_recorder import record_action
+from utils.adb_screenshot import current_device, fake_device_for
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+# Minimum seconds between two sends when adb_config.input_delay is not set.
+# `input` already spends 200-500 ms starting a Java process per command.
+DEFAULT_INPUT_DELAY = {"input": 0.5, "sendevent": 0.15, "monkey": 0.15}
+# Pause between gestures of one send. `input` gets its spacing from process start-up.
+DEFAULT_GESTURE_INTERVAL = {"input": 0.0, "sendevent": 0.1, "monkey": 0.1}
+SEND_TIMEOUT = 10
+TAP_HOLD = 0.03  # Seconds a raw tap stays down, games drop zero-length touches
+SWIPE_STEP = 0.016  # Seconds between two move events of a raw swipe
+
+# Linux input event codes
+EV_SYN, EV_KEY, EV_ABS = 0, 1, 3
+SYN_REPORT, SYN_MT_REPORT = 0, 2
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT = 0x2f
+ABS_MT_POSITION_X, ABS_MT_POSITION_Y = 0x35, 0x36
+ABS_MT_TRACKING_ID = 0x39
+
+PACED_GESTURES = ("tap", "swipe", "down")
+
+class SetupError(Exception):
+    """The backend can't run on this device, gestures go through `input` instead"""
+
+def load_config():
+    """Load ADB configuration from config.json"""
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            return json.load(f).get('adb_config', {})
+    except Exception as e:
+        print(f"Error loading config: {e}")
+        return {}
+
+def swipe_points(start_x, start_y, end_x, end_y, duration_ms, step=SWIPE_STEP):
+    """Intermediate points of a straight swipe, one per step, end point included"""
+    steps = max(1, int(duration_ms / 1000 / step))
+    return [
+        (round(start_x + (end_x - start_x) * i / steps), round(start_y + (end_y - start_y) * i / steps))
+        for i in range(1, steps + 1)
+    ]
+
+class InputBackend:
+    """
+    Base class: gesture API, pacing, and capture.
+
+    Gestures are tuples: ("tap", x, y), ("swipe", x1, y1, x2, y2, duration_ms),
+    ("down", x, y), ("move", x, y), ("up", x, y) and ("sleep", seconds).
+    Subclasses implement encode(gestures) -> payload and write(payload) -> output.
+    """
+
+    name = None
+
+    def __init__(self, device_address='', adb_path='adb', input_delay=None, gesture_interval=None, capture=False):
+        self.device_address = device_address
+        self.adb_path = adb_path
+        self.input_delay = DEFAULT_INPUT_DELAY[self.name] if input_delay is None else input_delay
+        self.gesture_interval = DEFAULT_GESTURE_INTERVAL[self.name] if gesture_interval is None else gesture_interval
+        self.captured = [] if capture else None
+        self.gestures = [] if capture else None
+        self.last_send = 0.0
+        self.lock = threading.Lock()
+        self.fallback = None
+
+    def adb_command(self, *args):
+        command = [self.adb_path]
+        if self.device_address:
+            command.extend(['-s', self.device_address])
+        command.extend(str(arg) for arg in args)
+        return command
+
+    def pace(self):
+        """Wait out the rest of input_delay since the last send"""
+        remaining = self.last_send + self.input_delay - clock.monotonic()
+        if remaining > 0:
+            clock.sleep(remaining)
+
+    def spaced(self, gestures, interval):
+        """Gestures with a sleep between consecutive ones"""
+        if not interval:
+            return list(gestures)
+        result = []
+        for gesture in gestures:
+            if result and gesture[0] != "sleep" and result[-1][0] != "sleep":
+                result.append(("sleep", interval))
+            result.append(gesture)
+        return result
+
+    def send(self, gestures, interval=None):
+        """
+        Send gestures in one go.
+
+        Returns:
+            str: command output ("" for most backends), None on failure
+        """
+        clock.check_stop()
+        if not gestures:
+            return ""
+        if self.fallback is not None:
+            return self.fallback.send(gestures, interval)
+        gestures = self.spaced(gestures, self.gesture_interval if interval is None else interval)
+        with self.lock:
+            # Moving or lifting a held touch continues the previous gesture, no pause
+            if gestures[0][0] in PACED_GESTURES:
+                self.pace()
+            try:
+                payload = self.encode(gestures)
+                record_action(self.name, gestures)
+                if self.captured is not None:
+                    self.gestures.extend(gestures)
+                    self.captured.append(payload)
+                    return ""
+                return self.write(payload)
+            except SetupError as e:
+                print(f"[WARNING] Input backend '{self.name}' unavailable on {self.device_address or 'default device'} ({e}), using 'input'")
+                self.close()
+                self.fallback = ShellInputBackend(self.device_address, self.adb_path)
+            except Exception as e:
+                print(f"[ERROR] Input ({self.name}) on {self.device_address or 'default device'} failed: {e}")
+                return None
+            finally:
+                self.last_send = clock.monotonic()
+        return self.fallback.send(gestures, 0)
+
+    def tap(self, x, y):
+        return self.send([("tap", x, y)])
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration_ms=100):
+        return self.send([("swipe", start_x, start_y, end_x, end_y, duration_ms)])
+
+    def tap_many(self, points, interval=None):
+        return self.send([("tap", x, y) for x, y in points], interval)
+
+    def touch_down(self, x, y):
+        return self.send([("down", x, y)])
+
+    def touch_move(self, x, y):
+        return self.send([("move", x, y)])
+
+    def touch_up(self, x, y):
+        return self.send([("up", x, y)])
+
+    def encode(self, gestures):
+        raise NotImplementedError
+
+    def write(self, payload):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class ShellInputBackend(InputBackend):
+    """`input` commands, a whole send joined into one `adb shell` call"""
+
+    name = "input"
+
+    def encode(self, gestures):
+        commands = []
+        for gesture in gestures:
+            kind, args = gesture[0], gesture[1:]
+            if kind == "tap":
+                commands.append(f"input tap {args[0]} {args[1]}")
+            elif kind == "swipe":
+                commands.append("input swipe " + " ".join(str(arg) for arg in args))
+            elif kind in ("down", "move", "up"):
+                commands.append(f"input motionevent {kind.upper()} {args[0]} {args[1]}")
+            elif kind == "sleep":
+                commands.append(f"sleep {args[0]:g}")
+        return " ; ".join(commands)
+
+    def write(self, payload):
+        fake_device = fake_device_for(self.device_address)
+        if fake_device is not None:
+            return fake_device.run(['shell', payload])
+        result = subprocess.run(self.adb_command('shell', payload), capture_output=True, text=True, check=True)
+        # `input` reports unsupported commands on stderr and may still exit 0
+        return (result.stdout + result.stderr).strip()
+
+class PersistentShell:
+    """One `adb shell` kept open; scripts are written to its stdin and acknowledged by a marker line"""
+
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+        self.lines = None
+        self.count = 0
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self.process, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _read(process, lines):
+        for line in process.stdout:
+            lines.put(line.rstrip("\r\n"))
+        lines.put(None)
+
+    def run(self, script, timeout=SEND_TIMEOUT):
+        """Run a script and return its output once it has finished on the device"""
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        self.count += 1
+        marker = f"__uma_input_{self.count}__"
+        self.process.stdin.write(f"{script}\necho {marker}\n")
+        self.process.stdin.flush()
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.close()
+                raise TimeoutError(f"no reply from device shell after {timeout}s")
+            if line is None:
+                self.process = None
+                raise ConnectionError("device shell closed")
+            if line == marker:
+                return "\n".join(output)
+            output.append(line)
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+        self.process = None
+
+class TouchDevice:
+    """Touchscreen event node and axis ranges from `getevent -p`"""
+
+    def __init__(self, path, x_range, y_range, slots=True):
+        self.path = path
+        self.x_range = x_range
+        self.y_range = y_range
+        self.slots = slots
+
+    def __repr__(self):
+        return f"TouchDevice({self.path!r}, x={self.x_range}, y={self.y_range}, slots={self.slots})"
+
+    @classmethod
+    def parse(cls, getevent_output):
+        """First multi-touch device in `getevent -p` output, None if there is none"""
+        for block in getevent_output.split("add device")[1:]:
+            path = re.search(r"(/dev/input/event\d+)", block)
+            axes = {
+                int(code, 16): (int(minimum), int(maximum))
+                for code, minimum, maximum in re.findall(r"([0-9a-f]{4})\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)", block)
+            }
+            if path and ABS_MT_POSITION_X in axes and ABS_MT_POSITION_Y in axes:
+                return cls(path.group(1), axes[ABS_MT_POSITION_X], axes[ABS_MT_POSITION_Y], ABS_MT_SLOT in axes)
+        return None
+
+class SendeventBackend(InputBackend):
+    """
+    Raw multi-touch events through a persistent shell.
+
+    Screen coordinates are scaled to the touchscreen's axis range. Devices with
+    slots get protocol B events, others protocol A.
+    """
+
+    name = "sendevent"
+
+    def __init__(self, *args, touch_device=None, screen_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shell = PersistentShell(self.adb_command('shell'))
+        self.touch = touch_device
+        self.screen_size = screen_size
+        self.tracking_id = 0
+
+    def _setup(self):
+        if self.touch is not None and self.screen_size is not None:
+            return
+        if self.captured is not None:
+            # Nothing to ask without a device: identity mapping on the bot's 1080x2400 screen
+            self.screen_size = self.screen_size or (1080, 2400)
+            self.touch = self.touch or TouchDevice("/dev/input/event1", (0, self.screen_size[0] - 1), (0, self.screen_size[1] - 1))
+            return
+        if self.touch is None:
+            self.touch = TouchDevice.parse(self.shell.run("getevent -p"))
+            if self.touch is None:
+                raise SetupError("no multi-touch device found in getevent -p")
+        if self.screen_size is None:
+            size = re.search(r"(\d+)x(\d+)\s*$", self.shell.run("wm size"))
+            self.screen_size = (int(size.group(1)), int(size.group(2))) if size else (1080, 2400)
+        debug_print(f"[DEBUG] sendevent input on {self.device_address}: {self.touch}, screen {self.screen_size}")
+
+    def _scale(self, value, size, axis_range):
+        low, high = axis_range
+        return low + round(value * (high - low) / max(size - 1, 1))
+
+    def _event(self, event_type, code, value):
+        return f"sendevent {self.touch.path} {event_type} {code} {value}"
+
+    def _contact(self, x, y, down=False):
+        """Events placing the contact at (x, y), starting it when down"""
+        events = []
+        if self.touch.slots:
+            events.append(self._event(EV_ABS, ABS_MT_SLOT, 0))
+            if down:
+                self.tracking_id = (self.tracking_id + 1) % 65535
+                events.append(self._event(EV_ABS, ABS_MT_TRACKING_ID, self.tracking_id))
+        events.append(self._event(EV_ABS, ABS_MT_POSITION_X, self._scale(x, self.screen_size[0], self.touch.x_range)))
+        events.append(self._event(EV_ABS, ABS_MT_POSITION_Y, self._scale(y, self.screen_size[1], self.touch.y_range)))
+        if not self.touch.slots:
+            events.append(self._event(EV_SYN, SYN_MT_REPORT, 0))
+        if down:
+            events.append(self._event(EV_KEY, BTN_TOUCH, 1))
+        events.append(self._event(EV_SYN, SYN_REPORT, 0))
+        return events
+
+    def _release(self):
+        if self.touch.slots:
+            events = [self._event(EV_ABS, ABS_MT_SLOT, 0), self._event(EV_ABS, ABS_MT_TRACKING_ID, -1)]
+        else:
+            events = [self._event(EV_SYN, SYN_MT_REPORT, 0)]
+        return events + [self._event(EV_KEY, BTN_TOUCH, 0), self._event(EV_SYN, SYN_REPORT, 0)]
+
+    def encode(self, gestures):
+        self._setup()
+        lines = []
+        for gesture in gestures:
+            kind, args = gesture[0], gesture[1:]
+            if kind == "tap":
+                lines += self._contact(args[0], args[1], down=True)
+                lines.append(f"sleep {TAP_HOLD:g}")
+                lines += self._release()
+            elif kind == "swipe":
+                start_x, start_y, end_x, end_y, duration_ms = args
+                lines += self._contact(start_x, start_y, down=True)
+                for x, y in swipe_points(start_x, start_y, end_x, end_y, duration_ms):
+                    lines.append(f"sleep {SWIPE_STEP:g}")
+                    lines += self._contact(x, y)
+                lines += self._release()
+            elif kind == "down":
+                lines += self._contact(args[0], args[1], down=True)
+            elif kind == "move":
+                lines += self._contact(args[0], args[1])
+            elif kind == "up":
+                lines += self._contact(args[0], args[1])
+                lines += self._release()
+            elif kind == "sleep":
+                lines.append(f"sleep {args[0]:g}")
+        return "\n".join(lines)
+
+    def write(self, payload):
+        output = self.shell.run(payload)
+        if "denied" in output or "not found" in output:
+            raise SetupError(output.splitlines()[0])
+        return output
+
+    def close(self):
+        self.shell.close()
+
+class MonkeyBackend(InputBackend):
+    """
+    Commands to `monkey --port` over a forwarded TCP socket. Monkey is started
+    on first use and answers every command line with OK or ERROR.
+    """
+
+    name = "monkey"
+
+    def __init__(self, *args, device_port=1080, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.device_port = device_port
+        self.local_port = None
+        self.process = None
+        self.connection = None
+        self.replies = None
+
+    def _connect(self):
+        if self.connection is not None:
+            return
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.local_port = probe.getsockname()[1]
+        forward = subprocess.run(self.adb_command('forward', f'tcp:{self.local_port}', f'tcp:{self.device_port}'), capture_output=True, text=True, timeout=SEND_TIMEOUT)
+        if forward.returncode != 0:
+            raise SetupError(f"adb forward failed: {forward.stderr.strip()}")
+        self.process = subprocess.Popen(
+            self.adb_command('shell', 'monkey', '--port', self.device_port),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + SEND_TIMEOUT
+        while True:
+            try:
+                self.connection = socket.create_connection(("127.0.0.1", self.local_port), timeout=SEND_TIMEOUT)
+                self.replies = self.connection.makefile("r")
+                # The forward accepts before monkey listens, a reply proves the channel works
+                self.connection.sendall(b"wake\n")
+                if self.replies.readline():
+                    break
+                raise ConnectionError("monkey closed the connection")
+            except OSError as e:
+                self._disconnect()
+                if time.monotonic() >= deadline:
+                    raise SetupError(f"monkey not reachable on tcp:{self.local_port}: {e}")
+                time.sleep(0.3)
+        debug_print(f"[DEBUG] monkey input on {self.device_address} via tcp:{self.local_port}")
+
+    def _disconnect(self):
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = None
+        self.replies = None
+
+    def encode(self, gestures):
+        lines = []
+        for gesture in gestures:
+            kind, args = gesture[0], gesture[1:]
+            if kind == "tap":
+                lines += [f"touch down {args[0]} {args[1]}", f"sleep {round(TAP_HOLD * 1000)}", f"touch up {args[0]} {args[1]}"]
+            elif kind == "swipe":
+                start_x, start_y, end_x, end_y, duration_ms = args
+                lines.append(f"touch down {start_x} {start_y}")
+                for x, y in swipe_points(start_x, start_y, end_x, end_y, duration_ms):
+                    lines += [f"sleep {round(SWIPE_STEP * 1000)}", f"touch move {x} {y}"]
+                lines.append(f"touch up {end_x} {end_y}")
+            elif kind in ("down", "move", "up"):
+                lines.append(f"touch {kind} {args[0]} {args[1]}")
+            elif kind == "sleep":
+                lines.append(f"sleep {round(args[0] * 1000)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, payload):
+        self._connect()
+        try:
+            self.connection.sendall(payload.encode())
+            for _ in range(payload.count("\n")):
+                reply = self.replies.readline().strip()
+                if not reply:
+                    raise ConnectionError("monkey closed the connection")
+                if reply != "OK":
+                    debug_print(f"[DEBUG] monkey replied {reply!r}")
+        except OSError:
+            self._disconnect()
+            raise
+        return ""
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.sendall(b"quit\n")
+            except OSError:
+                pass
+        self._disconnect()
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+        self.process = None
+        if self.local_port is not None:
+            subprocess.run(self.adb_command('forward', '--remove', f'tcp:{self.local_port}'), capture_output=True)
+
+BACKENDS = {backend.name: backend for backend in (ShellInputBackend, SendeventBackend, MonkeyBackend)}
+
+def create_input_backend(name=None, device_address=None, capture=False, **kwargs):
+    """Backend from adb_config (input_backend, input_delay), arguments override the config"""
+    adb_config = load_config()
+    name = name or adb_config.get('input_backend', 'input')
+    device_address = device_address if device_address is not None else current_device(adb_config)
+    if name != 'input' and fake_device_for(device_address) is not None:
+        # Fake devices only understand `input` commands
+        name = 'input'
+    if name not in BACKENDS:
+        print(f"[WARNING] Unknown input backend '{name}', using 'input'")
+        name = 'input'
+    kwargs.setdefault('input_delay', adb_config.get('input_delay'))
+    return BACKENDS[name](
+        device_address,
+        adb_config.get('adb_path', 'adb'),
+        capture=capture,
+        **kwargs
+    )
+
+_backends = {}
+_backends_lock = threading.Lock()
+_override = None
+
+def get_input_backend():
+    """Backend for the device the caller is bound to, created on first use"""
+    if _override is not None:
+        return _override
+    device_address = current_device()
+    with _backends_lock:
+        backend = _backends.get(device_address)
+        if backend is None:
+            backend = create_input_backend(device_address=device_address)
+            _backends[device_address] = backend
+        return backend
+
+def use_input_backend(backend):
+    """Send every gesture through `backend` (e.g. a capture backend), None restores the configured ones"""
+    global _override
+    _override = backend
+
+def close_input_backends():
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
@@ -0,0 +1,215 @@
+import json
+import numpy as np
+from PIL import Image, ImageStat
+
+from utils.adb_recognizer import match_template
+from utils.adb_screenshot import take_screenshot
+from utils.constants_phone import RACE_CARD_REGION
+from utils.skill_recognizer import (
+    perform_swipe, estimate_scroll_offset, wait_for_still_list, remove_overlapping_rectangles,
+    SCROLL_SEARCH_MARGIN, SCROLL_MATCH_MAX_ERROR, SCROLL_END_OFFSET
+)
+from utils.config_file import CONFIG_FILE
+from utils import clock
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+# Scrolling race list of the race menu (left, top, right, bottom)
+RACE_LIST_REGION = (0, 1000, 1080, 1800)
+RACE_SWIPE_X = 378
+RACE_SWIPE_LOW_Y = 1425
+RACE_SWIPE_HIGH_Y = 1106
+RACE_SWIPE_DURATION = 500
+RACE_LIST_SWIPES = 4  # Swipes past the first screen, same reach as the old search
+RACE_SETTLE_TIME = 0.2
+RACE_TAP_MARGIN = 60  # A card is tapped only when its match track is this far inside the list
+MAX_RETURN_SWIPES = 6
+
+G1_TEMPLATE = "assets/ui/g1_race.png"
+MATCH_TRACK_TEMPLATE = "assets/ui/match_track.png"
+
+def _settled_frame(frame, distance):
+    """
+    Screenshot after a swipe and how far the list moved since `frame`.
+    A frame that doesn't line up with the previous one is still scrolling, so the
+    list is then polled until it stops.
+    """
+    clock.sleep(RACE_SETTLE_TIME)
+    next_frame = take_screenshot()
+    moved, error = estimate_scroll_offset(frame, next_frame, max_offset=distance + SCROLL_SEARCH_MARGIN, region=RACE_LIST_REGION)
+    if error > SCROLL_MATCH_MAX_ERROR:
+        next_frame = wait_for_still_list(next_frame, region=RACE_LIST_REGION)
+        moved, error = estimate_scroll_offset(frame, next_frame, max_offset=distance + SCROLL_SEARCH_MARGIN, region=RACE_LIST_REGION)
+    return next_frame, moved
+
+def capture_race_list(max_swipes=RACE_LIST_SWIPES):
+    """
+    Capture every scroll position of the race list once.
+
+    Returns:
+        list: [(top, frame), ...] - list coordinate of the list region top for each frame
+              (0 = where the capture started) and the screenshot there
+    """
+    distance = RACE_SWIPE_LOW_Y - RACE_SWIPE_HIGH_Y
+    frame = take_screenshot()
+    frames = [(0, frame)]
+    top = 0
+    for swipe_index in range(max_swipes):
+        debug_print(f"[DEBUG] Swiping race list (attempt {swipe_index + 1}/{max_swipes})")
+        if not perform_swipe(RACE_SWIPE_X, RACE_SWIPE_LOW_Y, RACE_SWIPE_X, RACE_SWIPE_HIGH_Y, RACE_SWIPE_DURATION):
+            print("[ERROR] Failed to scroll race list")
+            break
+        frame, moved = _settled_frame(frame, distance)
+        if moved <= SCROLL_END_OFFSET:
+            debug_print("[DEBUG] Race list did not move, end of list")
+            break
+        top += moved
+        frames.append((top, frame))
+        debug_print(f"[DEBUG] Race list scrolled {moved}px, list top now {top}")
+    return frames
+
+def build_race_panorama(frames):
+    """One tall image of the race list, each frame pasted at its list offset"""
+    left, region_top, right, region_bottom = RACE_LIST_REGION
+    height = frames[-1][0] + (region_bottom - region_top)
+    panorama = Image.new("RGB", (right - left, height))
+    for top, frame in frames:
+        panorama.paste(frame.crop(RACE_LIST_REGION).convert("RGB"), (0, top))
+    return panorama
+
+def find_race_candidates(panorama, g1_confidence=0.9, track_confidence=0.6, brightness_threshold=180.0):
+    """
+    All races with matching aptitude on the panorama, best first.
+    G1 badges and match tracks are each matched once over the whole list.
+
+    Returns:
+        list: [{'x', 'list_y': match track center in panorama coordinates, 'is_g1'}, ...],
+              G1 races first, then in list order
+    """
+    g1_cards = remove_overlapping_rectangles(match_template(panorama, G1_TEMPLATE, g1_confidence) or [])
+    tracks = remove_overlapping_rectangles(match_template(panorama, MATCH_TRACK_TEMPLATE, track_confidence) or [])
+    debug_print(f"[DEBUG] Race panorama {panorama.size}: {len(g1_cards)} G1 card(s), {len(tracks)} match track(s)")
+
+    grayscale = panorama.convert("L")
+    candidates = []
+    for x, y, w, h in tracks:
+        brightness = ImageStat.Stat(grayscale.crop((x, y, x + w, y + h))).mean[0]
+        debug_print(f"[DEBUG] match_track bbox=({x},{y},{w},{h}) brightness={brightness:.1f} (thr {brightness_threshold})")
+        if brightness <= brightness_threshold:
+            continue
+        center_x, center_y = x + w // 2, y + h // 2
+        # Same card area the old search used around each G1 badge
+        is_g1 = any(
+            cx <= center_x < cx + RACE_CARD_REGION[2] and cy <= center_y < cy + RACE_CARD_REGION[3]
+            for cx, cy, _, _ in g1_cards
+        )
+        candidates.append({'x': center_x, 'list_y': center_y, 'is_g1': is_g1})
+
+    candidates.sort(key=lambda candidate: (not candidate['is_g1'], candidate['list_y']))
+    return candidates
+
+def _tap_window(top):
+    """Range of list coordinates that can be tapped with the list region at `top`"""
+    height = RACE_LIST_REGION[3] - RACE_LIST_REGION[1]
+    return top + RACE_TAP_MARGIN, top + height - RACE_TAP_MARGIN
+
+def scroll_race_list_to(top, frame, list_y):
+    """
+    Swipe the race list back until list_y is inside the tap window, measuring every swipe.
+
+    Returns:
+        tuple: (top, frame) - measured list top and the frame there
+    """
+    swipes = 0
+    while swipes < MAX_RETURN_SWIPES:
+        low, high = _tap_window(top)
+        if low <= list_y <= high:
+            break
+        # Aim for the middle of the list region
+        delta = list_y - (low + high) // 2
+        distance = min(abs(delta), RACE_SWIPE_LOW_Y - RACE_SWIPE_HIGH_Y)
+        if delta > 0:
+            success = perform_swipe(RACE_SWIPE_X, RACE_SWIPE_LOW_Y, RACE_SWIPE_X, RACE_SWIPE_LOW_Y - distance, RACE_SWIPE_DURATION)
+        else:
+            success = perform_swipe(RACE_SWIPE_X, RACE_SWIPE_HIGH_Y, RACE_SWIPE_X, RACE_SWIPE_HIGH_Y + distance, RACE_SWIPE_DURATION)
+        swipes += 1
+        if not success:
+            print("[ERROR] Failed to scroll race list")
+            break
+
+        clock.sleep(RACE_SETTLE_TIME)
+        next_frame = wait_for_still_list(region=RACE_LIST_REGION)
+        if delta > 0:
+            moved, _ = estimate_scroll_offset(frame, next_frame, max_offset=distance + SCROLL_SEARCH_MARGIN, region=RACE_LIST_REGION)
+        else:
+            moved, _ = estimate_scroll_offset(next_frame, frame, max_offset=distance + SCROLL_SEARCH_MARGIN, region=RACE_LIST_REGION)
+        frame = next_frame
+        if moved <= SCROLL_END_OFFSET:
+            debug_print("[DEBUG] Race list did not move")
+            break
+        top += moved if delta > 0 else -moved
+        debug_print(f"[DEBUG] Race list scrolled {moved}px back, list top now {top}")
+    return top, frame
+
+def _locate_track_near(frame, x, y, confidence=0.6):
+    """Match track center closest to the expected screen position, None if there is none"""
+    h = RACE_CARD_REGION[3] // 2
+    region_top = max(RACE_LIST_REGION[1], y - h)
+    region_bottom = min(RACE_LIST_REGION[3], y + h)
+    region = (0, region_top, RACE_LIST_REGION[2], region_bottom - region_top)
+    matches = match_template(frame, MATCH_TRACK_TEMPLATE, confidence, region)
+    if not matches:
+        return None
+    centers = [(mx + mw // 2, my + mh // 2) for mx, my, mw, mh in matches]
+    return min(centers, key=lambda center: abs(center[0] - x) + abs(center[1] - y))
+
+def find_best_race(prioritize_g1=False, max_swipes=RACE_LIST_SWIPES):
+    """
+    Scan the whole race list once and bring the best race with matching aptitude into view.
+
+    The list is captured once per scroll position, the frames are stitched into one
+    panorama by their measured offsets, and G1 badges and match tracks are detected
+    once on it. The list is then scrolled straight back to the chosen card.
+
+    Args:
+        prioritize_g1: Only consider G1 races
+        max_swipes: Swipes past the first screen
+
+    Returns:
+        tuple: (x, y) screen position to tap for the chosen race, or None if no race qualifies
+    """
+    frames = capture_race_list(max_swipes)
+    panorama = build_race_panorama(frames)
+    candidates = find_race_candidates(panorama)
+    if prioritize_g1:
+        candidates = [candidate for candidate in candidates if candidate['is_g1']]
+    debug_print(f"[DEBUG] Race candidates (G1 priority: {prioritize_g1}): {candidates}")
+    if not candidates:
+        return None
+
+    best = candidates[0]
+    top, frame = frames[-1]
+    top, frame = scroll_race_list_to(top, frame, best['list_y'])
+    low, high = _tap_window(top)
+    if not low <= best['list_y'] <= high:
+        debug_print(f"[DEBUG] Could not scroll race at list y {best['list_y']} into view (list top {top})")
+        return None
+
+    expected_y = RACE_LIST_REGION[1] + best['list_y'] - top
+    position = _locate_track_near(frame, best['x'], expected_y)
+    if position is None:
+        debug_print(f"[DEBUG] Match track not re-found near ({best['x']}, {expected_y}), tapping expected position")
+        position = (best['x'], expected_y)
+    debug_print(f"[DEBUG] Selected {'G1 ' if best['is_g1'] else ''}race at {position}")
+    return position
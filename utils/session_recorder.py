@@ -0,0 +1,281 @@
+"""Session recorder.
+
+Records a live run into one archive directory instead of scattered debug
+images:
+
+    meta.json       format version, start time, chunk size
+    frames.jsonl    one line per unique frame: id, hash, chunk, offset, size,
+                    key frame id, shape
+    frames/chunk_00000.bin ...
+                    zlib-compressed frames, `chunk_frames` per file. The first
+                    frame of a chunk is its key frame, stored whole; the others
+                    are stored as the difference to it, which is mostly zeros
+                    when only part of the screen moves
+    events.jsonl    timeline: frame (id), action (input gestures), ocr (text),
+                    decision (career state reads and actions), each with
+                    its utils.clock time
+
+Frames are deduplicated by content hash, so a screen that doesn't change is
+stored once however often it is captured. Hashing, compression and writing
+happen on a background thread, the capture path only queues the image; if
+the writer falls behind, frames are dropped rather than slowing the bot.
+SessionReader streams frames and events lazily; a frame is only read and
+decompressed when it is used.
+
+The bot calls record_frame / record_action / record_ocr / record_decision
+from the screenshot, input and OCR paths; they do nothing unless a recording
+was started with start_recording().
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from utils.config_file import CONFIG_FILE
+from utils import clock
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    config = {}
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+RECORDER_CONFIG = config.get("session_recorder", {})
+RECORDINGS_DIR = RECORDER_CONFIG.get("path", "recordings")
+CHUNK_FRAMES = RECORDER_CONFIG.get("chunk_frames", 16)
+ARCHIVE_VERSION = 2
+COMPRESSION_LEVEL = 1  # zlib level, higher is slower for little gain on screenshots
+QUEUE_SIZE = 32  # Items waiting for the writer thread, frames are dropped beyond this
+
+class SessionRecorder:
+    """Writes one session archive (see module docstring)"""
+
+    def __init__(self, path, chunk_frames=CHUNK_FRAMES):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        os.makedirs(os.path.join(path, "frames"), exist_ok=True)
+        self.start = clock.time()
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": ARCHIVE_VERSION, "started": self.start, "chunk_frames": chunk_frames}, f, indent=2)
+        self.events_file = open(os.path.join(path, "events.jsonl"), "w", encoding="utf-8", buffering=1)
+        self.frames_file = open(os.path.join(path, "frames.jsonl"), "w", encoding="utf-8", buffering=1)
+        self.frame_ids = {}
+        self.chunk_file = None
+        self.chunk_index = -1
+        self.chunk_rows = 0
+        self.key_id = None
+        self.key_pixels = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.writer = threading.Thread(target=self._write_loop, name="session-recorder", daemon=True)
+        self.writer.start()
+
+    def _write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                if item[0] == "frame":
+                    self._write_frame(*item[1:])
+                else:
+                    self.events_file.write(item[1] + "\n")
+            except Exception as e:
+                print(f"[WARNING] Session recorder could not write {item[0]}: {e}")
+
+    def _event(self, event_type, **fields):
+        line = {"t": round(clock.time(), 4), "type": event_type}
+        line.update(fields)
+        # Serialized now, the caller may change its state dict before the writer gets to it
+        self.queue.put(("event", json.dumps(line, default=str)))
+
+    def _store(self, frame_id, pixels):
+        """Compress a new frame into the current chunk, starting a new chunk when needed"""
+        if self.chunk_file is None or self.chunk_rows == self.chunk_frames or self.key_pixels.shape != pixels.shape:
+            self._close_chunk()
+            self.chunk_index += 1
+            self.chunk_file = open(os.path.join(self.path, "frames", f"chunk_{self.chunk_index:05d}.bin"), "wb")
+            self.chunk_rows = 0
+            self.key_id, self.key_pixels = frame_id, pixels
+            data = pixels
+        else:
+            # uint8 difference wraps around, adding it back restores the frame exactly
+            data = pixels - self.key_pixels
+        payload = zlib.compress(data.tobytes(), COMPRESSION_LEVEL)
+        offset = self.chunk_file.tell()
+        self.chunk_file.write(payload)
+        # Frame bytes reach the file before the index line that points at them
+        self.chunk_file.flush()
+        self.chunk_rows += 1
+        self.bytes_written += len(payload)
+        return {"chunk": self.chunk_index, "offset": offset, "size": len(payload), "key": self.key_id}
+
+    def _close_chunk(self):
+        if self.chunk_file is not None:
+            self.chunk_file.close()
+            self.chunk_file = None
+
+    def _write_frame(self, t, image):
+        pixels = np.asarray(image.convert("RGB"), dtype=np.uint8)
+        digest = hashlib.blake2b(pixels.tobytes(), digest_size=12).hexdigest()
+        frame_id = self.frame_ids.get(digest)
+        if frame_id is None:
+            frame_id = len(self.frame_ids)
+            self.frame_ids[digest] = frame_id
+            entry = {"id": frame_id, "hash": digest}
+            entry.update(self._store(frame_id, pixels))
+            entry["shape"] = list(pixels.shape)
+            self.frames_file.write(json.dumps(entry) + "\n")
+        self.events_file.write(json.dumps({"t": t, "type": "frame", "frame": frame_id}) + "\n")
+
+    def frame(self, image):
+        """Queue a captured frame for the writer thread"""
+        self.frames_captured += 1
+        try:
+            self.queue.put_nowait(("frame", round(clock.time(), 4), image))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def action(self, backend, gestures):
+        # Coordinates often come straight from numpy match results
+        gestures = [[value.item() if hasattr(value, "item") else value for value in gesture] for gesture in gestures]
+        self._event("action", backend=backend, gestures=gestures)
+
+    def ocr(self, text, ocr_config="", shape=None):
+        self._event("ocr", text=text, config=ocr_config, shape=list(shape) if shape is not None else None)
+
+    def decision(self, kind, data):
+        self._event("decision", kind=kind, data=data)
+
+    def close(self):
+        """Write everything still queued and close the archive"""
+        self.queue.put(None)
+        self.writer.join()
+        self._close_chunk()
+        self.events_file.close()
+        self.frames_file.close()
+        print(f"[INFO] Session recorded to {self.path}: {self.frames_captured} frames captured, {len(self.frame_ids)} unique, {self.frames_dropped} dropped, {self.bytes_written / 1e6:.1f} MB")
+
+class SessionReader:
+    """Lazy access to a recorded session archive"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "frames.jsonl"), "r", encoding="utf-8") as f:
+            self.frame_index = [json.loads(line) for line in f if line.strip()]
+        self._chunks = {}
+        self._key = (None, None)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame_index)
+
+    def _chunk(self, chunk):
+        if chunk not in self._chunks:
+            if self.meta.get("version", 1) == 1:
+                # Version 1 archives: uncompressed .npy chunks
+                self._chunks[chunk] = np.load(os.path.join(self.path, "frames", f"chunk_{chunk:05d}.npy"), mmap_mode="r")
+            else:
+                self._chunks[chunk] = open(os.path.join(self.path, "frames", f"chunk_{chunk:05d}.bin"), "rb")
+        return self._chunks[chunk]
+
+    def _decode(self, entry):
+        chunk_file = self._chunk(entry["chunk"])
+        chunk_file.seek(entry["offset"])
+        data = zlib.decompress(chunk_file.read(entry["size"]))
+        return np.frombuffer(data, dtype=np.uint8).reshape(entry["shape"])
+
+    def frame_array(self, frame_id):
+        """(height, width, 3) uint8 array of a frame, read from disk on access"""
+        entry = self.frame_index[frame_id]
+        with self.lock:
+            if self.meta.get("version", 1) == 1:
+                return self._chunk(entry["chunk"])[entry["row"]]
+            if entry["key"] == frame_id:
+                return self._decode(entry)
+            key_id, key_pixels = self._key
+            if key_id != entry["key"]:
+                key_pixels = self._decode(self.frame_index[entry["key"]])
+                self._key = (entry["key"], key_pixels)
+            return key_pixels + self._decode(entry)
+
+    def frame(self, frame_id):
+        """Frame as a PIL Image"""
+        return Image.fromarray(np.asarray(self.frame_array(frame_id)))
+
+    def iter_frames(self):
+        """(frame id, array) for every unique frame, in recording order"""
+        for entry in self.frame_index:
+            yield entry["id"], self.frame_array(entry["id"])
+
+    def events(self, types=None):
+        """Timeline events, optionally only some types ("frame", "action", "ocr", "decision")"""
+        with open(os.path.join(self.path, "events.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if types is None or event["type"] in types:
+                    yield event
+
+    def close(self):
+        for chunk in self._chunks.values():
+            if hasattr(chunk, "close"):
+                chunk.close()
+        self._chunks = {}
+
+_recorder = None
+
+def start_recording(path=None, chunk_frames=CHUNK_FRAMES):
+    """Start recording into `path` (default: recordings/<date>_<time>)"""
+    global _recorder
+    stop_recording()
+    if path is None:
+        path = os.path.join(RECORDINGS_DIR, time.strftime("%Y%m%d_%H%M%S"))
+    _recorder = SessionRecorder(path, chunk_frames)
+    print(f"[INFO] Recording session to {path}")
+    return _recorder
+
+def stop_recording():
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+
+def get_recorder():
+    return _recorder
+
+def record_frame(image):
+    if _recorder is not None:
+        _recorder.frame(image)
+
+def record_action(backend, gestures):
+    if _recorder is not None:
+        _recorder.action(backend, gestures)
+
+def record_ocr(text, ocr_config="", shape=None):
+    if _recorder is not None:
+        _recorder.ocr(text, ocr_config, shape)
+
+def record_decision(kind, data):
+    """Career state listener: ("action", name) and ("state", state dict)"""
+    if _recorder is not None:
+        _recorder.decision(kind, data)
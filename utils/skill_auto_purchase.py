@@ -1,21 +1,40 @@
-import time
 import os
 import json
-from utils.skill_recognizer import take_screenshot, perform_swipe, recognize_skill_up_locations
-from utils.skill_purchase_optimizer import fuzzy_match_skill_name
-from utils.adb_screenshot import run_adb_command
+import numpy as np
+from utils.skill_recognizer import (
+    take_screenshot, perform_swipe, recognize_skill_up_locations, extract_skills_info,
+    estimate_scroll_offset, wait_for_still_list, SKILL_LIST_REGION
+)
+from utils.skill_lexicon import SkillNameIndex, canonical_skill_name
+from utils.adb_input import tap, tap_many, input_batch
+from utils.adb_screenshot import current_device
+from utils.config_file import CONFIG_FILE
+from utils import clock
+from utils.timing_profile import settle
 
 # Load config for debug mode
 try:
-    with open("config.json", "r") as f:
+    with open(CONFIG_FILE, "r") as f:
         config = json.load(f)
     DEBUG_MODE = config.get("debug_mode", False)
 except:
     DEBUG_MODE = False
 
-# Global cache for skill points to avoid re-detection
-_skill_points_cache = None
-_cache_timestamp = 0
+# Finger positions for scroll swipes, both inside the skill list
+SCROLL_SWIPE_X = 504
+SCROLL_SWIPE_LOW_Y = 1550
+SCROLL_SWIPE_HIGH_Y = 750
+MAX_SWIPE_DISTANCE = SCROLL_SWIPE_LOW_Y - SCROLL_SWIPE_HIGH_Y
+SKILL_UP_BUTTON_HEIGHT = 38  # assets/buttons/skill_up.png
+SCROLL_TOLERANCE = 20  # Pixels a stop may be missed by
+MAX_SWIPES_PER_STOP = 4
+BUTTON_MATCH_TOLERANCE = 40  # Pixels between expected and detected button y
+# A purchase registered when this share of the skill row pixels changed after the tap
+PURCHASE_DIFF_LEVEL = 24
+PURCHASE_DIFF_RATIO = 0.03
+
+# Cache for skill points to avoid re-detection: device address -> (points, timestamp)
+_skill_points_cache = {}
 _cache_lifetime = 300  # Cache valid for 5 minutes
 
 def debug_print(message):
@@ -24,23 +43,23 @@ def debug_print(message):
         print(message)
 
 def cache_skill_points(points: int):
-    """Cache skill points for reuse (called from race day detection)"""
-    global _skill_points_cache, _cache_timestamp
-    _skill_points_cache = points
-    _cache_timestamp = time.time()
+    """Cache skill points of the current device for reuse (called from race day detection)"""
+    _skill_points_cache[current_device()] = (points, clock.time())
     debug_print(f"[DEBUG] Cached skill points: {points}")
 
 def get_cached_skill_points() -> int | None:
-    """Get cached skill points if still valid, None if expired/missing"""
-    global _skill_points_cache, _cache_timestamp
-    if _skill_points_cache is None:
+    """Get the current device's cached skill points if still valid, None if expired/missing"""
+    device_address = current_device()
+    cached = _skill_points_cache.get(device_address)
+    if cached is None:
         return None
-    if time.time() - _cache_timestamp > _cache_lifetime:
+    points, timestamp = cached
+    if clock.time() - timestamp > _cache_lifetime:
         debug_print("[DEBUG] Skill points cache expired")
-        _skill_points_cache = None
+        _skill_points_cache.pop(device_address, None)
         return None
-    debug_print(f"[DEBUG] Using cached skill points: {_skill_points_cache}")
-    return _skill_points_cache
+    debug_print(f"[DEBUG] Using cached skill points: {points}")
+    return points
 
 def extract_skill_points(screenshot=None):
     """
@@ -75,15 +94,15 @@ def extract_skill_points(screenshot=None):
         debug_print("[DEBUG] Saved skill points debug image: debug_skill_points.png")
         
         # Optimized OCR - precise region makes simple approach work perfectly
-        import pytesseract
-        skill_points_raw = pytesseract.image_to_string(points_crop, lang='eng').strip()
+        from core.ocr import cached_image_to_string
+        skill_points_raw = cached_image_to_string(points_crop, lang='eng').strip()
         debug_print(f"[DEBUG] OCR result: '{skill_points_raw}'")
         
         # Fallback with digits-only if simple OCR fails (rare with current precision)
         if not skill_points_raw:
             debug_print("[DEBUG] Fallback: Using enhanced OCR with digits-only filter")
             enhanced_crop = enhance_image_for_ocr(points_crop)
-            skill_points_raw = pytesseract.image_to_string(enhanced_crop, config='--psm 8 -c tessedit_char_whitelist=0123456789').strip()
+            skill_points_raw = cached_image_to_string(enhanced_crop, config='--psm 8 -c tessedit_char_whitelist=0123456789').strip()
             debug_print(f"[DEBUG] Fallback result: '{skill_points_raw}'")
         
         # Clean and extract numbers
@@ -164,8 +183,7 @@ def click_skill_up_button(x, y):
         bool: True if click was successful, False otherwise
     """
     try:
-        click_command = ['shell', 'input', 'tap', str(x), str(y)]
-        result = run_adb_command(click_command)
+        result = tap(x, y)
         if result is not None:
             debug_print(f"[DEBUG] Clicked skill_up button at ({x}, {y})")
             return True
@@ -235,12 +253,12 @@ def click_image_button(image_path, description="button", max_attempts=10, wait_b
                 
                 # Wait before next attempt (except on last attempt)
                 if attempt < max_attempts - 1:
-                    time.sleep(wait_between_attempts)
+                    clock.sleep(wait_between_attempts)
                     
             except Exception as e:
                 print(f"[WARNING] Error in attempt {attempt + 1}: {e}")
                 if attempt < max_attempts - 1:
-                    time.sleep(wait_between_attempts)
+                    clock.sleep(wait_between_attempts)
         
         print(f"[ERROR] {description} not found after {max_attempts} attempts")
         return False
@@ -255,24 +273,233 @@ def fast_swipe_to_top():
     """
     print("[INFO] Fast scrolling to top of skill list")
     
-    for i in range(8):
-        debug_print(f"[DEBUG] Fast swipe {i+1}/8")
-        success = perform_swipe(504, 800, 504, 1400, duration=300)  # Swipe DOWN on screen to scroll UP in list
-        if success:
-            time.sleep(0.3)  # Short wait between fast swipes
-        else:
-            print(f"[WARNING] Fast swipe {i+1} failed")
+    # All eight swipes in one send, with a short wait between them
+    with input_batch(interval=0.3):
+        for i in range(8):
+            debug_print(f"[DEBUG] Fast swipe {i+1}/8")
+            perform_swipe(504, 800, 504, 1400, duration=300)  # Swipe DOWN on screen to scroll UP in list
     
     debug_print("[DEBUG] Waiting for UI to settle")
-    time.sleep(1.5)  # Reduced wait time
+    settle("skill_list_top")
+
+def _button_visible(list_y, top, margin=0):
+    """True if a skill_up button at list_y is fully inside the list (with `margin` to spare)
+    when the screen top is at `top`"""
+    screen_y = list_y - top
+    return SKILL_LIST_REGION[1] + margin <= screen_y <= SKILL_LIST_REGION[3] - SKILL_UP_BUTTON_HEIGHT - margin
+
+def plan_scroll_stops(target_ys, current_top, max_top=None):
+    """
+    Fewest list positions that show every target, in visiting order.
+    Targets visible now are bought first, then the list is swept once toward
+    the side that is cheaper to visit first and once toward the other side.
+    
+    Args:
+        target_ys: List coordinates (list_y) of the skills to buy
+        current_top: List coordinate of the screen top now
+        max_top: Largest reachable screen top (end of list), optional
+    
+    Returns:
+        list: [(top, [list_y, ...]), ...]
+    """
+    # Keep targets SCROLL_TOLERANCE away from the edges, a stop can be missed by that much
+    view_top = SKILL_LIST_REGION[1] + SCROLL_TOLERANCE
+    view_bottom = SKILL_LIST_REGION[3] - SKILL_UP_BUTTON_HEIGHT - SCROLL_TOLERANCE
+    
+    stops = []
+    here = [y for y in target_ys if _button_visible(y, current_top)]
+    if here:
+        stops.append((current_top, sorted(here)))
+    above = sorted((y for y in target_ys if y not in here and y - current_top < view_top), reverse=True)
+    below = sorted(y for y in target_ys if y not in here and y - current_top >= view_top)
+    
+    def sweep(ys, upward):
+        sweep_stops = []
+        while ys:
+            if upward:
+                # Highest remaining target at the bottom edge, the view covers everything above it
+                top = max(0, ys[0] - view_bottom)
+            else:
+                # Lowest remaining target at the top edge
+                top = ys[0] - view_top
+                if max_top is not None:
+                    top = min(top, max_top)
+            covered = [y for y in ys if _button_visible(y, top, SCROLL_TOLERANCE)]
+            if not covered:
+                covered = [ys[0]]
+            sweep_stops.append((top, sorted(covered)))
+            ys = [y for y in ys if y not in covered]
+        return sweep_stops
+    
+    up_stops = sweep(above, True)
+    down_stops = sweep(below, False)
+    up_distance = current_top - up_stops[-1][0] if up_stops else 0
+    down_distance = down_stops[-1][0] - current_top if down_stops else 0
+    # Going one way first means coming back over that distance
+    if 2 * up_distance + down_distance <= 2 * down_distance + up_distance:
+        stops.extend(up_stops + down_stops)
+    else:
+        stops.extend(down_stops + up_stops)
+    return stops
+
+def _scroll_list_to(top, target_top, frame, slop=0):
+    """
+    Swipe until the screen top is within SCROLL_TOLERANCE of target_top, measuring every swipe.
+    
+    Returns:
+        tuple: (top, frame, swipes, slop) - measured screen top, still frame there,
+               swipes made and the learned touch slop (swipe distance lost per swipe)
+    """
+    swipes = 0
+    while abs(target_top - top) > SCROLL_TOLERANCE and swipes < MAX_SWIPES_PER_STOP:
+        delta = target_top - top
+        distance = min(abs(delta) + slop, MAX_SWIPE_DISTANCE)
+        if delta > 0:
+            # Finger up, list moves toward its end
+            success = perform_swipe(SCROLL_SWIPE_X, SCROLL_SWIPE_LOW_Y, SCROLL_SWIPE_X, SCROLL_SWIPE_LOW_Y - distance)
+        else:
+            success = perform_swipe(SCROLL_SWIPE_X, SCROLL_SWIPE_HIGH_Y, SCROLL_SWIPE_X, SCROLL_SWIPE_HIGH_Y + distance)
+        swipes += 1
+        if not success:
+            print("[ERROR] Failed to scroll skill list")
+            break
+        
+        next_frame = wait_for_still_list()
+        if delta > 0:
+            moved, error = estimate_scroll_offset(frame, next_frame, max_offset=distance + 100)
+        else:
+            moved, error = estimate_scroll_offset(next_frame, frame, max_offset=distance + 100)
+        frame = next_frame
+        if moved <= 2:
+            debug_print("[DEBUG] Skill list did not move, end of list")
+            break
+        top += moved if delta > 0 else -moved
+        slop = max(0, distance - moved)
+        debug_print(f"[DEBUG] Scrolled {moved}px (swipe {distance}px), screen top now {top}")
+    return top, frame, swipes, slop
+
+def _row_box(x, y, w, h):
+    """Skill row area around a skill_up button (button and price)"""
+    return (max(0, x - 120), y, x + w, y + h)
+
+def _row_changed(before, after, box):
+    a = np.asarray(before.crop(box).convert("L"), dtype=np.int16)
+    b = np.asarray(after.crop(box).convert("L"), dtype=np.int16)
+    changed = np.count_nonzero(np.abs(a - b) > PURCHASE_DIFF_LEVEL)
+    return changed >= a.size * PURCHASE_DIFF_RATIO
+
+def _buttons_for_targets(frame, targets, top, target_index, purchase_plan):
+    """
+    Button location of each target on the frame.
+    Buttons are matched by expected screen position; targets not found there
+    are identified by name with one batched OCR pass over the visible buttons.
+    """
+    result = recognize_skill_up_locations(
+        confidence=0.9,
+        debug_output=False,
+        filter_dark_buttons=True,
+        brightness_threshold=150,
+        extract_skills=False,
+        screenshot=frame
+    )
+    locations = list(result.get('locations', []))
+    found = {}
+    for position in targets:
+        expected_y = purchase_plan[position]['list_y'] - top
+        nearest = min(locations, key=lambda loc: abs(loc[1] - expected_y), default=None)
+        if nearest is not None and abs(nearest[1] - expected_y) <= BUTTON_MATCH_TOLERANCE:
+            found[position] = nearest
+            locations.remove(nearest)
+    
+    missing = [position for position in targets if position not in found]
+    if missing and locations:
+        debug_print(f"[DEBUG] {len(missing)} target(s) not at their expected position, reading visible skill names")
+        infos = extract_skills_info(frame, [(x, y) for x, y, w, h in locations])
+        for location, info in zip(locations, infos):
+            position = target_index.best_match(info['name'])
+            if position in missing and position not in found:
+                found[position] = location
+    return found
 
-def execute_skill_purchases(purchase_plan, max_scrolls=20):
+def purchase_skills_by_position(purchase_plan, scroll_offset):
+    """
+    Buy skills using the list positions from scan_all_skills_with_scroll.
+    Scrolls to each planned stop, taps every target button there with one
+    batched input call and checks the taps with one frame diff.
+    
+    Args:
+        purchase_plan: Skills with 'list_y' from the scan
+        scroll_offset: Screen top (list coordinate) where the scan ended
+    
+    Returns:
+        tuple: (purchased_skills, remaining_skills, swipes_performed)
+    """
+    target_index = SkillNameIndex()
+    for position, skill in enumerate(purchase_plan):
+        target_index.add(canonical_skill_name(skill), position)
+        target_index.add(skill['name'], position)
+    
+    positions_by_y = {}
+    for position, skill in enumerate(purchase_plan):
+        positions_by_y.setdefault(skill['list_y'], []).append(position)
+    
+    stops = plan_scroll_stops(list(positions_by_y), scroll_offset, max_top=scroll_offset)
+    debug_print(f"[DEBUG] Scroll stops: {[(top, ys) for top, ys in stops]}")
+    
+    purchased = set()
+    swipes_performed = 0
+    slop = 0
+    top = scroll_offset
+    frame = take_screenshot()
+    for stop_top, ys in stops:
+        top, frame, swipes, slop = _scroll_list_to(top, stop_top, frame, slop)
+        swipes_performed += swipes
+        targets = [position for y in ys for position in positions_by_y[y]]
+        found = _buttons_for_targets(frame, targets, top, target_index, purchase_plan)
+        for position in targets:
+            if position not in found:
+                print(f"[WARNING] Could not find {purchase_plan[position]['name']} on screen")
+        if not found:
+            continue
+        
+        # Tap every target at this stop at once, then check them on one frame
+        taps = {position: (x + w // 2, y + h // 2) for position, (x, y, w, h) in found.items()}
+        for position in found:
+            print(f"[INFO] Purchasing: {purchase_plan[position]['name']}")
+        tap_many(list(taps.values()))
+        after = take_screenshot()
+        unconfirmed = [position for position, location in found.items() if not _row_changed(frame, after, _row_box(*location))]
+        
+        # Tap the ones that didn't react once more
+        if unconfirmed:
+            debug_print(f"[DEBUG] {len(unconfirmed)} tap(s) not registered, retrying")
+            tap_many([taps[position] for position in unconfirmed])
+            retry_frame = take_screenshot()
+            unconfirmed = [position for position in unconfirmed if not _row_changed(frame, retry_frame, _row_box(*found[position]))]
+            after = retry_frame
+        
+        for position in found:
+            if position in unconfirmed:
+                print(f"[ERROR] Failed to purchase: {purchase_plan[position]['name']}")
+            else:
+                purchased.add(position)
+                print(f"[INFO] Successfully purchased: {purchase_plan[position]['name']}")
+        frame = after
+    
+    purchased_skills = [skill for position, skill in enumerate(purchase_plan) if position in purchased]
+    remaining_skills = [skill for position, skill in enumerate(purchase_plan) if position not in purchased]
+    return purchased_skills, remaining_skills, swipes_performed
+
+def execute_skill_purchases(purchase_plan, max_scrolls=20, scroll_offset=None):
     """
     Execute the automated skill purchase plan.
     
     Args:
         purchase_plan: List of skills to purchase (from create_purchase_plan)
         max_scrolls: Maximum number of scrolls to prevent infinite loops
+        scroll_offset: Screen top where scan_all_skills_with_scroll ended (optional).
+                       With it, skills that have a 'list_y' are bought by position
+                       instead of rescanning the list from the top
     
     Returns:
         dict: {
@@ -305,87 +532,103 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20):
     remaining_skills = purchase_plan.copy()
     scrolls_performed = 0
     
+    # Index the targets once, each screen skill is looked up instead of compared to every target
+    target_index = SkillNameIndex()
+    for position, skill in enumerate(purchase_plan):
+        target_index.add(canonical_skill_name(skill), position)
+        target_index.add(skill['name'], position)
+    
     try:
-        # Step 1: Fast swipe to top
-        fast_swipe_to_top()
+        if scroll_offset is not None and all('list_y' in skill for skill in purchase_plan):
+            # Positions known from the scan: scroll straight to the skills
+            print("[INFO] Purchasing skills by list position")
+            purchased_skills, remaining_skills, scrolls_performed = purchase_skills_by_position(purchase_plan, scroll_offset)
+        else:
+            # Step 1: Fast swipe to top
+            fast_swipe_to_top()
         
-        # Step 2: Scroll down slowly to find and purchase skills
-        print("[INFO] Searching for skills to purchase")
+            # Step 2: Scroll down slowly to find and purchase skills
+            print("[INFO] Searching for skills to purchase")
         
-        while remaining_skills and scrolls_performed < max_scrolls:
-            scrolls_performed += 1
-            print(f"\n[INFO] Scroll {scrolls_performed}/{max_scrolls}")
-            debug_print(f"[DEBUG] Looking for: {[s['name'] for s in remaining_skills]}")
+            while remaining_skills and scrolls_performed < max_scrolls:
+                scrolls_performed += 1
+                print(f"\n[INFO] Scroll {scrolls_performed}/{max_scrolls}")
+                debug_print(f"[DEBUG] Looking for: {[s['name'] for s in remaining_skills]}")
             
-            # Scan current screen for available skills
-            result = recognize_skill_up_locations(
-                confidence=0.9,
-                debug_output=False,
-                filter_dark_buttons=True,
-                brightness_threshold=150,
-                extract_skills=True
-            )
+                # Scan current screen for available skills
+                result = recognize_skill_up_locations(
+                    confidence=0.9,
+                    debug_output=False,
+                    filter_dark_buttons=True,
+                    brightness_threshold=150,
+                    extract_skills=True
+                )
             
-            if 'error' in result:
-                print(f"[ERROR] Error during skill detection: {result['error']}")
-                break
+                if 'error' in result:
+                    print(f"[ERROR] Error during skill detection: {result['error']}")
+                    break
             
-            current_skills = result.get('skills', [])
-            if not current_skills:
-                debug_print("[DEBUG] No skills found on this screen")
-            else:
-                debug_print(f"[DEBUG] Found {len(current_skills)} available skills on screen")
+                current_skills = result.get('skills', [])
+                if not current_skills:
+                    debug_print("[DEBUG] No skills found on this screen")
+                else:
+                    debug_print(f"[DEBUG] Found {len(current_skills)} available skills on screen")
                 
-                # Check if any of our target skills are on this screen
-                skills_found_on_screen = []
+                    # Check if any of our target skills are on this screen
+                    skills_found_on_screen = []
                 
-                for target_skill in remaining_skills:
+                    matched_targets = set()
                     for screen_skill in current_skills:
-                        # Use fuzzy matching to find target skills
-                        if fuzzy_match_skill_name(screen_skill['name'], target_skill['name']):
-                            skills_found_on_screen.append({
-                                'target': target_skill,
-                                'screen': screen_skill
-                            })
-                            print(f"[INFO] Found target skill: {screen_skill['name']} (matches {target_skill['name']})")
-                            break
+                        # Use the fuzzy name index to find target skills
+                        position = target_index.best_match(screen_skill['name'])
+                        if position is None or position in matched_targets:
+                            continue
+                        target_skill = purchase_plan[position]
+                        if target_skill not in remaining_skills:
+                            continue
+                        matched_targets.add(position)
+                        skills_found_on_screen.append({
+                            'target': target_skill,
+                            'screen': screen_skill
+                        })
+                        print(f"[INFO] Found target skill: {screen_skill['name']} (matches {target_skill['name']})")
                 
-                # Purchase found skills
-                for match in skills_found_on_screen:
-                    target_skill = match['target']
-                    screen_skill = match['screen']
+                    # Purchase found skills
+                    for match in skills_found_on_screen:
+                        target_skill = match['target']
+                        screen_skill = match['screen']
                     
-                    # Get button coordinates
-                    x, y, w, h = screen_skill['location']
-                    button_center_x = x + w // 2
-                    button_center_y = y + h // 2
+                        # Get button coordinates
+                        x, y, w, h = screen_skill['location']
+                        button_center_x = x + w // 2
+                        button_center_y = y + h // 2
                     
-                    print(f"[INFO] Purchasing: {screen_skill['name']}")
+                        print(f"[INFO] Purchasing: {screen_skill['name']}")
                     
-                    # Click the skill_up button
-                    if click_skill_up_button(button_center_x, button_center_y):
-                        purchased_skills.append(target_skill)
-                        remaining_skills.remove(target_skill)
-                        print(f"[INFO] Successfully purchased: {screen_skill['name']}")
+                        # Click the skill_up button
+                        if click_skill_up_button(button_center_x, button_center_y):
+                            purchased_skills.append(target_skill)
+                            remaining_skills.remove(target_skill)
+                            print(f"[INFO] Successfully purchased: {screen_skill['name']}")
                         
-                        # Short wait after purchase
-                        time.sleep(1)
-                    else:
-                        print(f"[ERROR] Failed to purchase: {screen_skill['name']}")
+                            # Short wait after purchase
+                            clock.sleep(1)
+                        else:
+                            print(f"[ERROR] Failed to purchase: {screen_skill['name']}")
                 
-                # If we found and purchased skills, wait a bit longer
-                if skills_found_on_screen:
-                    time.sleep(1.5)
+                    # If we found and purchased skills, wait a bit longer
+                    if skills_found_on_screen:
+                        clock.sleep(1.5)
             
-            # Continue scrolling if we haven't found all skills
-            if remaining_skills and scrolls_performed < max_scrolls:
-                debug_print("[DEBUG] Scrolling down to find more skills")
-                success = perform_swipe(504, 1492, 504, 926, duration=1000)  # Slow scroll like recognizer
-                if not success:
-                    print("[ERROR] Failed to scroll, stopping search")
-                    break
+                # Continue scrolling if we haven't found all skills
+                if remaining_skills and scrolls_performed < max_scrolls:
+                    debug_print("[DEBUG] Scrolling down to find more skills")
+                    success = perform_swipe(504, 1492, 504, 926, duration=1000)  # Slow scroll like recognizer
+                    if not success:
+                        print("[ERROR] Failed to scroll, stopping search")
+                        break
                 
-                time.sleep(1.5)  # Wait for scroll animation
+                    clock.sleep(1.5)  # Wait for scroll animation
         
         # Step 3: Click confirm button
         if purchased_skills:
@@ -394,18 +637,18 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20):
             confirm_success = click_image_button("assets/buttons/confirm.png", "confirm button", max_attempts=10)
             if confirm_success:
                 debug_print("[DEBUG] Waiting for confirmation")
-                time.sleep(1)  # Reduced wait time
+                clock.sleep(1)  # Reduced wait time
                 
                 # Step 4: Click learn button
                 debug_print("[DEBUG] Looking for learn button")
                 learn_success = click_image_button("assets/buttons/learn.png", "learn button", max_attempts=10)
                 if learn_success:
                     debug_print("[DEBUG] Waiting for learning to complete")
-                    time.sleep(1)  # Reduced wait time
+                    clock.sleep(1)  # Reduced wait time
                     
                     # Step 5: Click close button (wait before it appears)
                     debug_print("[DEBUG] Waiting for close button to appear")
-                    time.sleep(0.5)  # Reduced wait time
+                    clock.sleep(0.5)  # Reduced wait time
                     close_success = click_image_button("assets/buttons/close.png", "close button", max_attempts=10)
                     if close_success:
                         print("[INFO] Skill purchase sequence completed successfully")
@@ -0,0 +1,167 @@
+import json
+import re
+from utils.config_file import CONFIG_FILE
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+# Default similarity for a match, same cut-off as fuzzy_match_skill_name
+MATCH_THRESHOLD = 0.8
+# Candidates (by shared trigrams) verified with edit distance per query
+MAX_CANDIDATES = 10
+
+def normalize_skill_name(name):
+    """
+    Normalize a skill name for matching: lowercase, punctuation dropped, single spaces.
+
+    Args:
+        name: Skill name from OCR or a skill file
+
+    Returns:
+        str: Normalized name
+    """
+    text = str(name).lower()
+    text = re.sub(r"[^\w\s]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Levenshtein distance between a and b, or None once it must exceed max_distance.
+    Only a band of width 2 * max_distance + 1 around the diagonal is computed.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if a == b:
+        return 0
+    big = max_distance + 1
+    previous = [j if j <= max_distance else big for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [big] * (len(b) + 1)
+        current[0] = i if i <= max_distance else big
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[max(0, low - 1):high + 1]) > max_distance:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= max_distance else None
+
+class SkillNameIndex:
+    """
+    Skill names indexed by character trigrams.
+    Names are normalized once when added; a lookup only verifies the entries
+    sharing the most trigrams with the query, with a bounded edit distance.
+    """
+
+    def __init__(self, names=None):
+        self.keys = []
+        self.normalized = []
+        self.postings = {}
+        self.exact = {}
+        for name in names or []:
+            self.add(name)
+
+    def add(self, name, key=None):
+        """Index `name`, lookups return `key` (the name itself by default)"""
+        index = len(self.keys)
+        normalized = normalize_skill_name(name)
+        self.keys.append(name if key is None else key)
+        self.normalized.append(normalized)
+        self.exact.setdefault(normalized, index)
+        for trigram in _trigrams(normalized):
+            self.postings.setdefault(trigram, []).append(index)
+        return index
+
+    def candidates(self, name, threshold=MATCH_THRESHOLD, limit=MAX_CANDIDATES):
+        """
+        Best matches for a name, most similar first.
+
+        Returns:
+            list: [(key, similarity), ...] with similarity >= threshold
+        """
+        normalized = normalize_skill_name(name)
+        if normalized in self.exact:
+            return [(self.keys[self.exact[normalized]], 1.0)]
+
+        shared = {}
+        for trigram in _trigrams(normalized):
+            for index in self.postings.get(trigram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        ranked = sorted(shared, key=lambda index: shared[index], reverse=True)[:limit]
+
+        matches = []
+        for index in ranked:
+            other = self.normalized[index]
+            longest = max(len(normalized), len(other))
+            max_distance = int(longest * (1.0 - threshold))
+            distance = bounded_edit_distance(normalized, other, max_distance)
+            if distance is None:
+                continue
+            matches.append((self.keys[index], 1.0 - distance / longest))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def best_match(self, name, threshold=MATCH_THRESHOLD):
+        """Key of the most similar indexed name, or None below threshold"""
+        matches = self.candidates(name, threshold)
+        if not matches:
+            return None
+        key, similarity = matches[0]
+        if similarity < 1.0:
+            debug_print(f"[DEBUG] Fuzzy match: '{name}' -> '{key}' ({similarity:.2f})")
+        return key
+
+def skill_file_names(skill_config):
+    """All skill names a skill file mentions: priority list, gold skills and their bases, valued skills"""
+    names = list(skill_config.get("skill_priority", []))
+    for gold_skill, base_skill in skill_config.get("gold_skill_upgrades", {}).items():
+        names.extend([gold_skill, base_skill])
+    names.extend(skill_config.get("skill_values", {}).keys())
+    return list(dict.fromkeys(names))
+
+_lexicons = {}
+
+def get_skill_lexicon(skill_config):
+    """
+    Canonical lexicon of the skill file's names, built once per distinct skill file.
+    Shared by the scanner (canonical names for OCR results), the purchase planner
+    and the purchase executor.
+    """
+    names = tuple(skill_file_names(skill_config))
+    lexicon = _lexicons.get(names)
+    if lexicon is None:
+        lexicon = SkillNameIndex(names)
+        _lexicons[names] = lexicon
+    return lexicon
+
+def canonical_skill_name(skill):
+    """Canonical name of a scanned skill dict, falling back to its OCR name"""
+    return skill.get('canonical_name') or skill['name']
+
+def index_available_skills(available_skills):
+    """
+    Index scanned skills by canonical and OCR name.
+    Lookups return the position of the skill in available_skills.
+    """
+    index = SkillNameIndex()
+    for position, skill in enumerate(available_skills):
+        if skill.get('canonical_name'):
+            index.add(skill['canonical_name'], position)
+        index.add(skill['name'], position)
+    return index
@@ -1,11 +1,19 @@
+import contextlib
+import io
 import json
 import os
+import random
+import time
+from itertools import product
 from difflib import SequenceMatcher
+import numpy as np
 from utils.skill_recognizer import scan_all_skills_with_scroll
+from utils.skill_lexicon import index_available_skills
+from utils.config_file import CONFIG_FILE
 
 # Load config for debug mode
 try:
-    with open("config.json", "r") as f:
+    with open(CONFIG_FILE, "r") as f:
         config = json.load(f)
     DEBUG_MODE = config.get("debug_mode", False)
 except:
@@ -29,7 +37,7 @@ def load_skill_config(config_path=None):
     # If no config_path provided, try to load from config.json
     if config_path is None:
         try:
-            with open("config.json", 'r', encoding='utf-8') as f:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
                 main_config = json.load(f)
                 config_path = main_config.get("skill_file", "skills.json")
                 debug_print(f"[DEBUG] Loading skills from config file: {config_path}")
@@ -90,18 +98,15 @@ def find_matching_skill(skill_name, available_skills):
     Returns:
         dict or None: Matching skill dict, or None if not found
     """
-    # Try exact match first
-    for skill in available_skills:
-        if skill['name'].lower().strip() == skill_name.lower().strip():
-            return skill
-    
-    # Try fuzzy matching
-    for skill in available_skills:
-        if fuzzy_match_skill_name(skill['name'], skill_name):
-            debug_print(f"[DEBUG] Fuzzy match: '{skill['name']}' matches '{skill_name}'")
-            return skill
-    
-    return None
+    return _skill_finder(available_skills)(skill_name)
+
+def _skill_finder(available_skills):
+    """Name -> scanned skill lookup backed by one trigram index over the scan"""
+    index = index_available_skills(available_skills)
+    def find(skill_name):
+        position = index.best_match(skill_name)
+        return available_skills[position] if position is not None else None
+    return find
 
 def create_purchase_plan(available_skills, config):
     """
@@ -121,8 +126,8 @@ def create_purchase_plan(available_skills, config):
     skill_priority = config.get("skill_priority", [])
     gold_upgrades = config.get("gold_skill_upgrades", {})
     
-    # Create lookup for available skills (exact match)
-    available_by_name = {skill['name']: skill for skill in available_skills}
+    # Index the scanned names once (exact, then fuzzy match)
+    find_skill = _skill_finder(available_skills)
     
     purchase_plan = []
     
@@ -137,21 +142,21 @@ def create_purchase_plan(available_skills, config):
             base_skill_name = gold_upgrades[priority_skill]
             
             # Rule 1: If gold skill appears → buy it (try exact then fuzzy match)
-            skill = available_by_name.get(priority_skill) or find_matching_skill(priority_skill, available_skills)
+            skill = find_skill(priority_skill)
             if skill:
                 purchase_plan.append(skill)
                 print(f"[INFO] Gold skill found: {skill['name']} - {skill['price']}")
                 
             # Rule 2: If gold not available but base skill appears → buy base
             else:
-                base_skill = available_by_name.get(base_skill_name) or find_matching_skill(base_skill_name, available_skills)
+                base_skill = find_skill(base_skill_name)
                 if base_skill:
                     purchase_plan.append(base_skill)
                     print(f"[INFO] Base skill found: {base_skill['name']} - {base_skill['price']} (for {priority_skill})")
                 
         else:
             # Regular skill - just buy if available (try exact then fuzzy match)
-            skill = available_by_name.get(priority_skill) or find_matching_skill(priority_skill, available_skills)
+            skill = find_skill(priority_skill)
             if skill:
                 purchase_plan.append(skill)
                 print(f"[INFO] Regular skill: {skill['name']} - {skill['price']}")
@@ -202,6 +207,119 @@ def filter_affordable_skills(purchase_plan, available_points):
     
     return affordable_skills, total_cost, remaining_points
 
+# A base skill is worth this share of its gold skill unless the skill file gives it a value
+BASE_SKILL_VALUE_RATIO = 0.5
+
+def skill_value(skill_name, rank, priority_count, config):
+    """
+    Value of a priority skill: explicit weight from the skill file's `skill_values`,
+    otherwise derived from its rank (first skill = priority_count, last = 1).
+    """
+    skill_values = config.get("skill_values", {})
+    if skill_name in skill_values:
+        return float(skill_values[skill_name])
+    return float(priority_count - rank)
+
+def create_purchase_candidates(available_skills, config):
+    """
+    Group the available skills by priority entry.
+    Each group holds the purchasable options of one entry (its gold skill and/or
+    base skill), at most one option per group can be bought.
+    
+    Args:
+        available_skills: List of skill dicts with 'name' and 'price'
+        config: Config dict from skills.json
+    
+    Returns:
+        list: [{'priority_skill': str, 'options': [{'skill': dict, 'cost': int, 'value': float}, ...]}, ...]
+    """
+    skill_priority = config.get("skill_priority", [])
+    gold_upgrades = config.get("gold_skill_upgrades", {})
+    skill_values = config.get("skill_values", {})
+    find_skill = _skill_finder(available_skills)
+    
+    groups = []
+    for rank, priority_skill in enumerate(skill_priority):
+        value = skill_value(priority_skill, rank, len(skill_priority), config)
+        names = [(priority_skill, value)]
+        if priority_skill in gold_upgrades:
+            base_skill_name = gold_upgrades[priority_skill]
+            base_value = float(skill_values.get(base_skill_name, value * BASE_SKILL_VALUE_RATIO))
+            names.append((base_skill_name, base_value))
+        
+        options = []
+        for name, option_value in names:
+            skill = find_skill(name)
+            if not skill:
+                continue
+            if not str(skill['price']).isdigit():
+                print(f"⚠️  {skill['name']:<30} | Invalid price: {skill['price']}")
+                continue
+            options.append({'skill': skill, 'cost': int(skill['price']), 'value': option_value})
+        if options:
+            groups.append({'priority_skill': priority_skill, 'options': options})
+    return groups
+
+def optimize_skill_purchases(candidate_groups, available_points):
+    """
+    Pick the skills with the highest total value that fit the budget.
+    Exact group knapsack: a DP over skill points where each group (gold skill and
+    its base) contributes at most one option. Each group is one vectorized pass
+    over the budget, so hundreds of candidates take milliseconds.
+    
+    Args:
+        candidate_groups: Groups from create_purchase_candidates()
+        available_points: Available skill points
+    
+    Returns:
+        tuple: (purchase_plan, total_cost, remaining_points) - plan in priority order
+    """
+    budget = max(int(available_points), 0)
+    # best[p] = highest value with at most p points spent
+    best = np.zeros(budget + 1)
+    choices = []
+    for group in candidate_groups:
+        new_best = best.copy()
+        choice = np.full(budget + 1, -1, dtype=np.int16)
+        for index, option in enumerate(group['options']):
+            cost = option['cost']
+            if cost > budget:
+                continue
+            candidate = np.full(budget + 1, -np.inf)
+            candidate[cost:] = best[:budget + 1 - cost] + option['value']
+            better = candidate > new_best
+            new_best[better] = candidate[better]
+            choice[better] = index
+        best = new_best
+        choices.append(choice)
+    
+    # Walk back through the groups to recover the chosen options
+    purchase_plan = []
+    points = budget
+    for group, choice in zip(reversed(candidate_groups), reversed(choices)):
+        index = choice[points]
+        if index >= 0:
+            option = group['options'][index]
+            purchase_plan.append(option['skill'])
+            points -= option['cost']
+    purchase_plan.reverse()
+    
+    total_cost = sum(int(skill['price']) for skill in purchase_plan)
+    remaining_points = available_points - total_cost
+    
+    print(f"\n[INFO] Optimizing skill purchases for {available_points} points")
+    print("=" * 60)
+    for skill in purchase_plan:
+        print(f"✅ {skill['name']:<30} | Cost: {skill['price']}")
+    print("=" * 60)
+    print(f"[INFO] Budget Summary:")
+    print(f"   Available points: {available_points}")
+    print(f"   Total cost: {total_cost}")
+    print(f"   Remaining points: {remaining_points}")
+    print(f"   Total value: {best[budget]:.1f}")
+    
+    return purchase_plan, total_cost, remaining_points
+
 def calculate_total_cost(purchase_plan):
     """Calculate total skill points needed for purchase plan."""
     total = sum(int(skill['price']) for skill in purchase_plan if skill['price'].isdigit())
@@ -258,5 +376,61 @@ def test_purchase_optimizer():
     # Print summary
     print_purchase_summary(purchase_plan)
 
+def _plan_value(plan, candidate_groups):
+    values = {id(option['skill']): option['value'] for group in candidate_groups for option in group['options']}
+    return sum(values[id(skill)] for skill in plan)
+
+def test_knapsack_optimizer(rounds=200, seed=1):
+    """
+    Offline check of optimize_skill_purchases: compares it with brute force on
+    small random cases and with the greedy filter on create_purchase_plan.
+    """
+    print("🧪 Testing knapsack optimizer against brute force and greedy...")
+    rng = random.Random(seed)
+    better_than_greedy = 0
+    for _ in range(rounds):
+        skills, priority, gold_upgrades = [], [], {}
+        for i in range(rng.randint(1, 8)):
+            name = f"Skill {i}"
+            skills.append({'name': name, 'price': str(rng.randrange(60, 400, 10))})
+            priority.append(name)
+            if rng.random() < 0.3:
+                base_name = f"Base {i}"
+                skills.append({'name': base_name, 'price': str(rng.randrange(60, 250, 10))})
+                gold_upgrades[name] = base_name
+        config = {"skill_priority": priority, "gold_skill_upgrades": gold_upgrades}
+        points = rng.randrange(0, 1200, 10)
+        with contextlib.redirect_stdout(io.StringIO()):
+            groups = create_purchase_candidates(skills, config)
+            plan, total_cost, _ = optimize_skill_purchases(groups, points)
+            greedy_plan, _, _ = filter_affordable_skills(create_purchase_plan(skills, config), points)
+        assert total_cost <= points, "plan is over budget"
+        
+        # Brute force: every combination of at most one option per group
+        best_value = 0.0
+        for picks in product(*[[None] + group['options'] for group in groups]):
+            chosen = [option for option in picks if option]
+            if sum(option['cost'] for option in chosen) <= points:
+                best_value = max(best_value, sum(option['value'] for option in chosen))
+        value = _plan_value(plan, groups)
+        assert abs(value - best_value) < 1e-6, f"knapsack value {value} != brute force {best_value}"
+        
+        greedy_value = _plan_value(greedy_plan, groups)
+        assert value >= greedy_value - 1e-6, "knapsack worse than greedy"
+        if value > greedy_value + 1e-6:
+            better_than_greedy += 1
+    
+    # Speed on a large case
+    skills = [{'name': f"Skill {i}", 'price': str(rng.randrange(60, 400, 10))} for i in range(300)]
+    config = {"skill_priority": [skill['name'] for skill in skills], "gold_skill_upgrades": {}}
+    groups = create_purchase_candidates(skills, config)
+    start_time = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimize_skill_purchases(groups, 3000)
+    elapsed = (time.time() - start_time) * 1000
+    
+    print(f"✅ {rounds} cases match brute force, {better_than_greedy} beat greedy; 300 skills / 3000 points in {elapsed:.1f} ms")
+
 if __name__ == "__main__":
+    test_knapsack_optimizer()
     test_purchase_optimizer()
@@ -2,14 +2,16 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
-import time
 import re
 import json
-from utils.adb_screenshot import take_screenshot, run_adb_command
+from utils.adb_screenshot import take_screenshot
+from utils.adb_input import swipe
+from utils.config_file import CONFIG_FILE
+from utils import clock
 
 # Load config for debug mode
 try:
-    with open("config.json", "r") as f:
+    with open(CONFIG_FILE, "r") as f:
         config = json.load(f)
     DEBUG_MODE = config.get("debug_mode", False)
 except:
@@ -20,8 +22,18 @@ def debug_print(message):
     if DEBUG_MODE:
         print(message)
 
+# Scrolling part of the skill screen (left, top, right, bottom)
+SKILL_LIST_REGION = (0, 690, 1080, 1640)
+SCROLL_MIN_OVERLAP = 120  # Rows that must overlap between two frames to measure a scroll
+SCROLL_SEARCH_MARGIN = 100  # Extra pixels searched beyond the swipe distance
+SCROLL_MATCH_MAX_ERROR = 20.0  # Mean gray difference above which two frames don't line up
+SCROLL_STILL_ERROR = 1.0  # Mean gray difference below which the list counts as still
+SCROLL_END_OFFSET = 2  # A swipe moving the list this little means the end was reached
+SKILL_ROW_TOLERANCE = 30  # Buttons this close in list coordinates are the same skill
+
 try:
     import pytesseract
+    from core.ocr import batch_image_to_string, cached_image_to_string
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
@@ -99,8 +111,7 @@ def perform_swipe(start_x, start_y, end_x, end_y, duration=1000):
         bool: True if swipe was successful, False otherwise
     """
     try:
-        swipe_command = ['shell', 'input', 'swipe', str(start_x), str(start_y), str(end_x), str(end_y), str(duration)]
-        result = run_adb_command(swipe_command)
+        result = swipe(start_x, start_y, end_x, end_y, duration)
         if result is not None:
             debug_print(f"[DEBUG] Swiped from ({start_x}, {start_y}) to ({end_x}, {end_y})")
             return True
@@ -111,100 +122,116 @@ def perform_swipe(start_x, start_y, end_x, end_y, duration=1000):
         debug_print(f"[DEBUG] Error performing swipe: {e}")
         return False
 
-def extract_skill_info(screenshot, button_x, button_y, anchor_x=946, anchor_y=809):
+def skill_info_regions(button_x, button_y, anchor_x=946, anchor_y=809):
     """
-    Extract skill name and price from screenshot using button position as anchor.
+    Name and price regions of a skill, relative to its skill_up button.
     
     Args:
-        screenshot: PIL Image of the screen
         button_x, button_y: Detected skill_up button position
         anchor_x, anchor_y: Reference anchor position (946, 809)
     
     Returns:
-        dict: {'name': str, 'price': str, 'name_region': tuple, 'price_region': tuple}
+        tuple: (name_region, price_region)
+    """
+    # Calculate offset from anchor position
+    offset_x = button_x - anchor_x
+    offset_y = button_y - anchor_y
+    
+    # Define regions relative to anchor
+    # Skill name region: 204, 719, 732, 788 (width: 528, height: 69)
+    name_region = (204 + offset_x, 719 + offset_y, 732 + offset_x, 788 + offset_y)
+    
+    # Skill price region: 834, 803, 927, 854 (width: 93, height: 51)
+    price_region = (834 + offset_x, 803 + offset_y, 927 + offset_x, 854 + offset_y)
+    return name_region, price_region
+
+def extract_skills_info(screenshot, buttons):
     """
+    Extract names and prices of several skills with batched OCR.
+    All names are read in one Tesseract call and all prices in another;
+    only prices the batch couldn't read get the single crop fallbacks.
+    
+    Args:
+        screenshot: PIL Image of the screen
+        buttons: List of (button_x, button_y) skill_up button positions
+    
+    Returns:
+        list: {'name': str, 'price': str, 'name_region': tuple, 'price_region': tuple} per button
+    """
+    if not OCR_AVAILABLE:
+        return [{
+            'name': 'OCR not available',
+            'price': 'OCR not available',
+            'name_region': None,
+            'price_region': None
+        } for _ in buttons]
+    if not buttons:
+        return []
+    
+    regions = [skill_info_regions(x, y) for x, y in buttons]
+    results = [{
+        'name': "Name Error",
+        'price': "Price Error",
+        'name_region': name_region,
+        'price_region': price_region
+    } for name_region, price_region in regions]
+    
     try:
-        if not OCR_AVAILABLE:
-            return {
-                'name': 'OCR not available',
-                'price': 'OCR not available',
-                'name_region': None,
-                'price_region': None
-            }
+        name_crops = [screenshot.crop(name_region) for name_region, _ in regions]
+        price_crops = [screenshot.crop(price_region) for _, price_region in regions]
         
-        # Calculate offset from anchor position
-        offset_x = button_x - anchor_x
-        offset_y = button_y - anchor_y
-        
-        # Define regions relative to anchor
-        # Skill name region: 204, 719, 732, 788 (width: 528, height: 69)
-        name_x1 = 204 + offset_x
-        name_y1 = 719 + offset_y
-        name_x2 = 732 + offset_x
-        name_y2 = 788 + offset_y
-        name_region = (name_x1, name_y1, name_x2, name_y2)
-        
-        # Skill price region: 834, 803, 927, 854 (width: 93, height: 51)
-        price_x1 = 834 + offset_x
-        price_y1 = 803 + offset_y
-        price_x2 = 927 + offset_x
-        price_y2 = 854 + offset_y
-        price_region = (price_x1, price_y1, price_x2, price_y2)
-        
-        # Extract skill name with simple OCR
-        skill_name = "Name Error"
-        try:
-            name_crop = screenshot.crop(name_region)
-            skill_name_raw = pytesseract.image_to_string(name_crop, lang='eng').strip()
-            skill_name = clean_skill_name(skill_name_raw)
-        except Exception as e:
-            debug_print(f"[DEBUG] Name OCR error: {e}")
+        # One call for all names, one for all prices
+        texts = batch_image_to_string([(crop, '') for crop in name_crops] + [(crop, '--psm 7') for crop in price_crops], lang='eng')
+        name_texts, price_texts = texts[:len(buttons)], texts[len(buttons):]
+    except Exception as e:
+        debug_print(f"[DEBUG] Batched skill OCR error: {e}")
+        return results
+    
+    for result, name_text, price_crop, price_text in zip(results, name_texts, price_crops, price_texts):
+        result['name'] = clean_skill_name(name_text.strip())
         
-        # Extract skill price with simple OCR
-        skill_price = "Price Error"
         try:
-            price_crop = screenshot.crop(price_region)
-            
-            # Try multiple OCR approaches
-            skill_price_raw = ""
-            
-            # Approach 1: Simple OCR
-            skill_price_raw = pytesseract.image_to_string(price_crop, lang='eng').strip()
+            skill_price_raw = price_text.strip()
             
-            # Approach 2: If empty, try with digits-only config
+            # If empty, try with digits-only config
             if not skill_price_raw:
-                skill_price_raw = pytesseract.image_to_string(price_crop, config='--psm 8 -c tessedit_char_whitelist=0123456789').strip()
+                skill_price_raw = cached_image_to_string(price_crop, config='--psm 8 -c tessedit_char_whitelist=0123456789').strip()
             
-            # Approach 3: If still empty, try different PSM
+            # If still empty, try the single crop read
             if not skill_price_raw:
-                skill_price_raw = pytesseract.image_to_string(price_crop, config='--psm 7').strip()
+                skill_price_raw = cached_image_to_string(price_crop, config='--psm 7').strip()
             
             debug_print(f"[DEBUG] Raw price OCR: '{skill_price_raw}'")
-            skill_price = clean_skill_price(skill_price_raw)
-            debug_print(f"[DEBUG] Cleaned price: '{skill_price}'")
+            result['price'] = clean_skill_price(skill_price_raw)
+            debug_print(f"[DEBUG] Cleaned price: '{result['price']}'")
             
             # Save debug image if price OCR still fails
-            if not skill_price_raw or skill_price == "0":
-                debug_filename = f"debug_price_{skill_name.replace(' ', '_')}.png"
+            if not skill_price_raw or result['price'] == "0":
+                debug_filename = f"debug_price_{result['name'].replace(' ', '_')}.png"
                 price_crop.save(debug_filename)
                 debug_print(f"[DEBUG] Saved debug image: {debug_filename}")
                 
         except Exception as e:
             debug_print(f"[DEBUG] Price OCR error: {e}")
-        
-        result = {
-            'name': skill_name,
-            'price': skill_price,
-            'name_region': name_region,
-            'price_region': price_region
-        }
-        return result
-        
+    
+    return results
+
+def extract_skill_info(screenshot, button_x, button_y, anchor_x=946, anchor_y=809):
+    """
+    Extract skill name and price from screenshot using button position as anchor.
+    
+    Args:
+        screenshot: PIL Image of the screen
+        button_x, button_y: Detected skill_up button position
+        anchor_x, anchor_y: Reference anchor position (946, 809)
+    
+    Returns:
+        dict: {'name': str, 'price': str, 'name_region': tuple, 'price_region': tuple}
+    """
+    try:
+        return extract_skills_info(screenshot, [(button_x + 946 - anchor_x, button_y + 809 - anchor_y)])[0]
     except Exception as e:
         debug_print(f"[DEBUG] Error extracting skill info: {e}")
-        debug_print(f"[DEBUG] Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
         return {
             'name': 'Error',
             'price': 'Error',
@@ -313,7 +340,7 @@ def is_button_available(screenshot, x, y, width, height, brightness_threshold=15
 
 def recognize_skill_up_locations(confidence=0.9, debug_output=True, overlap_threshold=0.5, 
                                filter_dark_buttons=True, brightness_threshold=150,
-                               extract_skills=True):
+                               extract_skills=True, screenshot=None):
     """
     Recognize and count skill_up.png locations on screen using ADB capture.
     
@@ -324,6 +351,7 @@ def recognize_skill_up_locations(confidence=0.9, debug_output=True, overlap_thre
         filter_dark_buttons: Whether to filter out dark/unavailable skill buttons
         brightness_threshold: Minimum average brightness for available buttons (0-255)
         extract_skills: Whether to extract skill names and prices using OCR
+        screenshot: Frame to search (optional, a new one is captured if not given)
     
     Returns:
         dict: {
@@ -335,7 +363,8 @@ def recognize_skill_up_locations(confidence=0.9, debug_output=True, overlap_thre
     """
     try:
         # Take screenshot
-        screenshot = take_screenshot()
+        if screenshot is None:
+            screenshot = take_screenshot()
         
         # Load skill_up template
         template_path = "assets/buttons/skill_up.png"
@@ -406,33 +435,18 @@ def recognize_skill_up_locations(confidence=0.9, debug_output=True, overlap_thre
         skills_info = []
         if extract_skills and available_matches:
             debug_print(f"[DEBUG] Extracting skill information using OCR...")
-            for i, (x, y, w, h) in enumerate(available_matches):
-                try:
-                    skill_info = extract_skill_info(screenshot, x, y)
-                    skill_data = {
-                        'name': skill_info['name'],
-                        'price': skill_info['price'],
-                        'location': (x, y, w, h),
-                        'regions': {
-                            'name_region': skill_info['name_region'],
-                            'price_region': skill_info['price_region']
-                        }
-                    }
-                    skills_info.append(skill_data)
-                    debug_print(f"[DEBUG] {i+1}. {skill_info['name']} - {skill_info['price']}")
-                except Exception as e:
-                    debug_print(f"[DEBUG] {i+1}. Error extracting skill: {e}")
-                    # Add a fallback skill entry
-                    skill_data = {
-                        'name': f'Skill {i+1} (Error)',
-                        'price': 'Error',
-                        'location': (x, y, w, h),
-                        'regions': {
-                            'name_region': None,
-                            'price_region': None
-                        }
+            infos = extract_skills_info(screenshot, [(x, y) for x, y, w, h in available_matches])
+            for i, ((x, y, w, h), skill_info) in enumerate(zip(available_matches, infos)):
+                skills_info.append({
+                    'name': skill_info['name'],
+                    'price': skill_info['price'],
+                    'location': (x, y, w, h),
+                    'regions': {
+                        'name_region': skill_info['name_region'],
+                        'price_region': skill_info['price_region']
                     }
-                    skills_info.append(skill_data)
+                })
+                debug_print(f"[DEBUG] {i+1}. {skill_info['name']} - {skill_info['price']}")
         
         debug_image_path = None
         
@@ -571,7 +585,7 @@ def generate_debug_image(screenshot, locations, confidence, brightness_info=None
             draw.text((10, 10), summary_text, fill="blue")
         
         # Save debug image with timestamp
-        timestamp = int(time.time())
+        timestamp = int(clock.time())
         debug_filename = f"debug_skill_up_{timestamp}.png"
         debug_path = os.path.join("debug_images", debug_filename)
         
@@ -673,114 +687,200 @@ def test_skill_recognition():
     debug_print("[DEBUG] " + "=" * 60)
     debug_print("[DEBUG] Test completed!")
 
+def _list_strip(screenshot, region=SKILL_LIST_REGION):
+    """Grayscale crop of the scrolling list, shrunk horizontally (rows keep full resolution)"""
+    gray = screenshot.crop(region).convert("L")
+    gray = gray.resize((max(1, gray.width // 8), gray.height), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float32)
+
+def _best_row_shift(a, b, offsets):
+    """Offset from `offsets` where rows of `a` shifted up best match `b`, with its mean difference"""
+    height = a.shape[0]
+    best_offset, best_error = 0, None
+    for offset in offsets:
+        error = float(np.mean(np.abs(a[offset:] - b[:height - offset])))
+        if best_error is None or error < best_error:
+            best_offset, best_error = offset, error
+    return best_offset, best_error
+
+def estimate_scroll_offset(previous_frame, frame, max_offset=None, region=SKILL_LIST_REGION):
+    """
+    Estimate how far a list scrolled between two frames by aligning their rows.
+    Searches a 4x downsampled strip first, then refines around the best match at full resolution.
+    
+    Args:
+        previous_frame: PIL Image before the scroll
+        frame: PIL Image after the scroll
+        max_offset: Largest offset to consider in pixels (optional)
+        region: List area as a PIL box (default: the skill list)
+    
+    Returns:
+        tuple: (offset, error) - pixels the list content moved up, mean gray difference of the overlap
+    """
+    a = _list_strip(previous_frame, region)
+    b = _list_strip(frame, region)
+    height = a.shape[0]
+    limit = height - SCROLL_MIN_OVERLAP
+    if max_offset is not None:
+        limit = min(limit, max_offset)
+    limit = max(limit, 0)
+
+    # Coarse pass on every 4th row
+    coarse_offset, _ = _best_row_shift(a[::4], b[::4], range(0, limit // 4 + 1))
+    # Fine pass around the coarse result
+    fine_range = range(max(0, coarse_offset * 4 - 4), min(limit, coarse_offset * 4 + 4) + 1)
+    offset, error = _best_row_shift(a, b, fine_range)
+    debug_print(f"[DEBUG] Scroll offset: {offset}px (difference {error:.1f})")
+    return offset, error
+
+def wait_for_still_list(previous=None, timeout=1.5, poll_interval=0.1, region=SKILL_LIST_REGION):
+    """
+    Capture frames until a list stops moving (two consecutive frames match).
+    
+    Returns:
+        PIL Image: The first still frame, or the last frame captured at timeout
+    """
+    frame = previous if previous is not None else take_screenshot()
+    strip = _list_strip(frame, region)
+    start_time = clock.time()
+    while clock.time() - start_time < timeout:
+        clock.sleep(poll_interval)
+        frame = take_screenshot()
+        next_strip = _list_strip(frame, region)
+        if float(np.mean(np.abs(strip - next_strip))) < SCROLL_STILL_ERROR:
+            break
+        strip = next_strip
+    return frame
+
 def scan_all_skills_with_scroll(swipe_start_x=504, swipe_start_y=1492, swipe_end_x=504, swipe_end_y=926,
-                               confidence=0.9, brightness_threshold=150, max_scrolls=20):
+                               confidence=0.9, brightness_threshold=150, max_scrolls=20, lexicon=None):
     """
-    Scan all available skills by scrolling through the list until duplicates are found.
+    Scan all available skills by scrolling through the list.
     Uses optimized slow swipe for smooth scrolling without acceleration.
     
+    The scroll offset between consecutive frames is measured by aligning their rows,
+    so only skills newly revealed by a scroll are read with OCR, and the end of the
+    list is reached when a swipe no longer moves it.
+    
     Args:
         swipe_start_x, swipe_start_y: Starting coordinates for swipe
         swipe_end_x, swipe_end_y: Ending coordinates for swipe
         confidence: Template matching confidence (default: 0.9)
         brightness_threshold: Brightness threshold for available buttons (default: 150)
         max_scrolls: Maximum number of scrolls to prevent infinite loops (default: 20)
+        lexicon: SkillNameIndex of known skill names (optional), OCR'd names that match one
+                 get it as 'canonical_name'
     
     Returns:
         dict: {
-            'all_skills': [list of all unique skills found],
+            'all_skills': [list of all unique skills found, each with 'list_y': button y in list coordinates
+                           and 'canonical_name' (None without a lexicon match)],
             'total_unique_skills': int,
             'scrolls_performed': int,
-            'duplicate_found': str or None
+            'scroll_offset': int (list coordinate of the screen top after the scan),
+            'end_of_list': bool,
+            'duplicate_found': None (kept for compatibility)
         }
     """
     debug_print("[DEBUG] Scanning all available skills with scrolling")
     debug_print("[DEBUG] " + "=" * 60)
     
     all_skills = []
-    seen_skill_names = set()
     scrolls_performed = 0
-    duplicate_found = None
+    scroll_offset = 0  # List coordinate of the screen top, 0 = where the scan started
+    end_of_list = False
+    swipe_distance = abs(swipe_start_y - swipe_end_y)
     
     try:
-        while scrolls_performed < max_scrolls:
-            debug_print(f"[DEBUG] Scroll {scrolls_performed + 1}/{max_scrolls}")
+        frame = take_screenshot()
+        while True:
+            debug_print(f"[DEBUG] Scroll {scrolls_performed + 1}/{max_scrolls} (offset {scroll_offset}px)")
             
-            # Take screenshot and detect skills
+            # Detect buttons on this frame, OCR only the ones not seen at this list position
             result = recognize_skill_up_locations(
                 confidence=confidence,
                 debug_output=False,
                 filter_dark_buttons=True,
                 brightness_threshold=brightness_threshold,
-                extract_skills=True
+                extract_skills=False,
+                screenshot=frame
             )
             
             if 'error' in result:
                 debug_print(f"[DEBUG] Error during skill detection: {result['error']}")
                 break
             
-            current_skills = result.get('skills', [])
-            new_skills_found = 0
+            new_locations = []
+            for (x, y, w, h) in result.get('locations', []):
+                list_y = int(y) + scroll_offset
+                if any(abs(skill['list_y'] - list_y) <= SKILL_ROW_TOLERANCE for skill in all_skills):
+                    continue
+                new_locations.append((x, y, w, h))
             
-            if not current_skills:
-                debug_print("[DEBUG] No skills found on this screen")
-                # Don't break here - continue scrolling to find skills
-                # Only break if we've tried several empty screens in a row
-                if scrolls_performed >= 3 and len(all_skills) == 0:
-                    debug_print("[DEBUG] No skills found after 3 scrolls - may not be on skill screen")
-                    break
-            else:
-                # Check for duplicates and add new skills
-                for skill in current_skills:
-                    skill_name = skill['name']
-                    
-                    if skill_name in seen_skill_names:
-                        debug_print(f"[DEBUG] Duplicate found: '{skill_name}' - end of list reached")
-                        duplicate_found = skill_name
-                        debug_print("[DEBUG] Stopping scan - we've looped back to already seen skills")
-                        break
-                    else:
-                        seen_skill_names.add(skill_name)
-                        all_skills.append(skill)
-                        new_skills_found += 1
-                        debug_print(f"[DEBUG] {len(all_skills)}. {skill_name} - {skill['price']}")
-                
-                # Stop if duplicate found
-                if duplicate_found:
-                    break
+            # Names and prices of all new skills in one batch
+            infos = extract_skills_info(frame, [(x, y) for x, y, w, h in new_locations])
+            for (x, y, w, h), skill_info in zip(new_locations, infos):
+                list_y = int(y) + scroll_offset
+                all_skills.append({
+                    'name': skill_info['name'],
+                    'canonical_name': lexicon.best_match(skill_info['name']) if lexicon else None,
+                    'price': skill_info['price'],
+                    'location': (x, y, w, h),
+                    'list_y': list_y,
+                    'regions': {
+                        'name_region': skill_info['name_region'],
+                        'price_region': skill_info['price_region']
+                    }
+                })
+                debug_print(f"[DEBUG] {len(all_skills)}. {skill_info['name']} - {skill_info['price']} (list y {list_y})")
+            new_skills_found = len(new_locations)
             
             debug_print(f"[DEBUG] Found {new_skills_found} new skills (Total: {len(all_skills)})")
             
+            if scrolls_performed >= max_scrolls:
+                break
+            
             # Perform swipe to scroll down
+            debug_print("[DEBUG] Scrolling")
+            success = perform_swipe(swipe_start_x, swipe_start_y, swipe_end_x, swipe_end_y)
             scrolls_performed += 1
-            if scrolls_performed < max_scrolls:
-                debug_print("[DEBUG] Scrolling")
-                success = perform_swipe(swipe_start_x, swipe_start_y, swipe_end_x, swipe_end_y)
-                
-                if not success:
-                    debug_print("[DEBUG] Failed to perform swipe, stopping scan")
-                    break
-                
-                # Wait for scroll animation to complete
-                time.sleep(1.5)
+            if not success:
+                debug_print("[DEBUG] Failed to perform swipe, stopping scan")
+                break
+            
+            # Wait for the list to stop moving, then measure how far it went
+            next_frame = wait_for_still_list()
+            offset, error = estimate_scroll_offset(frame, next_frame, max_offset=swipe_distance + SCROLL_SEARCH_MARGIN)
+            if error > SCROLL_MATCH_MAX_ERROR:
+                print(f"[WARNING] Could not align skill list frames (difference {error:.1f}), stopping scan")
+                break
+            if offset <= SCROLL_END_OFFSET:
+                debug_print("[DEBUG] List did not move - end of list reached")
+                end_of_list = True
+                break
+            scroll_offset += offset
+            frame = next_frame
+        
+        # Keep the list order even if a row was first seen lower on the screen
+        all_skills.sort(key=lambda skill: skill['list_y'])
         
         # Summary
         debug_print(f"[DEBUG] " + "=" * 60)
         debug_print(f"[DEBUG] Skill Scan Complete")
         debug_print(f"[DEBUG]    Total unique skills found: {len(all_skills)}")
         debug_print(f"[DEBUG]    Scrolls performed: {scrolls_performed}")
-        if duplicate_found:
-            debug_print(f"[DEBUG] Stopped due to duplicate: {duplicate_found}")
+        if end_of_list:
+            debug_print(f"[DEBUG] Scan completed - reached end of list")
         elif scrolls_performed >= max_scrolls:
             debug_print(f"[DEBUG] Stopped due to max scroll limit reached")
-        else:
-            debug_print(f"[DEBUG] Scan completed - reached end of list")
         
         return {
             'all_skills': all_skills,
             'total_unique_skills': len(all_skills),
             'scrolls_performed': scrolls_performed,
-            'duplicate_found': duplicate_found
+            'scroll_offset': scroll_offset,
+            'end_of_list': end_of_list,
+            'duplicate_found': None
         }
         
     except Exception as e:
@@ -789,6 +889,8 @@ def scan_all_skills_with_scroll(swipe_start_x=504, swipe_start_y=1492, swipe_end
             'all_skills': all_skills,
             'total_unique_skills': len(all_skills),
             'scrolls_performed': scrolls_performed,
+            'scroll_offset': scroll_offset,
+            'end_of_list': end_of_list,
             'duplicate_found': None,
             'error': str(e)
         }
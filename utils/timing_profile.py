@@ -0,0 +1,240 @@
+"""Per-device timing profiles.
+
+The waits after screen changes (lobby -> training, opening the race list, ...)
+used to be fixed sleeps tuned on one machine. Each of them is now a named
+transition whose wait comes from the device's profile in timing_profiles.json:
+the p95 of the settle times measured on that device plus a small margin.
+
+    calibrate: true   every transition is measured instead of slept: frames are
+                      captured until the transition's region (still UI such as
+                      the button bar, not the animated character) has changed
+                      and stopped changing
+    report_miss(name) a flow didn't find what it expected after the wait, so the
+                      wait grows right away and the next occurrence is measured
+
+Devices without samples for a transition keep the old fixed wait.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.adb_screenshot import take_screenshot, current_device
+from utils.config_file import CONFIG_FILE
+from utils.constants_phone import FAILURE_REGION
+from utils import clock
+
+# Load config for debug mode
+try:
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+    DEBUG_MODE = config.get("debug_mode", False)
+except:
+    config = {}
+    DEBUG_MODE = False
+
+def debug_print(message):
+    """Print debug message only if DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        print(message)
+
+TIMING_CONFIG = config.get("timing_profile", {})
+TIMING_ENABLED = TIMING_CONFIG.get("enabled", True)
+PROFILE_PATH = TIMING_CONFIG.get("path", "timing_profiles.json")
+CALIBRATE = TIMING_CONFIG.get("calibrate", False)
+PERCENTILE = TIMING_CONFIG.get("percentile", 95)
+MARGIN = TIMING_CONFIG.get("margin", 0.1)  # Seconds added to the percentile
+
+# Still UI the settle measurement watches, (left, top, right, bottom). The lobby
+# and training screens show an animated character, so whole frames never stop
+# changing; these regions only cover buttons, stats and lists.
+LOBBY_BUTTONS_REGION = (0, 1500, 1080, 1780)
+TRAINING_STATS_REGION = (0, 1270, 1080, 1460)  # Stats and failure rate row
+LIST_REGION = (0, 300, 1080, 1400)  # Race and skill lists
+RACE_BUTTON_REGION = (0, 1400, 1080, 1920)
+
+# Transition name -> (the fixed wait it replaces, used until the device has samples, region to measure)
+TRANSITIONS = {
+    "lobby_ready": (1.0, LOBBY_BUTTONS_REGION),       # before looking for the training button
+    "training_screen": (1.0, TRAINING_STATS_REGION),  # training button -> training screen
+    "training_preview": (0.3, FAILURE_REGION),        # hover swipe -> training preview
+    "back_to_lobby": (1.0, LOBBY_BUTTONS_REGION),     # back button -> lobby
+    "race_menu": (1.2, LIST_REGION),                  # races button -> race menu
+    "race_list": (1.5, LIST_REGION),                  # race menu -> race list loaded
+    "race_selected": (0.2, RACE_BUTTON_REGION),       # race card tap -> race button
+    "skill_list_top": (1.5, LIST_REGION),             # fast swipes -> skill list at rest
+}
+
+MAX_SAMPLES = 20  # Newest settle times kept per transition
+MIN_WAIT = 0.05
+MAX_WAIT_FACTOR = 3.0  # A wait never grows past this multiple of its default
+MISS_FACTOR = 1.25  # Wait growth when a flow reports a miss
+SETTLE_POLL = 0.05
+SETTLE_DIFF_LEVEL = 12  # Gray levels a pixel may change by and still count as unchanged
+SETTLE_DIFF_RATIO = 0.003  # Fraction of changed pixels below which two frames are the same
+
+def _gray(frame, region=None):
+    """Downscaled grayscale pixels of a frame (region as left, top, right, bottom)"""
+    if region is not None:
+        frame = frame.crop(region)
+    frame = frame.convert("L")
+    frame = frame.resize((max(1, frame.width // 4), max(1, frame.height // 4)))
+    return np.asarray(frame, dtype=np.int16)
+
+def _same(a, b):
+    changed = np.count_nonzero(np.abs(a - b) > SETTLE_DIFF_LEVEL)
+    return changed <= a.size * SETTLE_DIFF_RATIO
+
+def measure_settle(no_change_timeout, timeout, region=None):
+    """
+    Seconds until the screen settles after an action that just happened.
+
+    Frames are captured until one differs from the first and the next one is the
+    same again. A screen that doesn't change within no_change_timeout gives no
+    measurement: the transition may have been over before the first frame, or
+    not have started yet on a slow device, and the two look the same.
+
+    Returns:
+        tuple: (settle time, "settled"), (None, "moving") if the screen still
+            changed at timeout, (None, "unchanged") if it never changed
+    """
+    start = clock.monotonic()
+    previous = _gray(take_screenshot(), region)
+    first = previous
+    changed = False
+    while True:
+        clock.sleep(SETTLE_POLL)
+        current = _gray(take_screenshot(), region)
+        elapsed = clock.monotonic() - start
+        if not changed:
+            if not _same(first, current):
+                changed = True
+            elif elapsed >= no_change_timeout:
+                return None, "unchanged"
+        elif _same(previous, current):
+            return elapsed, "settled"
+        if elapsed >= timeout:
+            return None, "moving"
+        previous = current
+
+class TimingProfile:
+    """Settle times and waits of one device"""
+
+    def __init__(self, device_address, data=None):
+        self.device_address = device_address
+        self.samples = {name: list(entry.get("samples", [])) for name, entry in (data or {}).items()}
+        self.waits = {name: entry["wait"] for name, entry in (data or {}).items() if "wait" in entry}
+        self.recalibrate = set()
+
+    def wait(self, name):
+        return self.waits.get(name, TRANSITIONS[name][0])
+
+    def _limit(self, name, seconds):
+        return min(max(seconds, MIN_WAIT), TRANSITIONS[name][0] * MAX_WAIT_FACTOR)
+
+    def add_sample(self, name, seconds):
+        samples = self.samples.setdefault(name, [])
+        samples.append(round(seconds, 3))
+        del samples[:-MAX_SAMPLES]
+        self.waits[name] = round(self._limit(name, float(np.percentile(samples, PERCENTILE)) + MARGIN), 3)
+        debug_print(f"[DEBUG] Timing {self.device_address} {name}: settled in {seconds:.2f}s, wait now {self.waits[name]:.2f}s ({len(samples)} samples)")
+
+    def report_miss(self, name):
+        """The wait for `name` looked too short: grow it now and measure the next one"""
+        self.waits[name] = round(self._limit(name, self.wait(name) * MISS_FACTOR), 3)
+        self.recalibrate.add(name)
+        debug_print(f"[DEBUG] Timing {self.device_address} {name}: miss reported, wait now {self.waits[name]:.2f}s")
+
+    def to_dict(self):
+        return {
+            name: {"wait": self.wait(name), "samples": self.samples.get(name, [])}
+            for name in sorted(set(self.samples) | set(self.waits))
+        }
+
+_profiles = {}
+_lock = threading.Lock()
+
+def load_profiles(path=PROFILE_PATH):
+    """{device address: profile data} from the profile file, empty if there is none"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARNING] Could not load timing profiles from {path}: {e}")
+        return {}
+
+def save_profiles(path=PROFILE_PATH):
+    """Write every loaded profile back, keeping devices this process never used"""
+    with _lock:
+        data = load_profiles(path)
+        data.update({address: profile.to_dict() for address, profile in _profiles.items()})
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARNING] Could not save timing profiles to {path}: {e}")
+
+def get_timing_profile(device_address=None):
+    """Profile of the device the caller is bound to, None when disabled in config"""
+    if not TIMING_ENABLED:
+        return None
+    if device_address is None:
+        device_address = current_device()
+    with _lock:
+        profile = _profiles.get(device_address)
+        if profile is None:
+            profile = TimingProfile(device_address, load_profiles().get(device_address))
+            _profiles[device_address] = profile
+        return profile
+
+def settle(name):
+    """
+    Wait for transition `name` to finish after the action that started it.
+    Sleeps the device's profiled wait, or measures the settle time of the
+    transition's region in calibration mode and after a reported miss.
+    """
+    profile = get_timing_profile()
+    if profile is None:
+        clock.sleep(TRANSITIONS[name][0])
+        return
+    if not CALIBRATE and name not in profile.recalibrate:
+        clock.sleep(profile.wait(name))
+        return
+
+    profile.recalibrate.discard(name)
+    default, region = TRANSITIONS[name]
+    elapsed, outcome = measure_settle(default, default * MAX_WAIT_FACTOR, region)
+    if outcome == "moving":
+        # Still moving at the longest allowed wait, treat as a miss
+        profile.report_miss(name)
+        profile.recalibrate.discard(name)
+    elif outcome == "unchanged":
+        # Not a settle time of ~0s, the wait stays as it is
+        debug_print(f"[DEBUG] Timing {profile.device_address} {name}: no change seen, no sample")
+        return
+    else:
+        profile.add_sample(name, elapsed)
+    save_profiles()
+
+def report_miss(name):
+    """A flow didn't find what should be on screen after transition `name`"""
+    profile = get_timing_profile()
+    if profile is None:
+        return
+    profile.report_miss(name)
+    save_profiles()
+
+def print_timing_profiles():
+    """Print the waits stored for every device"""
+    for address, data in load_profiles().items():
+        print(f"{address or 'default device'}:")
+        for name, entry in data.items():
+            print(f"  {name:<18}{entry['wait']:>6.2f}s  (default {TRANSITIONS.get(name, (0, None))[0]:.2f}s, {len(entry['samples'])} samples)")
+
+if __name__ == "__main__":
+    print_timing_profiles()